@@ -0,0 +1,104 @@
+import math
+import time
+import threading
+from functools import wraps
+from flask import jsonify, request
+from metrics import ADMISSION_REJECTED
+
+
+class Rejected(Exception):
+    def __init__(self, reason, retry_after):
+        self.reason = reason
+        self.retry_after = retry_after
+        super().__init__(reason)
+
+
+class AdmissionController:
+    """Caps an endpoint's concurrent executions and queued callers; overload becomes fast 429s."""
+
+    def __init__(self, name, max_concurrent, max_queue, queue_timeout=5.0):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._waiting = 0
+        # EWMA of handler duration, used to size Retry-After hints.
+        self._service_time = 1.0
+
+    def retry_after(self):
+        with self._lock:
+            backlog = self._waiting + self.max_concurrent
+        return backlog * self._service_time / self.max_concurrent
+
+    def acquire(self):
+        if self._slots.acquire(blocking=False):
+            return
+        with self._lock:
+            if self._waiting >= self.max_queue:
+                raise Rejected("queue full", self._service_time * (self._waiting + 1) / self.max_concurrent)
+            self._waiting += 1
+        try:
+            admitted = self._slots.acquire(timeout=self.queue_timeout)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+        if not admitted:
+            raise Rejected("queue timeout", self.retry_after())
+
+    def release(self, elapsed):
+        with self._lock:
+            self._service_time = 0.8 * self._service_time + 0.2 * elapsed
+        self._slots.release()
+
+
+class TokenBucketLimiter:
+    """Per-client token bucket: `rate` requests per second with bursts up to `burst`."""
+
+    # Idle clients are pruned once this many buckets exist.
+    MAX_CLIENTS = 10_000
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def check(self, client):
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens < 1:
+                self._buckets[client] = (tokens, now)
+                raise Rejected("rate limited", (1 - tokens) / self.rate)
+            self._buckets[client] = (tokens - 1, now)
+            if len(self._buckets) > self.MAX_CLIENTS:
+                refill_time = self.burst / self.rate
+                self._buckets = {c: b for c, b in self._buckets.items() if now - b[1] < refill_time}
+
+
+def admission_controlled(controller, limiter=None):
+    """Flask view decorator applying the per-client limiter, then the admission controller (429 + Retry-After)."""
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                if limiter is not None:
+                    limiter.check(request.remote_addr)
+                controller.acquire()
+            except Rejected as e:
+                ADMISSION_REJECTED.inc(1, controller.name, e.reason)
+                response = jsonify({"error": f"Too many requests ({e.reason}).", "retry_after": e.retry_after})
+                return response, 429, {"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+            start = time.perf_counter()
+            try:
+                return view(*args, **kwargs)
+            finally:
+                controller.release(time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
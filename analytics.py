@@ -0,0 +1,218 @@
+import time
+import threading
+from eth_utils import to_checksum_address
+from rpc_batch import batch_results
+import serialization
+
+WETH_ADDRESS = to_checksum_address("0x4200000000000000000000000000000000000006")
+USDC_ADDRESS = to_checksum_address("0x078D782b760474a361dDA0AF3839290b0EF57AD6")
+DECIMALS = {"WETH": 18, "USDC": 6}
+
+POSITIONS_ABI = [
+    {
+        "inputs": [{"name": "tokenId", "type": "uint256"}],
+        "name": "positions",
+        "outputs": [
+            {"name": "nonce", "type": "uint96"},
+            {"name": "operator", "type": "address"},
+            {"name": "token0", "type": "address"},
+            {"name": "token1", "type": "address"},
+            {"name": "fee", "type": "uint24"},
+            {"name": "tickLower", "type": "int24"},
+            {"name": "tickUpper", "type": "int24"},
+            {"name": "liquidity", "type": "uint128"},
+            {"name": "feeGrowthInside0LastX128", "type": "uint256"},
+            {"name": "feeGrowthInside1LastX128", "type": "uint256"},
+            {"name": "tokensOwed0", "type": "uint128"},
+            {"name": "tokensOwed1", "type": "uint128"},
+        ],
+        "stateMutability": "view",
+        "type": "function",
+    }
+]
+_POSITIONS_TYPES = [output["type"] for output in POSITIONS_ABI[0]["outputs"]]
+
+
+def token_symbol(address):
+    return "WETH" if to_checksum_address(address) == WETH_ADDRESS else "USDC"
+
+
+def to_units(amounts):
+    return {token: amount / 10 ** DECIMALS[token] for token, amount in amounts.items()}
+
+
+class AnalyticsRollup:
+    """Running TVL, volume, epoch and fee aggregates over LiquidityMatching events, fed by an EventFeed."""
+
+    def __init__(self, w3, position_manager, timeline_limit=10_000, epoch_limit=1_000, fee_refresh_interval=15.0):
+        self.w3 = w3
+        self.position_manager = w3.eth.contract(address=to_checksum_address(position_manager), abi=POSITIONS_ABI)
+        self.timeline_limit = timeline_limit
+        self.epoch_limit = epoch_limit
+        # Fees are the positions' tokensOwed, re-read in one RPC batch at most this often.
+        self.fee_refresh_interval = fee_refresh_interval
+        self._lock = threading.Lock()
+        self.head_block = None
+        # Amounts in wei, reported in token units.
+        self.tvl = {"WETH": 0, "USDC": 0}
+        self.deposited = {"WETH": 0, "USDC": 0}
+        self.matched = {"WETH": 0, "USDC": 0}
+        self.unmatched = {"WETH": 0, "USDC": 0}
+        self.deposit_count = 0
+        self.tvl_timeline = []
+        self.epochs = []
+        self.positions = {}
+        self._deposits_since_epoch = 0
+        self._fees_refreshed_at = 0.0
+        self._version = 0
+        self._rendered = (None, None)
+
+    # -- ingestion -------------------------------------------------------
+    def apply(self, events, head_block):
+        """EventFeed subscriber: folds new events into the aggregates."""
+        with self._lock:
+            for item in events:
+                self._apply_event(item["event"], item["timestamp"])
+            if events or head_block != self.head_block:
+                self.head_block = head_block
+                self._version += 1
+        if self.positions and time.monotonic() - self._fees_refreshed_at >= self.fee_refresh_interval:
+            self.refresh_fees()
+
+    def _apply_event(self, event, timestamp):
+        name = event.event
+        args = event.args
+        if name in ("WethDeposited", "UsdcDeposited"):
+            token = "WETH" if name == "WethDeposited" else "USDC"
+            self.tvl[token] += args.amount
+            self.deposited[token] += args.amount
+            self.unmatched[token] += args.amount
+            self.deposit_count += 1
+            self._deposits_since_epoch += 1
+            self._record_tvl(event, timestamp)
+        elif name == "LiquidityMatched":
+            used = {token_symbol(args.token0): args.amount0, token_symbol(args.token1): args.amount1}
+            for token, amount in used.items():
+                self.matched[token] += amount
+                self.unmatched[token] = max(0, self.unmatched[token] - amount)
+            epoch = self._epoch_for(event, timestamp)
+            epoch["positions"] += 1
+            for token, amount in used.items():
+                epoch["matched_wei"][token] += amount
+            self.positions[args.tokenId] = {
+                "token_id": args.tokenId,
+                "epoch": epoch["epoch"],
+                "amounts_wei": used,
+                "tokens_owed_wei": {"WETH": 0, "USDC": 0},
+            }
+        elif name == "MatchingTriggered":
+            self._epoch_for(event, timestamp)["triggered"] = True
+        elif name == "WithdrawAndDistribute":
+            # Every deposit is returned and the contract totals reset to zero.
+            self.tvl = {"WETH": 0, "USDC": 0}
+            self.unmatched = {"WETH": 0, "USDC": 0}
+            self._record_tvl(event, timestamp)
+
+    def _epoch_for(self, event, timestamp):
+        tx_hash = event.transactionHash.hex()
+        if self.epochs and self.epochs[-1]["transaction_hash"] == tx_hash:
+            return self.epochs[-1]
+        epoch = {
+            "epoch": self.epochs[-1]["epoch"] + 1 if self.epochs else 0,
+            "block": event.blockNumber,
+            "timestamp": timestamp,
+            "transaction_hash": tx_hash,
+            "triggered": False,
+            "positions": 0,
+            "deposits": self._deposits_since_epoch,
+            "matched_wei": {"WETH": 0, "USDC": 0},
+        }
+        self._deposits_since_epoch = 0
+        self.epochs = (self.epochs + [epoch])[-self.epoch_limit :]
+        return epoch
+
+    def _record_tvl(self, event, timestamp):
+        point = {"block": event.blockNumber, "timestamp": timestamp, **to_units(self.tvl)}
+        if self.tvl_timeline and self.tvl_timeline[-1]["block"] == event.blockNumber:
+            self.tvl_timeline[-1] = point
+        else:
+            self.tvl_timeline.append(point)
+            if len(self.tvl_timeline) > self.timeline_limit:
+                del self.tvl_timeline[: len(self.tvl_timeline) - self.timeline_limit]
+
+    def refresh_fees(self):
+        """Re-reads tokensOwed0/1 for every managed position in one JSON-RPC batch."""
+        with self._lock:
+            token_ids = list(self.positions)
+        results = batch_results(
+            self.w3,
+            [
+                (
+                    "eth_call",
+                    [
+                        {
+                            "to": self.position_manager.address,
+                            "data": self.position_manager.encodeABI(fn_name="positions", args=[token_id]),
+                        },
+                        "latest",
+                    ],
+                )
+                for token_id in token_ids
+            ],
+        )
+        with self._lock:
+            for token_id, result in zip(token_ids, results):
+                position = self.w3.codec.decode(_POSITIONS_TYPES, bytes.fromhex(result[2:]))
+                token0, token1, owed0, owed1 = position[2], position[3], position[10], position[11]
+                self.positions[token_id]["tokens_owed_wei"] = {token_symbol(token0): owed0, token_symbol(token1): owed1}
+            self._fees_refreshed_at = time.monotonic()
+            self._version += 1
+
+    # -- queries ---------------------------------------------------------
+    def snapshot(self, price=None):
+        """All aggregates in token units; with `price` (USDC per WETH), TVL and fees valued in USD."""
+        with self._lock:
+            fees_owed = {"WETH": 0, "USDC": 0}
+            for position in self.positions.values():
+                for token, amount in position["tokens_owed_wei"].items():
+                    fees_owed[token] += amount
+            snapshot = {
+                "head_block": self.head_block,
+                "tvl": to_units(self.tvl),
+                "tvl_timeline": list(self.tvl_timeline),
+                "volume": {
+                    "deposited": to_units(self.deposited),
+                    "matched": to_units(self.matched),
+                    "unmatched": to_units(self.unmatched),
+                    "deposit_count": self.deposit_count,
+                },
+                "epochs": [
+                    {**{k: v for k, v in epoch.items() if k != "matched_wei"}, "matched": to_units(epoch["matched_wei"])}
+                    for epoch in self.epochs
+                ],
+                "positions": [
+                    {
+                        "token_id": position["token_id"],
+                        "epoch": position["epoch"],
+                        "amounts": to_units(position["amounts_wei"]),
+                        "tokens_owed": to_units(position["tokens_owed_wei"]),
+                    }
+                    for position in self.positions.values()
+                ],
+                "fees_owed": to_units(fees_owed),
+            }
+        if price is not None:
+            snapshot["price"] = price
+            snapshot["tvl_usd"] = snapshot["tvl"]["WETH"] * price + snapshot["tvl"]["USDC"]
+            snapshot["fees_owed_usd"] = snapshot["fees_owed"]["WETH"] * price + snapshot["fees_owed"]["USDC"]
+        return snapshot
+
+    def render(self, price=None):
+        """Serialized snapshot, cached until the aggregates or the price change."""
+        key = (self._version, price)
+        cached_key, body = self._rendered
+        if cached_key == key:
+            return body
+        body = serialization.dumps(self.snapshot(price))
+        self._rendered = (key, body)
+        return body
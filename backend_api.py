@@ -1,15 +1,36 @@
 import os
-import json
 import math
-import requests
-from datetime import datetime
+import threading
 from decimal import Decimal, getcontext
 from flask import Flask, request, jsonify
-from web3 import Web3
-from web3.middleware import geth_poa_middleware
+from flask.json.provider import DefaultJSONProvider
 from eth_utils import to_checksum_address
 from solcx import compile_files, install_solc
 from web3.types import RPCEndpoint
+from gas_estimates import gas_limit
+from request_journal import install_journal
+from deployment_store import DeploymentStore, LockTimeout
+from pair_store import PairStore
+from pairs import load_pairs
+from price_sources import make_price_source
+from rpc_batch import batch_request, batch_results
+from failover_provider import make_web3
+from rpc_cache import make_rpc_cache
+import serialization
+from admission import AdmissionController, TokenBucketLimiter, admission_controlled
+from epoch_scheduler import EpochScheduler
+from withdraw_scheduler import WithdrawScheduler, withdrawal_due
+from event_feed import EventFeed, event_record
+from analytics import AnalyticsRollup
+from holdings import HoldingsIndex
+from pagination import DEFAULT_LIMIT, encode_cursor, page_args, stream_json_array, take_page
+from metrics import (
+    DEPOSIT_QUEUE_DEPTH,
+    MATCH_ROUND_DURATION,
+    TX_CONFIRMATION,
+    install_flask_metrics,
+    start_flusher,
+)
 
 getcontext().prec = 100  # Increase precision
 install_solc("0.7.6")
@@ -22,14 +43,27 @@ MOCK_CONTRACT_PATH = "MockNonfungiblePositionManager.sol"  # Ensure this file ex
 BASE_PATH = os.path.abspath(".")
 WETH_ADDRESS = "0x4200000000000000000000000000000000000006"
 USDC_ADDRESS = "0x078D782b760474a361dDA0AF3839290b0EF57AD6"
-
-# Initialize Web3
-w3 = Web3(Web3.HTTPProvider("http://127.0.0.1:8545"))
-w3.middleware_onion.inject(geth_poa_middleware, layer=0)
+APPROVE_ABI = [
+    {
+        "constant": False,
+        "inputs": [{"name": "spender", "type": "address"}, {"name": "value", "type": "uint256"}],
+        "name": "approve",
+        "outputs": [{"name": "", "type": "bool"}],
+        "type": "function",
+    }
+]
+
+# Initialize Web3. RPC_URLS may list several endpoints of one chain
+# (comma-separated); reads are then hedged across them and writes pinned.
+# Immutable results (final blocks, receipts, historical calls and logs) come
+# from memory, or from RPC_CACHE_DB across restarts on real networks.
+rpc_cache = make_rpc_cache()
+w3 = make_web3(rpc_cache)
 if not w3.is_connected():
     raise Exception("ERROR: Unable to connect to Hardhat local node.")
 print("INFO: Connected to Hardhat local node.")
 
+chain_id = w3.eth.chain_id
 accounts = w3.eth.accounts
 owner = accounts[0]
 user_usdc = accounts[2]
@@ -39,13 +73,12 @@ user_weth = accounts[1]
 #############################
 # 2) Core Price Functions
 #############################
+# PRICE_SOURCE=pool reads the on-chain pool price instead of CoinGecko.
+price_source = make_price_source(w3)
+
+
 def fetch_weth_price():
-    url = "https://api.coingecko.com/api/v3/simple/price"
-    params = {"ids": "weth", "vs_currencies": "usd"}
-    response = requests.get(url, params=params)
-    if response.status_code == 200:
-        return response.json()["weth"]["usd"]
-    raise Exception(f"ERROR: Price fetch failed with status {response.status_code}")
+    return price_source.get_price()
 
 
 def get_price_range(base_price, percentage=0.1):
@@ -71,6 +104,11 @@ def calculate_liquidity(
 #############################
 # 3) Contract Operations
 #############################
+def wait_for_receipt(tx_hash, function_name):
+    with TX_CONFIRMATION.time(function_name):
+        return w3.eth.wait_for_transaction_receipt(tx_hash)
+
+
 def compile_and_deploy_mock():
     print("=== Compiling MockNonfungiblePositionManager.sol ===")
     compiled = compile_files(
@@ -95,7 +133,8 @@ def compile_and_deploy_mock():
     )
     receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
     print(f"INFO: Mock deployed at: {receipt.contractAddress}")
-    return receipt.contractAddress
+    mock = w3.eth.contract(address=receipt.contractAddress, abi=contract_interface["abi"])
+    return mock, receipt.blockNumber
 
 
 def compile_and_deploy_liquidity(mock_pm_address):
@@ -124,36 +163,30 @@ def compile_and_deploy_liquidity(mock_pm_address):
     ).transact({"from": owner, "gas": 3000000})
     receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
     print(f"INFO: LiquidityMatching deployed at: {receipt.contractAddress}")
-    return w3.eth.contract(
+    liquidity = w3.eth.contract(
         address=receipt.contractAddress, abi=contract_interface["abi"]
     )
+    return liquidity, receipt.blockNumber
 
 
 def deposit_tokens(contract, token_type, user, amount):
     token_address = WETH_ADDRESS if token_type == "WETH" else USDC_ADDRESS
-    abi = json.loads(
-        """[{
-        "constant": false,
-        "inputs": [{"name": "spender", "type": "address"}, {"name": "value", "type": "uint256"}],
-        "name": "approve",
-        "outputs": [{"name": "", "type": "bool"}],
-        "type": "function"
-    }]"""
-    )
-    token = w3.eth.contract(address=token_address, abi=abi)
+    token = w3.eth.contract(address=token_address, abi=APPROVE_ABI)
     decimals = 18 if token_type == "WETH" else 6
     amount_wei = int(amount * (10**decimals))
     token.functions.approve(contract.address, amount_wei).transact(
         {"from": user, "gas": 100000}
     )
     if token_type == "WETH":
-        contract.functions.depositWETH(amount_wei).transact(
-            {"from": user, "gas": 2000000}
+        tx_hash = contract.functions.depositWETH(amount_wei).transact(
+            {"from": user, "gas": gas_limit("depositWETH", 2000000)}
         )
+        wait_for_receipt(tx_hash, "depositWETH")
     else:
-        contract.functions.depositUSDC(amount_wei).transact(
-            {"from": user, "gas": 2000000}
+        tx_hash = contract.functions.depositUSDC(amount_wei).transact(
+            {"from": user, "gas": gas_limit("depositUSDC", 2000000)}
         )
+        wait_for_receipt(tx_hash, "depositUSDC")
     print(f"INFO: Deposited {amount} {token_type} from {user}")
 
 
@@ -166,6 +199,10 @@ def calculate_matched_amounts(contract):
     total_weth = contract.functions.totalWETHDeposited().call() / 1e18
     total_usdc = contract.functions.totalUSDCDeposited().call() / 1e6
     print(f"Contract Holdings: {total_weth:.4f} WETH | {total_usdc:.2f} USDC")
+    return match_amounts(total_weth, total_usdc, price_lower, price_upper)
+
+
+def match_amounts(total_weth, total_usdc, price_lower, price_upper):
     max_weth, required_usdc = calculate_liquidity(
         weth_amount=total_weth, price_lower=price_lower, price_upper=price_upper
     )
@@ -177,6 +214,15 @@ def calculate_matched_amounts(contract):
     return matched_weth, total_usdc
 
 
+def live_depositors():
+    """Depositor array length the gas model scales with, from the holdings index."""
+    indexes = get_event_indexes()
+    # Catch the index up first: a poll only reads the blocks since the last one.
+    indexes["feed"].poll()
+    return indexes["holdings"].depositor_slots()
+
+
+@MATCH_ROUND_DURATION.time()
 def execute_liquidity_matching(contract):
     matched_weth, matched_usdc = calculate_matched_amounts(contract)
     print(f"=== Executing Liquidity Matching ===")
@@ -184,33 +230,106 @@ def execute_liquidity_matching(contract):
     weth_wei = int(Decimal(str(matched_weth)) * Decimal("1e18"))
     usdc_wei = int(Decimal(str(matched_usdc)) * Decimal("1e6"))
     tx_hash = contract.functions.triggerLiquidityMatching(usdc_wei, weth_wei).transact(
-        {"from": owner, "gas": 500000}
+        {"from": owner, "gas": gas_limit("triggerLiquidityMatching", 500000, live_depositors())}
     )
-    w3.eth.wait_for_transaction_receipt(tx_hash)
+    wait_for_receipt(tx_hash, "triggerLiquidityMatching")
     fetch_events(contract)
     return tx_hash.hex()
 
 
-def fetch_events(contract):
-    latest_block = w3.eth.block_number
-    events = {"LiquidityMatched": [], "MatchingTriggered": []}
-    try:
-        lm_events = contract.events.LiquidityMatched().get_logs(
-            fromBlock=latest_block - 10
+def _simulation_outcome(response):
+    if "error" in response:
+        return {"reverted": True, "reason": response["error"].get("message")}
+    return {"reverted": False, "result": response["result"]}
+
+
+def preview_liquidity_matching(contract):
+    """Simulates the next triggerLiquidityMatching in one JSON-RPC batch pinned to one block; sends nothing."""
+    base_price = fetch_weth_price()
+    price_lower, price_upper = get_price_range(base_price)
+    block = hex(w3.eth.block_number)
+    total_weth_wei, total_usdc_wei = (
+        int(result, 16)
+        for result in batch_results(
+            w3,
+            [
+                ("eth_call", [{"to": contract.address, "data": contract.encodeABI(fn_name=name)}, block])
+                for name in ("totalWETHDeposited", "totalUSDCDeposited")
+            ],
         )
-        for event in lm_events:
-            events["LiquidityMatched"].append(dict(event.args))
-    except Exception as e:
-        print("WARNING: Error fetching LiquidityMatched events:", e)
+    )
+    matched_weth, matched_usdc = match_amounts(
+        total_weth_wei / 1e18, total_usdc_wei / 1e6, price_lower, price_upper
+    )
+    weth_wei = int(Decimal(str(matched_weth)) * Decimal("1e18"))
+    usdc_wei = int(Decimal(str(matched_usdc)) * Decimal("1e6"))
+
+    trigger_tx = {
+        "from": owner,
+        "to": contract.address,
+        "data": contract.encodeABI(fn_name="triggerLiquidityMatching", args=[usdc_wei, weth_wei]),
+    }
+    provision_tx = {
+        "from": owner,
+        "to": contract.address,
+        "data": contract.encodeABI(fn_name="executeLiquidityProvision", args=[usdc_wei, weth_wei, 500]),
+    }
+    call, estimate, provision = batch_request(
+        w3,
+        [
+            ("eth_call", [trigger_tx, block]),
+            ("eth_estimateGas", [trigger_tx, block]),
+            ("eth_call", [provision_tx, block]),
+        ],
+    )
+    call, estimate, provision = (_simulation_outcome(r) for r in (call, estimate, provision))
+    return {
+        "block": int(block, 16),
+        "price": base_price,
+        "price_range": [price_lower, price_upper],
+        "totals_wei": {"WETH": total_weth_wei, "USDC": total_usdc_wei},
+        "expected_used_wei": {"WETH": weth_wei, "USDC": usdc_wei},
+        "expected_residual_wei": {
+            "WETH": total_weth_wei - weth_wei,
+            "USDC": total_usdc_wei - usdc_wei,
+        },
+        "simulation": {
+            "reverted": call["reverted"],
+            "revert_reason": call.get("reason"),
+            "gas_estimate": None if estimate["reverted"] else int(estimate["result"], 16),
+            "gas_limit": gas_limit("triggerLiquidityMatching", 500000, live_depositors()),
+            "expected_token_id": None if provision["reverted"] else int(provision["result"], 16),
+        },
+    }
+
+
+MATCH_EVENTS = ("LiquidityMatched", "MatchingTriggered")
+# Blocks one /events request scans at most; a page can end short of `limit`
+# with a next_cursor when matching events are sparse.
+EVENTS_MAX_SCAN_BLOCKS = int(os.getenv("EVENTS_MAX_SCAN_BLOCKS", "50000"))
+
+
+def event_history(contract, types=None, after=None, from_block=None, to_block=None):
+    """Event records of `contract` in chain order, read lazily a block range at a time."""
+    if from_block is None:
+        from_block = _liquidity_deploy_block()
+    feed = EventFeed(w3, contract)
+    return map(event_record, feed.history(from_block=from_block, to_block=to_block, names=types, after=after))
+
+
+def event_cursor(types):
+    # Cursors carry the type filter, so /events continues a page from the cursor alone.
+    return lambda record: {"block": record["block"], "log": record["log_index"], "types": types}
+
+
+def fetch_events(contract, limit=DEFAULT_LIMIT):
+    """First page of the last 10 blocks' matching events; next_cursor continues at /events."""
     try:
-        mt_events = contract.events.MatchingTriggered().get_logs(
-            fromBlock=latest_block - 10
-        )
-        for event in mt_events:
-            events["MatchingTriggered"].append(dict(event.args))
+        events = event_history(contract, MATCH_EVENTS, from_block=max(0, w3.eth.block_number - 10))
+        return take_page(events, limit, event_cursor(list(MATCH_EVENTS)))
     except Exception as e:
-        print("WARNING: Error fetching MatchingTriggered events:", e)
-    return events
+        print("WARNING: Error fetching events:", e)
+        return {"items": [], "next_cursor": None}
 
 
 def advance_time(seconds):
@@ -219,13 +338,23 @@ def advance_time(seconds):
     print(f"INFO: Advanced time by {seconds} seconds.")
 
 
-def withdraw_and_distribute(contract):
-    print("=== Initiating Withdrawal Process ===")
-    advance_time(600)
+def send_withdrawal(contract):
     tx_hash = contract.functions.withdrawAndDistribute().transact(
-        {"from": owner, "gas": 500000}
+        {"from": owner, "gas": gas_limit("withdrawAndDistribute", 500000, live_depositors())}
     )
-    receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+    return wait_for_receipt(tx_hash, "withdrawAndDistribute")
+
+
+def withdraw_and_distribute(contract):
+    print("=== Initiating Withdrawal Process ===")
+    # Dev chain: advance only as far as the 10-minute lock requires.
+    due = withdrawal_due(contract)
+    if due is not None:
+        lag = due - w3.eth.get_block("latest").timestamp
+        if lag > 0:
+            advance_time(lag)
+    receipt = send_withdrawal(contract)
+    tx_hash = receipt.transactionHash
     print(f"INFO: withdrawAndDistribute executed in transaction: {tx_hash.hex()}")
     return tx_hash.hex()
 
@@ -266,19 +395,232 @@ def get_all_balances(contract, pool_address):
 #############################
 # API Endpoints
 #############################
+class FastJSONProvider(DefaultJSONProvider):
+    """Routes jsonify and request.get_json through the serialization module."""
+
+    def dumps(self, obj, **kwargs):
+        return serialization.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return serialization.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(serialization.dumps(obj), mimetype=self.mimetype)
+
+
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
+install_flask_metrics(app)
+
+# Set REQUEST_JOURNAL to a JSONL path (e.g. requests.jsonl) to record traffic for replay.
+REQUEST_JOURNAL = os.getenv("REQUEST_JOURNAL")
+if REQUEST_JOURNAL:
+    install_journal(app, REQUEST_JOURNAL)
+
+# Deployment state lives in a shared registry keyed by chain ID, so every worker
+# process serves the same contracts and restarts rebind them without redeploying.
+# Chain writes are serialized across workers by the registry's file lock.
+deployment_store = DeploymentStore()
+_contract_handles = {}
+
+# Verified under the write lock: another worker may be mid-/deploy.
+with deployment_store.write_lock():
+    _verified = deployment_store.verify(w3, chain_id)
+for _name, _status in _verified.items():
+    if _status == "ok":
+        print(f"INFO: Rebound {_name} at {deployment_store.address(chain_id, _name)}")
+    else:
+        print(f"WARNING: Dropped registered {_name}: {_status}")
+
+
+def get_liquidity_contract():
+    """LiquidityMatching handle for the current deployment, or None before /deploy."""
+    address = deployment_store.address(chain_id, "LiquidityMatching")
+    if address is None:
+        return None
+    contract = _contract_handles.get(address)
+    if contract is None:
+        entry = deployment_store.load(chain_id, "LiquidityMatching")
+        contract = _contract_handles[address] = w3.eth.contract(
+            address=address, abi=entry["abi"]
+        )
+    return contract
+
+
+def get_mock_pm_address():
+    return deployment_store.address(chain_id, "MockNonfungiblePositionManager")
+
+
+# Admission control for write endpoints: concurrency limit, bounded wait queue
+# and fast 429s once the queue is full. All of them block on chain I/O.
+# Controllers live in each process, so the configured limits are split across
+# the API_WORKERS processes of a prefork server (rounded up, at least 1 each).
+API_WORKERS = int(os.getenv("API_WORKERS", "1"))
+
+
+def _admission(name, concurrency, queue):
+    prefix = f"ADMISSION_{name.upper()}"
+    return AdmissionController(
+        name,
+        max_concurrent=max(1, math.ceil(int(os.getenv(f"{prefix}_CONCURRENCY", concurrency)) / API_WORKERS)),
+        max_queue=max(1, math.ceil(int(os.getenv(f"{prefix}_QUEUE", queue)) / API_WORKERS)),
+        queue_timeout=float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "10")),
+    )
+
+
+deposit_admission = _admission("deposit", 4, 32)
+match_admission = _admission("match", 1, 2)
+withdraw_admission = _admission("withdraw", 1, 2)
+
+# Optional per-client token bucket, e.g. RATE_LIMIT_PER_SECOND=5 RATE_LIMIT_BURST=10.
+rate_limiter = None
+if os.getenv("RATE_LIMIT_PER_SECOND"):
+    rate_limiter = TokenBucketLimiter(
+        float(os.getenv("RATE_LIMIT_PER_SECOND")),
+        float(os.getenv("RATE_LIMIT_BURST", os.getenv("RATE_LIMIT_PER_SECOND"))),
+    )
+
+
+# Admitted requests wait at most this long for the cross-process chain write
+# lock, then get a 503 instead of holding their admission slot indefinitely.
+WRITE_LOCK_TIMEOUT = float(os.getenv("WRITE_LOCK_TIMEOUT", "30"))
+
+
+def chain_write_lock():
+    return deployment_store.write_lock(timeout=WRITE_LOCK_TIMEOUT)
+
+
+def lock_busy(error):
+    retry_after = max(1, math.ceil(WRITE_LOCK_TIMEOUT / 2))
+    response = jsonify({"error": str(error), "retry_after": retry_after})
+    return response, 503, {"Retry-After": str(retry_after)}
 
-# Global variables to store deployed contracts
-liquidity_contract = None
-mock_pm_address = None
+
+def _liquidity_deploy_block():
+    entry = deployment_store.load(chain_id, "LiquidityMatching")
+    return entry["deploy_block"] if entry else 0
+
+
+# Set AUTO_WITHDRAW=1 to send withdrawAndDistribute automatically at the first
+# block the 10-minute lock allows after each matching round, instead of
+# calling /withdraw (which fast-forwards dev-chain time).
+withdraw_scheduler = None
+if os.getenv("AUTO_WITHDRAW"):
+    withdraw_scheduler = WithdrawScheduler(
+        w3,
+        get_liquidity_contract,
+        send_withdrawal,
+        owner,
+        lock=deployment_store.write_lock,
+        from_block=_liquidity_deploy_block,
+    )
+
+
+def run_matching_round(contract):
+    """Runs a matching round and arms the withdrawal for it."""
+    tx_hash = execute_liquidity_matching(contract)
+    if withdraw_scheduler is not None:
+        withdraw_scheduler.refresh()
+    return tx_hash
+
+
+# Analytics rollups and the holdings index follow the deployed contract's
+# events incrementally: one feed per contract feeds both, started on first use
+# and replaced after a redeploy.
+_event_indexes = {"address": None, "feed": None, "rollup": None, "holdings": None}
+_event_indexes_lock = threading.Lock()
+
+
+def get_event_indexes():
+    liquidity_contract = get_liquidity_contract()
+    if liquidity_contract is None:
+        return None
+    with _event_indexes_lock:
+        if _event_indexes["address"] != liquidity_contract.address:
+            if _event_indexes["feed"] is not None:
+                _event_indexes["feed"].stop()
+            rollup = AnalyticsRollup(w3, liquidity_contract.functions.positionManager().call())
+            holdings = HoldingsIndex()
+            feed = EventFeed(
+                w3,
+                liquidity_contract,
+                from_block=_liquidity_deploy_block(),
+                confirmations=int(os.getenv("ANALYTICS_CONFIRMATIONS", "0")),
+            )
+            feed.subscribe(rollup.apply)
+            feed.subscribe(holdings.apply)
+            feed.start(float(os.getenv("ANALYTICS_POLL_INTERVAL", "2")))
+            _event_indexes.update(
+                address=liquidity_contract.address, feed=feed, rollup=rollup, holdings=holdings
+            )
+        return _event_indexes
+
+
+def epoch_snapshot():
+    """Contract totals and the round they would produce at the current price."""
+    liquidity_contract = get_liquidity_contract()
+    if liquidity_contract is None:
+        return None
+    price = fetch_weth_price()
+    price_lower, price_upper = get_price_range(price)
+    total_weth = liquidity_contract.functions.totalWETHDeposited().call() / 1e18
+    total_usdc = liquidity_contract.functions.totalUSDCDeposited().call() / 1e6
+    if total_weth <= 0 or total_usdc <= 0:
+        matched_weth = matched_usdc = 0.0
+    else:
+        matched_weth, matched_usdc = match_amounts(total_weth, total_usdc, price_lower, price_upper)
+    return {
+        "price": price,
+        "total_weth": total_weth,
+        "total_usdc": total_usdc,
+        "matched_weth": matched_weth,
+        "matched_usdc": matched_usdc,
+    }
+
+
+# Set EPOCH_WINDOW (seconds) to match in epochs instead of per /match call:
+# deposits accumulate and each epoch closes with one round when the window
+# elapses, the book is balanced to within EPOCH_MAX_IMBALANCE, or the round
+# would match at least EPOCH_MIN_VOLUME USDC.
+epoch_scheduler = None
+if os.getenv("EPOCH_WINDOW"):
+    epoch_scheduler = EpochScheduler(
+        epoch_snapshot,
+        lambda state: run_matching_round(get_liquidity_contract()),
+        window=float(os.getenv("EPOCH_WINDOW")),
+        max_imbalance=float(os.environ["EPOCH_MAX_IMBALANCE"]) if os.getenv("EPOCH_MAX_IMBALANCE") else None,
+        min_volume=float(os.environ["EPOCH_MIN_VOLUME"]) if os.getenv("EPOCH_MIN_VOLUME") else None,
+        poll_interval=float(os.getenv("EPOCH_POLL_INTERVAL", "5")),
+        lock=deployment_store.write_lock,
+    )
+
+
+def start_background_tasks():
+    """Starts the configured schedulers in this process; call it in every serving process, after any fork."""
+    if withdraw_scheduler is not None:
+        withdraw_scheduler.start()
+        withdraw_scheduler.refresh()
+    if epoch_scheduler is not None:
+        epoch_scheduler.start()
+    start_flusher()
 
 
 @app.route("/deploy", methods=["POST"])
 def deploy_contracts():
-    global liquidity_contract, mock_pm_address
     try:
-        mock_pm_address = compile_and_deploy_mock()
-        liquidity_contract = compile_and_deploy_liquidity(mock_pm_address)
+        with chain_write_lock():
+            mock, mock_block = compile_and_deploy_mock()
+            mock_pm_address = mock.address
+            liquidity_contract, liquidity_block = compile_and_deploy_liquidity(mock_pm_address)
+            deployment_store.save_many(
+                w3,
+                chain_id,
+                [
+                    ("MockNonfungiblePositionManager", mock.address, mock.abi, mock_block),
+                    ("LiquidityMatching", liquidity_contract.address, liquidity_contract.abi, liquidity_block),
+                ],
+            )
         return jsonify(
             {
                 "message": "Contracts deployed successfully",
@@ -286,6 +628,8 @@ def deploy_contracts():
                 "liquidity_contract_address": liquidity_contract.address,
             }
         )
+    except LockTimeout as e:
+        return lock_busy(e)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -294,14 +638,15 @@ def deploy_contracts():
 def get_price():
     try:
         price = fetch_weth_price()
-        return jsonify({"weth_price": price})
+        return jsonify({"weth_price": price, "source": price_source.name})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
 @app.route("/deposit", methods=["POST"])
+@admission_controlled(deposit_admission, rate_limiter)
 def deposit():
-    global liquidity_contract
+    liquidity_contract = get_liquidity_contract()
     if liquidity_contract is None:
         return jsonify({"error": "Contracts not deployed yet."}), 400
     data = request.get_json()
@@ -312,17 +657,55 @@ def deposit():
             jsonify({"error": "Invalid parameters. Require token_type and amount."}),
             400,
         )
+    DEPOSIT_QUEUE_DEPTH.inc()
     try:
         user = user_weth if token_type == "WETH" else user_usdc
-        deposit_tokens(liquidity_contract, token_type, user, float(amount))
+        with chain_write_lock():
+            deposit_tokens(liquidity_contract, token_type, user, float(amount))
+        if epoch_scheduler is not None:
+            epoch_scheduler.notify()
         return jsonify({"message": f"Deposited {amount} {token_type} successfully."})
+    except LockTimeout as e:
+        return lock_busy(e)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        DEPOSIT_QUEUE_DEPTH.dec()
+
+
+# Off-chain deposits for any configured pair (pairs.json), matched by pair_matching.
+pair_store = PairStore()
+
+
+@app.route("/pairs/<slug>/deposits", methods=["POST"])
+def pair_deposit(slug):
+    pair = next((pair for pair in load_pairs().values() if pair.slug == slug), None)
+    if pair is None:
+        return jsonify({"error": f"Unknown pair {slug}."}), 404
+    data = request.get_json()
+    side = data.get("side")
+    address = data.get("address")
+    amount = data.get("amount")
+    if side not in ("base", "quote") or not address or amount is None:
+        return (
+            jsonify({"error": "Invalid parameters. Require side (base or quote), address and amount."}),
+            400,
+        )
+    try:
+        token = pair.base if side == "base" else pair.quote
+        amount_wei = int(Decimal(str(amount)) * 10**token.decimals)
+        if amount_wei <= 0:
+            return jsonify({"error": "amount must be positive."}), 400
+        pair_store.add_deposit(pair, side, to_checksum_address(address), amount_wei)
+        return jsonify({"message": f"Deposited {amount} {token.symbol} to {pair.name}.", "amount_wei": str(amount_wei)})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
 @app.route("/balances", methods=["GET"])
 def balances():
-    global liquidity_contract, mock_pm_address
+    liquidity_contract = get_liquidity_contract()
+    mock_pm_address = get_mock_pm_address()
     if liquidity_contract is None or mock_pm_address is None:
         return jsonify({"error": "Contracts not deployed yet."}), 400
     try:
@@ -333,12 +716,14 @@ def balances():
 
 
 @app.route("/match", methods=["POST"])
+@admission_controlled(match_admission, rate_limiter)
 def match():
-    global liquidity_contract
+    liquidity_contract = get_liquidity_contract()
     if liquidity_contract is None:
         return jsonify({"error": "Contracts not deployed yet."}), 400
     try:
-        tx_hash = execute_liquidity_matching(liquidity_contract)
+        with chain_write_lock():
+            tx_hash = run_matching_round(liquidity_contract)
         events = fetch_events(liquidity_contract)
         return jsonify(
             {
@@ -347,26 +732,164 @@ def match():
                 "events": events,
             }
         )
+    except LockTimeout as e:
+        return lock_busy(e)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/match/preview", methods=["GET", "POST"])
+def match_preview():
+    liquidity_contract = get_liquidity_contract()
+    if liquidity_contract is None:
+        return jsonify({"error": "Contracts not deployed yet."}), 400
+    try:
+        return jsonify(preview_liquidity_matching(liquidity_contract))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/match/epoch", methods=["GET"])
+def match_epoch():
+    if epoch_scheduler is None:
+        return jsonify({"error": "Epoch matching is disabled. Set EPOCH_WINDOW to enable it."}), 404
+    return jsonify(epoch_scheduler.status())
+
+
+@app.route("/analytics", methods=["GET"])
+def analytics():
+    """Precomputed rollups for the Analytics page; never rescans the chain."""
+    try:
+        indexes = get_event_indexes()
+        if indexes is None:
+            return jsonify({"error": "Contracts not deployed yet."}), 400
+        try:
+            price = fetch_weth_price()
+        except Exception:
+            price = None
+        return app.response_class(indexes["rollup"].render(price), mimetype="application/json")
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/events", methods=["GET"])
+def events():
+    """Contract events in chain order, one ?type=&limit=&cursor= page per request."""
+    liquidity_contract = get_liquidity_contract()
+    if liquidity_contract is None:
+        return jsonify({"error": "Contracts not deployed yet."}), 400
+    try:
+        position, limit = page_args(request.args)
+        if position is None:
+            types = request.args["type"].split(",") if request.args.get("type") else None
+            after = None
+            start = _liquidity_deploy_block()
+        else:
+            types = position.get("types")
+            after = (int(position["block"]), int(position["log"]))
+            start = after[0]
+        head = w3.eth.block_number
+        scan_to = min(head, start + EVENTS_MAX_SCAN_BLOCKS - 1)
+        history = event_history(liquidity_contract, types, after=after, from_block=start, to_block=scan_to)
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        page = take_page(history, limit, event_cursor(types))
+        if page["next_cursor"] is None and scan_to < head:
+            # Sparse history: stop at the scan limit and continue from the next block.
+            page["next_cursor"] = encode_cursor({"block": scan_to + 1, "log": -1, "types": types})
+        return jsonify(page)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/events/export", methods=["GET"])
+def events_export():
+    """Every contract event (optionally ?type=...) as one JSON array, streamed in chunks."""
+    liquidity_contract = get_liquidity_contract()
+    if liquidity_contract is None:
+        return jsonify({"error": "Contracts not deployed yet."}), 400
+    try:
+        types = request.args["type"].split(",") if request.args.get("type") else None
+        history = event_history(liquidity_contract, types)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return app.response_class(stream_json_array(history), mimetype="application/json")
+
+
+@app.route("/holdings", methods=["GET"])
+def holdings_list():
+    """Every depositor's holdings in address order, one page per request (?limit=&cursor=)."""
+    try:
+        position, limit = page_args(request.args)
+        after = position["address"] if position else None
+    except (KeyError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        indexes = get_event_indexes()
+        if indexes is None:
+            return jsonify({"error": "Contracts not deployed yet."}), 400
+        page = take_page(indexes["holdings"].holders(after), limit, lambda h: {"address": h["address"]})
+        return jsonify(page)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/holdings/<address>", methods=["GET"])
+def holdings(address):
+    """One user's deposits, matched share, residuals and positions from the event index."""
+    try:
+        indexes = get_event_indexes()
+        if indexes is None:
+            return jsonify({"error": "Contracts not deployed yet."}), 400
+        try:
+            return jsonify(indexes["holdings"].lookup(address))
+        except ValueError:
+            return jsonify({"error": f"Invalid address: {address}"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/withdraw/schedule", methods=["GET", "POST"])
+def withdraw_schedule():
+    """GET shows the pending withdrawal; POST re-reads matchingTimestamp and arms it."""
+    if withdraw_scheduler is None:
+        return jsonify({"error": "Automatic withdrawal is disabled. Set AUTO_WITHDRAW to enable it."}), 404
+    try:
+        if request.method == "POST":
+            withdraw_scheduler.refresh()
+        return jsonify(withdraw_scheduler.status())
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
 @app.route("/withdraw", methods=["POST"])
+@admission_controlled(withdraw_admission, rate_limiter)
 def withdraw():
-    global liquidity_contract
+    liquidity_contract = get_liquidity_contract()
     if liquidity_contract is None:
         return jsonify({"error": "Contracts not deployed yet."}), 400
     try:
-        tx_hash = withdraw_and_distribute(liquidity_contract)
+        with chain_write_lock():
+            tx_hash = withdraw_and_distribute(liquidity_contract)
         return jsonify(
             {
                 "message": "Withdrawal executed successfully.",
                 "transaction_hash": tx_hash,
             }
         )
+    except LockTimeout as e:
+        return lock_busy(e)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
 if __name__ == "__main__":
+    # One process, one thread per request. For several worker processes use
+    # a prefork server whose workers each import the app and then start the
+    # schedulers: `gunicorn -c gunicorn.conf.py backend_api:app`.
+    # The debug reloader runs this module twice, a file-watching parent and
+    # the serving child; only the child (WERKZEUG_RUN_MAIN set) starts them.
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_background_tasks()
     app.run(debug=True)
@@ -10,6 +10,7 @@ from eth_utils import to_checksum_address
 from solcx import compile_files, install_solc
 from wrap import weth_abi, get_weth_balance, wrap_eth
 from main import usdc_contract
+from signing_pipeline import SigningPipeline, transaction_hashes
 import logging
 
 # Configure logging for professional output
@@ -143,40 +144,25 @@ def swap_weth_to_usdc(w3, account, amount_weth, private_key):
         }
     ]
     weth_contract = w3.eth.contract(address=WETH_ADDRESS, abi=weth_abi_extended)
-    approve_txn = weth_contract.functions.approve(
-        UNISWAP_V2_ROUTER, w3.to_wei(amount_weth, "ether")
-    ).build_transaction(
-        {
-            "from": account,
-            "nonce": w3.eth.get_transaction_count(account),
-            "gas": 100_000,
-            "gasPrice": w3.eth.gas_price,
-        }
-    )
-    signed_approve_txn = w3.eth.account.sign_transaction(approve_txn, private_key)
-    w3.eth.send_raw_transaction(signed_approve_txn.rawTransaction)
-    logging.info(f"Approved {amount_weth} WETH for Uniswap swap.")
     weth_price = fetch_weth_price()
     logging.info(f"Current WETH Price: ${weth_price} per WETH")
     amount_out_min = 1  # Minimal protection for slippage
-    swap_txn = router_contract.functions.swapExactTokensForTokens(
+    approve_call = weth_contract.functions.approve(UNISWAP_V2_ROUTER, w3.to_wei(amount_weth, "ether"))
+    swap_call = router_contract.functions.swapExactTokensForTokens(
         w3.to_wei(amount_weth, "ether"),
         amount_out_min,
         [WETH_ADDRESS, USDC_ADDRESS],
         account,
         int(datetime.utcnow().timestamp()) + 60 * 5,
-    ).build_transaction(
-        {
-            "from": account,
-            "nonce": w3.eth.get_transaction_count(account),
-            "gas": 200_000,
-            "gasPrice": w3.eth.gas_price,
-        }
     )
-    signed_swap_txn = w3.eth.account.sign_transaction(swap_txn, private_key)
-    tx_hash = w3.eth.send_raw_transaction(signed_swap_txn.rawTransaction)
-    logging.info(f"Swap transaction sent: {w3.to_hex(tx_hash)}")
-    receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+    # Approve and swap get consecutive nonces and go out in one batch, approve first.
+    with SigningPipeline(w3, private_key) as pipeline:
+        approve_hash, swap_hash = transaction_hashes(
+            pipeline.submit([approve_call, swap_call], gas=[100_000, 200_000])
+        )
+    logging.info(f"Approved {amount_weth} WETH for Uniswap swap.")
+    logging.info(f"Swap transaction sent: {swap_hash}")
+    receipt = w3.eth.wait_for_transaction_receipt(swap_hash)
     logging.info(f"Swap confirmed. Transaction hash: {receipt.transactionHash.hex()}")
 
 
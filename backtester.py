@@ -0,0 +1,332 @@
+import os
+import csv
+import math
+import time
+import argparse
+import itertools
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from serialization import read_json, write_json
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+WETH, USDC = 0, 1
+# Uniswap V3 fee tier LiquidityMatching mints into (0.05%).
+DEFAULT_FEE = 0.0005
+# Positions can be withdrawn 10 minutes after matching.
+DEFAULT_HOLD = 600
+# Bound on rows * bars in one vectorized block of positions (~32 MB of float64).
+BLOCK_CELLS = 4_000_000
+
+#############################
+# Inputs
+#############################
+def _parse_timestamp(value):
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+def load_prices(path):
+    """Historical WETH/USD (timestamps, prices) float64 arrays from a CSV or Parquet file, sorted by time."""
+    if path.endswith(".parquet"):
+        if pq is None:
+            raise ImportError("Reading Parquet price series requires pyarrow")
+        table = pq.read_table(path)
+        time_column = next(c for c in ("timestamp", "time", "date") if c in table.column_names)
+        price_column = next(c for c in ("price", "close") if c in table.column_names)
+        raw_times = table.column(time_column).to_numpy()
+        if np.issubdtype(raw_times.dtype, np.datetime64):
+            timestamps = raw_times.astype("datetime64[ns]").astype(np.int64) / 1e9
+        else:
+            timestamps = raw_times.astype(np.float64)
+        prices = table.column(price_column).to_numpy().astype(np.float64)
+    else:
+        with open(path, newline="") as f:
+            reader = csv.DictReader(f)
+            time_column = next(c for c in ("timestamp", "time", "date") if c in reader.fieldnames)
+            price_column = next(c for c in ("price", "close") if c in reader.fieldnames)
+            rows = [(_parse_timestamp(row[time_column]), float(row[price_column])) for row in reader]
+        timestamps = np.fromiter((t for t, _ in rows), np.float64, len(rows))
+        prices = np.fromiter((p for _, p in rows), np.float64, len(rows))
+    order = np.argsort(timestamps, kind="stable")
+    return timestamps[order], prices[order]
+
+
+def load_deposits(path):
+    """Recorded deposit stream as (timestamps, tokens, amounts) arrays from a deposits.json of either shape."""
+    data = read_json(path)
+    records = []
+    for key, token in (("weth_deposits", WETH), ("usdc_deposits", USDC)):
+        deposits = data.get(key, {})
+        if isinstance(deposits, dict):
+            deposits = deposits.values()
+        records.extend((_parse_timestamp(d["timestamp"]), token, float(d["amount"])) for d in deposits)
+    records.sort()
+    return (
+        np.array([r[0] for r in records], dtype=np.float64),
+        np.array([r[1] for r in records], dtype=np.int8),
+        np.array([r[2] for r in records], dtype=np.float64),
+    )
+
+
+def synthetic_deposits(timestamps, prices, per_hour=20.0, weth_share=0.5, mean_usd=5_000.0, seed=0):
+    """Poisson deposit arrivals over the price series, log-normally sized around `mean_usd`."""
+    rng = np.random.default_rng(seed)
+    start, end = timestamps[0], timestamps[-1]
+    count = rng.poisson(per_hour * (end - start) / 3600)
+    times = np.sort(rng.uniform(start, end, count))
+    tokens = np.where(rng.random(count) < weth_share, WETH, USDC).astype(np.int8)
+    sigma = 1.0
+    usd = rng.lognormal(np.log(mean_usd) - sigma**2 / 2, sigma, count)
+    price_at = prices[np.clip(np.searchsorted(timestamps, times, side="right") - 1, 0, len(prices) - 1)]
+    amounts = np.where(tokens == WETH, usd / price_at, usd)
+    return times, tokens, amounts
+
+
+#############################
+# Matching policy
+#############################
+def match_amounts(weth, usdc, price_lower, price_upper):
+    """The backend's matching rule (calculate_liquidity in new_backend.py): amounts offered to mint."""
+    sqrt_lower, sqrt_upper = math.sqrt(price_lower), math.sqrt(price_upper)
+    required_usdc = weth / (sqrt_upper - sqrt_lower) * (sqrt_upper * sqrt_lower)
+    if usdc >= required_usdc:
+        return weth, required_usdc
+    return usdc / (sqrt_upper * sqrt_lower) * (sqrt_upper - sqrt_lower), usdc
+
+
+def position_liquidity(weth, usdc, price, price_lower, price_upper):
+    """V3 liquidity minted from the offered amounts at `price`, and the amounts mint takes."""
+    sqrt_price = math.sqrt(min(max(price, price_lower), price_upper))
+    sqrt_lower, sqrt_upper = math.sqrt(price_lower), math.sqrt(price_upper)
+    candidates = []
+    if sqrt_price < sqrt_upper:
+        candidates.append(weth * sqrt_price * sqrt_upper / (sqrt_upper - sqrt_price))
+    if sqrt_price > sqrt_lower:
+        candidates.append(usdc / (sqrt_price - sqrt_lower))
+    liquidity = min(candidates)
+    used_weth = liquidity * (1 / sqrt_price - 1 / sqrt_upper)
+    used_usdc = liquidity * (sqrt_price - sqrt_lower)
+    return liquidity, used_weth, used_usdc
+
+
+#############################
+# Simulation
+#############################
+def _fifo_wait(deposit_times, deposit_amounts, matched_cumulative, round_times):
+    """Volume-weighted deposit-to-match wait per round under FIFO, from prefix sums of amount * time."""
+    if len(deposit_amounts) == 0:
+        return np.zeros(len(round_times))
+    filled = np.cumsum(deposit_amounts)
+    weighted = np.cumsum(deposit_amounts * deposit_times)
+
+    def integral(volume):
+        # Integral of deposit time over the first `volume` units of deposits.
+        i = np.minimum(np.searchsorted(filled, volume, side="left"), len(filled) - 1)
+        before_filled = np.where(i > 0, filled[i - 1], 0.0)
+        before_weighted = np.where(i > 0, weighted[i - 1], 0.0)
+        return before_weighted + (volume - before_filled) * deposit_times[i]
+
+    previous = np.concatenate(([0.0], matched_cumulative[:-1]))
+    volume = matched_cumulative - previous
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_deposit_time = (integral(matched_cumulative) - integral(previous)) / volume
+    return np.where(volume > 0, round_times - mean_deposit_time, 0.0)
+
+
+def _evaluate_positions(timestamps, prices, entry_index, exit_index, liquidity, sqrt_lower, sqrt_upper, fee):
+    """Fee, in-range time and exit value of every position, in padded blocks of at most BLOCK_CELLS."""
+    count = len(entry_index)
+    fees = np.zeros(count)
+    in_range = np.zeros(count)
+    held = np.zeros(count)
+    lengths = exit_index - entry_index + 1
+    width = int(lengths.max()) if count else 0
+    rows_per_block = max(1, BLOCK_CELLS // max(width, 1))
+    offsets = np.arange(width)
+    for start in range(0, count, rows_per_block):
+        rows = slice(start, min(count, start + rows_per_block))
+        index = entry_index[rows, None] + offsets[None, :]
+        valid = offsets[None, :] < lengths[rows, None]
+        index = np.where(valid, index, exit_index[rows, None])
+        sqrt_prices = np.sqrt(prices[index])
+        lower, upper = sqrt_lower[rows, None], sqrt_upper[rows, None]
+        # Swaps moving the price through the range pay fee * L * |d sqrt(P)| in USDC;
+        # moves outside the range are flattened by the clip.
+        clipped = np.clip(sqrt_prices, lower, upper)
+        steps = np.abs(np.diff(clipped, axis=1)) * valid[:, 1:]
+        fees[rows] = fee * liquidity[rows] * steps.sum(axis=1)
+        # Time-weighted in-range share, each bar interval judged by its opening price.
+        dt = np.diff(timestamps[index], axis=1) * valid[:, 1:]
+        inside = (sqrt_prices[:, :-1] >= lower) & (sqrt_prices[:, :-1] <= upper)
+        in_range[rows] = (dt * inside).sum(axis=1)
+        held[rows] = dt.sum(axis=1)
+    exit_price = prices[exit_index]
+    sqrt_exit = np.clip(np.sqrt(exit_price), sqrt_lower, sqrt_upper)
+    exit_value = liquidity * (1 / sqrt_exit - 1 / sqrt_upper) * exit_price + liquidity * (sqrt_exit - sqrt_lower)
+    return fees, in_range, held, exit_value, exit_price
+
+
+def backtest(timestamps, prices, deposits, range_pct=0.1, round_interval=3600, hold=DEFAULT_HOLD, fee=DEFAULT_FEE):
+    """Replays the deposits against the prices: a round every `round_interval` s, positions held `hold` s."""
+    started = time.perf_counter()
+    deposit_times, deposit_tokens, deposit_amounts = deposits
+    round_times = np.arange(timestamps[0] + round_interval, timestamps[-1] - hold, round_interval)
+    round_index = np.searchsorted(timestamps, round_times, side="right") - 1
+    round_prices = prices[round_index]
+
+    # Deposits arriving before each round, per token, via cumulative sums.
+    arrived = {}
+    for token in (WETH, USDC):
+        mask = deposit_tokens == token
+        cumulative = np.concatenate(([0.0], np.cumsum(deposit_amounts[mask])))
+        arrived[token] = cumulative[np.searchsorted(deposit_times[mask], round_times, side="right")]
+    new_weth = np.diff(arrived[WETH], prepend=0.0)
+    new_usdc = np.diff(arrived[USDC], prepend=0.0)
+
+    # Rounds depend on the previous round's leftovers, so this loop is sequential;
+    # it is scalar work per round, the per-bar work below is vectorized.
+    rounds = len(round_times)
+    used_weth = np.zeros(rounds)
+    used_usdc = np.zeros(rounds)
+    liquidity = np.zeros(rounds)
+    price_lower = round_prices * (1 - range_pct)
+    price_upper = round_prices * (1 + range_pct)
+    queued_weth = queued_usdc = 0.0
+    for k in range(rounds):
+        queued_weth += new_weth[k]
+        queued_usdc += new_usdc[k]
+        if queued_weth <= 0 or queued_usdc <= 0:
+            continue
+        offer_weth, offer_usdc = match_amounts(queued_weth, queued_usdc, price_lower[k], price_upper[k])
+        liquidity[k], used_weth[k], used_usdc[k] = position_liquidity(
+            offer_weth, offer_usdc, round_prices[k], price_lower[k], price_upper[k]
+        )
+        queued_weth -= used_weth[k]
+        queued_usdc -= used_usdc[k]
+
+    matched = np.flatnonzero(liquidity > 0)
+    entry_index = round_index[matched]
+    exit_index = np.searchsorted(timestamps, round_times[matched] + hold, side="right") - 1
+    fees, in_range, held, exit_value, exit_price = _evaluate_positions(
+        timestamps,
+        prices,
+        entry_index,
+        exit_index,
+        liquidity[matched],
+        np.sqrt(price_lower[matched]),
+        np.sqrt(price_upper[matched]),
+        fee,
+    )
+    hold_value = used_weth[matched] * exit_price + used_usdc[matched]
+    impermanent_loss = exit_value - hold_value
+    capital = used_weth[matched] * round_prices[matched] + used_usdc[matched]
+
+    wait = {}
+    for token, used in ((WETH, used_weth), (USDC, used_usdc)):
+        mask = deposit_tokens == token
+        per_round = _fifo_wait(deposit_times[mask], deposit_amounts[mask], np.cumsum(used), round_times)
+        wait["WETH" if token == WETH else "USDC"] = float(np.average(per_round, weights=used)) if used.sum() > 0 else None
+
+    deposit_prices = prices[np.clip(np.searchsorted(timestamps, deposit_times, side="right") - 1, 0, len(prices) - 1)]
+    deposited_usd = float((deposit_amounts * np.where(deposit_tokens == WETH, deposit_prices, 1.0)).sum())
+    return {
+        "params": {"range_pct": range_pct, "round_interval": round_interval, "hold": hold, "fee": fee},
+        "rounds": rounds,
+        "rounds_matched": int(len(matched)),
+        "matched": {"WETH": float(used_weth.sum()), "USDC": float(used_usdc.sum())},
+        "unmatched": {"WETH": float(queued_weth), "USDC": float(queued_usdc)},
+        "deposited_usd": deposited_usd,
+        "matched_usd": float(capital.sum()),
+        "in_range_fraction": float(in_range.sum() / held.sum()) if held.sum() > 0 else None,
+        "fees_usd": float(fees.sum()),
+        "impermanent_loss_usd": float(impermanent_loss.sum()),
+        "net_usd": float((fees + impermanent_loss).sum()),
+        "return_on_capital": float((fees + impermanent_loss).sum() / capital.sum()) if capital.sum() > 0 else None,
+        "mean_wait_seconds": wait,
+        "elapsed_seconds": time.perf_counter() - started,
+    }
+
+
+#############################
+# Parameter sweep
+#############################
+_worker_data = None
+
+
+def _init_worker(timestamps, prices, deposits):
+    # Each worker receives the series once instead of once per strategy.
+    global _worker_data
+    _worker_data = (timestamps, prices, deposits)
+
+
+def _run_strategy(params):
+    timestamps, prices, deposits = _worker_data
+    return backtest(timestamps, prices, deposits, **params)
+
+
+def sweep(timestamps, prices, deposits, grid, workers=None):
+    """Backtests every combination in `grid` ({param: [values]}) across a process pool, in grid order."""
+    names = list(grid)
+    combinations = [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+    with ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count(),
+        initializer=_init_worker,
+        initargs=(timestamps, prices, deposits),
+    ) as pool:
+        return list(pool.map(_run_strategy, combinations))
+
+
+def _floats(text):
+    return [float(v) for v in text.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest matching and range strategies on historical prices.")
+    parser.add_argument("prices", help="WETH/USD price series (.csv or .parquet)")
+    parser.add_argument("--deposits", help="Recorded deposits.json; default is a synthetic Poisson stream")
+    parser.add_argument("--deposits-per-hour", type=float, default=20.0)
+    parser.add_argument("--weth-share", type=float, default=0.5)
+    parser.add_argument("--ranges", type=_floats, default=[0.05, 0.1, 0.2, 0.3])
+    parser.add_argument("--intervals", type=_floats, default=[600, 3600, 86400])
+    parser.add_argument("--holds", type=_floats, default=[DEFAULT_HOLD, 86400])
+    parser.add_argument("--fee", type=float, default=DEFAULT_FEE)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default="backtest_results.json")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    timestamps, prices = load_prices(args.prices)
+    if args.deposits:
+        deposits = load_deposits(args.deposits)
+    else:
+        deposits = synthetic_deposits(timestamps, prices, args.deposits_per_hour, args.weth_share)
+    print(f"Loaded {len(prices)} bars and {len(deposits[0])} deposits in {time.perf_counter() - started:.2f}s")
+
+    grid = {"range_pct": args.ranges, "round_interval": args.intervals, "hold": args.holds, "fee": [args.fee]}
+    results = sweep(timestamps, prices, deposits, grid, args.workers)
+    results.sort(key=lambda r: r["net_usd"], reverse=True)
+
+    print(f"{'range':>7}{'interval':>10}{'hold':>8}{'in range':>10}{'fees $':>12}{'IL $':>12}{'net $':>12}{'wait h':>8}")
+    for r in results:
+        p = r["params"]
+        waits = [w for w in r["mean_wait_seconds"].values() if w is not None]
+        in_range = r["in_range_fraction"]
+        print(
+            f"{p['range_pct']:>7.0%}{p['round_interval']:>10.0f}{p['hold']:>8.0f}"
+            f"{(in_range if in_range is not None else 0):>10.1%}{r['fees_usd']:>12.2f}"
+            f"{r['impermanent_loss_usd']:>12.2f}{r['net_usd']:>12.2f}"
+            f"{(max(waits) / 3600 if waits else 0):>8.1f}"
+        )
+    write_json(args.output, results, pretty=True)
+    print(f"{len(results)} strategies in {time.perf_counter() - started:.2f}s, results in {args.output}")
+
+
+if __name__ == "__main__":
+    main()
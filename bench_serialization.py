@@ -0,0 +1,88 @@
+import json
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+import serialization
+
+#############################
+# Payloads
+#############################
+def deposit_book_payload(count, token_type, seed=0):
+    """A deposits.json-shaped book with `count` deposits, amounts in integer wei."""
+    rng = random.Random(seed)
+    decimals = 18 if token_type == "WETH" else 6
+    start = datetime(2025, 1, 1)
+    deposits = {}
+    for i in range(count):
+        whole = rng.uniform(0.1, 100) if token_type == "WETH" else rng.uniform(10, 100_000)
+        deposits[f"0x{rng.getrandbits(160):040x}"] = {
+            "amount": int(whole * 10**decimals),
+            "timestamp": (start + timedelta(seconds=i)).isoformat(),
+        }
+    return {f"{token_type.lower()}_deposits": deposits}
+
+
+#############################
+# Timing
+#############################
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench(name, payload, repeat, long_ints):
+    rows = []
+    baseline_pretty = json.dumps(payload, indent=4).encode()
+    baseline_compact = json.dumps(payload, separators=(",", ":")).encode()
+    cases = [
+        ("stdlib indent=4", lambda: json.dumps(payload, indent=4), lambda: json.loads(baseline_pretty), baseline_pretty),
+        ("stdlib compact", lambda: json.dumps(payload, separators=(",", ":")), lambda: json.loads(baseline_compact), baseline_compact),
+    ]
+    encoded = serialization.dumps(payload, pretty=True)
+    cases.append(
+        (f"{serialization.BACKEND} pretty", lambda: serialization.dumps(payload, pretty=True), lambda: serialization.loads(encoded), encoded)
+    )
+    encoded_compact = serialization.dumps(payload)
+    cases.append(
+        (f"{serialization.BACKEND} compact", lambda: serialization.dumps(payload), lambda: serialization.loads(encoded_compact), encoded_compact)
+    )
+    # What a caller that knows its payload gets (PairStore shards pass long_ints=True).
+    cases.append(
+        (
+            f"{serialization.BACKEND} long_ints={long_ints}",
+            lambda: serialization.dumps(payload, long_ints=long_ints),
+            lambda: serialization.loads(encoded_compact, long_ints=long_ints),
+            encoded_compact,
+        )
+    )
+    if encoded != baseline_pretty:
+        raise AssertionError(f"{serialization.BACKEND} pretty output for {name} differs from the stdlib's")
+    for label, encode, decode, blob in cases:
+        if decode() != payload:
+            raise AssertionError(f"{label} did not round-trip {name} exactly")
+        rows.append((label, best_of(encode, repeat), best_of(decode, repeat), len(blob)))
+
+    print(f"\n=== {name} ===")
+    print(f"{'variant':<26}{'encode ms':>12}{'decode ms':>12}{'size MB':>10}")
+    for label, encode_s, decode_s, size in rows:
+        print(f"{label:<26}{encode_s * 1000:>12.1f}{decode_s * 1000:>12.1f}{size / 1e6:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare orjson and stdlib json on deposit books.")
+    parser.add_argument("--deposits", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"Serialization backend: {serialization.BACKEND}")
+    bench(f"{args.deposits} USDC deposits (wei fits in 64 bits)", deposit_book_payload(args.deposits, "USDC"), args.repeat, False)
+    bench(f"{args.deposits} WETH deposits (wei beyond 64 bits)", deposit_book_payload(args.deposits, "WETH"), args.repeat, True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+import os
+import time
+import logging
+import argparse
+from dotenv import load_dotenv
+from eth_account import Account
+from web3 import Web3
+from web3.middleware import geth_poa_middleware
+from eth_utils import to_checksum_address, keccak
+from rpc_batch import batch_results
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="[%(asctime)s] %(levelname)s: %(message)s",
+    datefmt="%H:%M:%S",
+)
+
+WETH_ADDRESS = to_checksum_address("0x4200000000000000000000000000000000000006")
+USDC_ADDRESS = to_checksum_address("0x078D782b760474a361dDA0AF3839290b0EF57AD6")
+# Multicall3 is deployed at the same address on every major chain, Unichain included.
+MULTICALL3_ADDRESS = to_checksum_address("0xcA11bde05977b3631167028862bE2a173976CA11")
+
+# Candidate mapping slots probed during detection.
+MAX_PROBED_SLOT = 64
+# balanceOf calls per aggregate3 call, keeps each eth_call under the node gas cap.
+MULTICALL_CHUNK = 1_000
+# Marks probe values so the matching candidate can be read back from balanceOf.
+SENTINEL_BASE = 0xC05_0000 << 128
+
+BALANCE_OF_ABI = [
+    {
+        "constant": True,
+        "inputs": [{"name": "account", "type": "address"}],
+        "name": "balanceOf",
+        "outputs": [{"name": "", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function",
+    }
+]
+MULTICALL3_ABI = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"name": "target", "type": "address"},
+                    {"name": "allowFailure", "type": "bool"},
+                    {"name": "callData", "type": "bytes"},
+                ],
+                "name": "calls",
+                "type": "tuple[]",
+            }
+        ],
+        "name": "aggregate3",
+        "outputs": [
+            {
+                "components": [
+                    {"name": "success", "type": "bool"},
+                    {"name": "returnData", "type": "bytes"},
+                ],
+                "name": "returnData",
+                "type": "tuple[]",
+            }
+        ],
+        "stateMutability": "payable",
+        "type": "function",
+    }
+]
+
+# token address -> (mapping slot, layout), filled by detect_balance_slot.
+_detected_slots = {}
+
+
+def balance_storage_slot(account, mapping_slot, layout="solidity"):
+    """Storage key of `account` in a balance mapping at `mapping_slot`; layout="vyper" swaps the hash order."""
+    padded_account = bytes.fromhex(account[2:].lower().rjust(64, "0"))
+    padded_slot = mapping_slot.to_bytes(32, "big")
+    if layout == "solidity":
+        return Web3.to_hex(keccak(padded_account + padded_slot))
+    return Web3.to_hex(keccak(padded_slot + padded_account))
+
+
+def _word(value):
+    return "0x" + format(value, "064x")
+
+
+def detect_balance_slot(w3, token):
+    """Finds an ERC-20's balanceOf mapping slot by probing candidate slots, restoring storage after."""
+    token = to_checksum_address(token)
+    if token in _detected_slots:
+        return _detected_slots[token]
+
+    probe = to_checksum_address(keccak(text="cosmos-pool-balance-probe")[-20:])
+    candidates = [
+        (slot, layout, balance_storage_slot(probe, slot, layout))
+        for slot in range(MAX_PROBED_SLOT)
+        for layout in ("solidity", "vyper")
+    ]
+    originals = batch_results(
+        w3, [("eth_getStorageAt", [token, key, "latest"]) for _, _, key in candidates]
+    )
+    batch_results(
+        w3,
+        [
+            ("hardhat_setStorageAt", [token, key, _word(SENTINEL_BASE + i)])
+            for i, (_, _, key) in enumerate(candidates)
+        ],
+    )
+    try:
+        balance = w3.eth.contract(address=token, abi=BALANCE_OF_ABI).functions.balanceOf(probe).call()
+    finally:
+        batch_results(
+            w3,
+            [
+                ("hardhat_setStorageAt", [token, key, _word(int(original, 16))])
+                for (_, _, key), original in zip(candidates, originals)
+            ],
+        )
+    index = balance - SENTINEL_BASE
+    if not 0 <= index < len(candidates):
+        raise Exception(f"Could not detect the balance mapping slot of {token}")
+    slot, layout, _ = candidates[index]
+    _detected_slots[token] = (slot, layout)
+    logging.info(f"Detected balance mapping of {token} at slot {slot} ({layout} layout)")
+    return slot, layout
+
+
+def set_token_balances(w3, token, balances):
+    """Writes `balances` ({address: amount_wei}) into token storage with batched hardhat_setStorageAt."""
+    slot, layout = detect_balance_slot(w3, token)
+    batch_results(
+        w3,
+        [
+            ("hardhat_setStorageAt", [token, balance_storage_slot(address, slot, layout), _word(amount)])
+            for address, amount in balances.items()
+        ],
+    )
+
+
+def set_eth_balances(w3, balances):
+    """Batched hardhat_setBalance for {address: amount_wei}."""
+    batch_results(w3, [("hardhat_setBalance", [address, hex(amount)]) for address, amount in balances.items()])
+
+
+def multicall_balances(w3, token, addresses):
+    """balanceOf for every address through Multicall3 aggregate3, all chunks in one JSON-RPC batch."""
+    token_contract = w3.eth.contract(address=to_checksum_address(token), abi=BALANCE_OF_ABI)
+    multicall = w3.eth.contract(address=MULTICALL3_ADDRESS, abi=MULTICALL3_ABI)
+    calls = []
+    for start in range(0, len(addresses), MULTICALL_CHUNK):
+        chunk = addresses[start : start + MULTICALL_CHUNK]
+        data = multicall.encodeABI(
+            fn_name="aggregate3",
+            args=[[(token_contract.address, False, token_contract.encodeABI(fn_name="balanceOf", args=[a])) for a in chunk]],
+        )
+        calls.append(("eth_call", [{"to": MULTICALL3_ADDRESS, "data": data}, "latest"]))
+    balances = []
+    for result in batch_results(w3, calls):
+        (entries,) = w3.codec.decode(["(bool,bytes)[]"], bytes.fromhex(result[2:]))
+        balances.extend(int.from_bytes(return_data, "big") for _, return_data in entries)
+    return dict(zip(addresses, balances))
+
+
+def fund_accounts(w3, addresses, eth_wei=0, weth_wei=0, usdc_wei=0, verify=True):
+    """Funds every address with ETH, WETH and USDC in batched requests and verifies the balances."""
+    if eth_wei:
+        set_eth_balances(w3, {address: eth_wei for address in addresses})
+    for token, amount in ((WETH_ADDRESS, weth_wei), (USDC_ADDRESS, usdc_wei)):
+        if not amount:
+            continue
+        set_token_balances(w3, token, {address: amount for address in addresses})
+        if verify:
+            mismatched = [a for a, b in multicall_balances(w3, token, addresses).items() if b != amount]
+            if mismatched:
+                raise Exception(f"{len(mismatched)} balance(s) of {token} did not verify, e.g. {mismatched[0]}")
+
+
+def derive_keys(count, seed="cosmos-pool-simulator"):
+    """Deterministic throwaway private keys, so repeated runs reuse the same addresses."""
+    return [keccak(text=f"{seed}-{i}") for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-fund accounts through hardhat_setStorageAt")
+    parser.add_argument("--accounts", default="hardhat", help="'hardhat' or a number of generated keys")
+    parser.add_argument("--eth", type=float, default=100.0)
+    parser.add_argument("--weth", type=float, default=100.0)
+    parser.add_argument("--usdc", type=float, default=250_000.0)
+    args = parser.parse_args()
+
+    load_dotenv()
+    w3 = Web3(Web3.HTTPProvider(os.getenv("LOCAL_NODE_URL", "http://127.0.0.1:8545")))
+    w3.middleware_onion.inject(geth_poa_middleware, layer=0)
+    if not w3.is_connected():
+        raise Exception("Not connected to local Hardhat node!")
+
+    if args.accounts == "hardhat":
+        addresses = list(w3.eth.accounts)
+    else:
+        addresses = [Account.from_key(key).address for key in derive_keys(int(args.accounts))]
+    start = time.perf_counter()
+    fund_accounts(
+        w3,
+        addresses,
+        eth_wei=Web3.to_wei(args.eth, "ether"),
+        weth_wei=Web3.to_wei(args.weth, "ether"),
+        usdc_wei=int(args.usdc * 10**6),
+    )
+    logging.info(f"Funded and verified {len(addresses)} accounts in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+import os
+import json
+import time
+import fcntl
+import sqlite3
+import threading
+from contextlib import contextmanager
+from eth_utils import keccak
+
+# Shared by every API worker process; WAL mode lets readers run in parallel.
+DEPLOYMENT_DB = os.getenv("DEPLOYMENT_DB", "deployments.sqlite3")
+
+
+def abi_hash(abi):
+    """keccak of the canonical JSON encoding, stable across key order and whitespace."""
+    return keccak(text=json.dumps(abi, sort_keys=True, separators=(",", ":"))).hex()
+
+
+class LockTimeout(TimeoutError):
+    """The write lock stayed busy for longer than the caller would wait."""
+
+
+class DeploymentStore:
+    """SQLite registry of deployed contracts by (chain ID, name), plus a cross-process chain write lock."""
+
+    def __init__(self, path=DEPLOYMENT_DB):
+        self.path = path
+        self.lock_path = path + ".lock"
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS contract_registry (
+                chain_id INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                address TEXT NOT NULL,
+                abi TEXT NOT NULL,
+                abi_hash TEXT NOT NULL,
+                code_hash TEXT NOT NULL,
+                deploy_block INTEGER NOT NULL,
+                deploy_block_hash TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (chain_id, name)
+            )"""
+        )
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(contract_registry)")}
+        if "deploy_block_hash" not in columns:
+            # Registries written before block hashes were recorded.
+            conn.execute("ALTER TABLE contract_registry ADD COLUMN deploy_block_hash TEXT")
+        conn.commit()
+
+    def _connection(self):
+        # sqlite3 connections must not be shared across threads, nor across
+        # a fork: a child process opens its own on first use.
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=30)
+            self._local.pid = os.getpid()
+        return conn
+
+    def save(self, w3, chain_id, name, address, abi, deploy_block):
+        """Records a deployment along with the hash of its on-chain runtime code and of its deploy block."""
+        self.save_many(w3, chain_id, [(name, address, abi, deploy_block)])
+
+    def save_many(self, w3, chain_id, deployments):
+        """Records several (name, address, abi, deploy_block) deployments in one transaction."""
+        rows = [
+            (
+                chain_id,
+                name,
+                address,
+                json.dumps(abi),
+                abi_hash(abi),
+                keccak(w3.eth.get_code(address)).hex(),
+                deploy_block,
+                w3.eth.get_block(deploy_block).hash.hex(),
+                time.time(),
+            )
+            for name, address, abi, deploy_block in deployments
+        ]
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                """INSERT OR REPLACE INTO contract_registry
+                   (chain_id, name, address, abi, abi_hash, code_hash, deploy_block, deploy_block_hash, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                rows,
+            )
+
+    def load(self, chain_id, name):
+        """Returns the registry entry as a dict, or None when `name` was never deployed on this chain."""
+        row = self._connection().execute(
+            """SELECT address, abi, abi_hash, code_hash, deploy_block, deploy_block_hash FROM contract_registry
+               WHERE chain_id = ? AND name = ?""",
+            (chain_id, name),
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "address": row[0],
+            "abi": json.loads(row[1]),
+            "abi_hash": row[2],
+            "code_hash": row[3],
+            "deploy_block": row[4],
+            "deploy_block_hash": row[5],
+        }
+
+    def address(self, chain_id, name):
+        """Address only, without decoding the stored ABI."""
+        row = self._connection().execute(
+            "SELECT address FROM contract_registry WHERE chain_id = ? AND name = ?", (chain_id, name)
+        ).fetchone()
+        return row[0] if row else None
+
+    def forget(self, chain_id, name):
+        conn = self._connection()
+        conn.execute("DELETE FROM contract_registry WHERE chain_id = ? AND name = ?", (chain_id, name))
+        conn.commit()
+
+    def verify(self, w3, chain_id):
+        """Drops entries whose ABI, deploy block or runtime code no longer match; run it under write_lock()."""
+        rows = self._connection().execute(
+            "SELECT name FROM contract_registry WHERE chain_id = ?", (chain_id,)
+        ).fetchall()
+        head = w3.eth.block_number
+        results = {}
+        for (name,) in rows:
+            entry = self.load(chain_id, name)
+            if abi_hash(entry["abi"]) != entry["abi_hash"]:
+                results[name] = "abi hash mismatch"
+            elif entry["deploy_block"] > head:
+                results[name] = f"deploy block {entry['deploy_block']} is past the chain head {head}"
+            # A reset dev node reuses block numbers, so the number alone proves nothing.
+            elif (
+                entry["deploy_block_hash"] is not None
+                and w3.eth.get_block(entry["deploy_block"]).hash.hex() != entry["deploy_block_hash"]
+            ):
+                results[name] = "deploy block hash changed"
+            else:
+                code = w3.eth.get_code(entry["address"])
+                if len(code) == 0:
+                    results[name] = "no code at address"
+                elif keccak(code).hex() != entry["code_hash"]:
+                    results[name] = "runtime code changed"
+                else:
+                    results[name] = "ok"
+                    continue
+            self.forget(chain_id, name)
+        return results
+
+    @contextmanager
+    def write_lock(self, timeout=None):
+        """Exclusive lock across all worker processes and threads; raises LockTimeout after `timeout`."""
+        with open(self.lock_path, "a") as lock_file:
+            if timeout is None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            else:
+                deadline = time.monotonic() + timeout
+                delay = 0.005
+                while True:
+                    try:
+                        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise LockTimeout(f"Chain write lock still busy after {timeout}s")
+                        time.sleep(min(delay, remaining))
+                        delay = min(delay * 2, 0.1)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -0,0 +1,189 @@
+from array import array
+from datetime import datetime
+from decimal import Decimal
+
+_MASK64 = (1 << 64) - 1
+
+
+class AddressTable:
+    """Interns addresses to small integer IDs; share one table across books."""
+
+    def __init__(self):
+        self._ids = {}
+        self.addresses = []
+
+    def intern(self, address):
+        address_id = self._ids.get(address)
+        if address_id is None:
+            address_id = self._ids[address] = len(self.addresses)
+            self.addresses.append(address)
+        return address_id
+
+    def __len__(self):
+        return len(self.addresses)
+
+
+class DepositSlice:
+    """Zero-copy window onto a DepositBook; raises RuntimeError once the book has changed."""
+
+    def __init__(self, book, start, stop):
+        self.book = book
+        self.start = start
+        self.stop = stop
+        self._generation = book._generation
+
+    def _check(self):
+        if self._generation != self.book._generation:
+            raise RuntimeError("DepositBook changed since this slice was taken")
+
+    def __len__(self):
+        self._check()
+        return self.stop - self.start
+
+    def __iter__(self):
+        self._check()
+        for i in range(self.start, self.stop):
+            self._check()
+            yield self.book._record(i)
+
+    def total(self):
+        self._check()
+        return sum(self.book._amount(i) for i in range(self.start, self.stop))
+
+
+class DepositBook:
+    """FIFO deposit queue for one token, stored as parallel arrays."""
+
+    def __init__(self, decimals, addresses=None):
+        self.decimals = decimals
+        self.addresses = addresses if addresses is not None else AddressTable()
+        # 28 bytes per deposit: wei split into uint64 halves so amounts above 2**64
+        # stay exact, epoch-second timestamps and interned address IDs.
+        self._amount_lo = array("Q")
+        self._amount_hi = array("Q")
+        self._timestamps = array("d")
+        self._address_ids = array("I")
+        # Consuming only advances _head; the arrays are compacted once over half is dead.
+        self._head = 0
+        self._sorted = True
+        # Bumped whenever deposits change, move or drop out, invalidating DepositSlices.
+        self._generation = 0
+
+    # -- construction -------------------------------------------------
+    def append(self, address, amount_wei, timestamp):
+        if self._timestamps and timestamp < self._timestamps[-1]:
+            self._sorted = False
+        self._amount_lo.append(amount_wei & _MASK64)
+        self._amount_hi.append(amount_wei >> 64)
+        self._timestamps.append(timestamp)
+        self._address_ids.append(self.addresses.intern(address))
+
+    @classmethod
+    def from_json(cls, deposits, decimals, addresses=None):
+        """Time-sorted book from an {address: deposit} mapping or a deposits.json list, in token units."""
+        book = cls(decimals, addresses)
+        if isinstance(deposits, dict):
+            deposits = ({"address": address, **deposit} for address, deposit in deposits.items())
+        scale = Decimal(10) ** decimals
+        for deposit in deposits:
+            book.append(
+                deposit["address"],
+                int(Decimal(str(deposit["amount"])) * scale),
+                datetime.fromisoformat(deposit["timestamp"]).timestamp(),
+            )
+        book.sort()
+        return book
+
+    def iter_json(self):
+        """Deposits one at a time in the deposits.json list shape, amounts back in token units."""
+        scale = Decimal(10) ** self.decimals
+        for address, amount, timestamp in self:
+            yield {
+                "address": address,
+                "amount": float(Decimal(amount) / scale),
+                "timestamp": datetime.fromtimestamp(timestamp).isoformat(),
+            }
+
+    def to_json(self):
+        """The list shape used by deposits.json, amounts back in token units."""
+        return list(self.iter_json())
+
+    def sort(self):
+        """Stable sort by timestamp. Only copies when appends arrived out of order."""
+        if self._sorted:
+            return
+        order = sorted(range(self._head, len(self._timestamps)), key=self._timestamps.__getitem__)
+        self._amount_lo = array("Q", (self._amount_lo[i] for i in order))
+        self._amount_hi = array("Q", (self._amount_hi[i] for i in order))
+        self._timestamps = array("d", (self._timestamps[i] for i in order))
+        self._address_ids = array("I", (self._address_ids[i] for i in order))
+        self._head = 0
+        self._sorted = True
+        self._generation += 1
+
+    # -- access ---------------------------------------------------------
+    def __len__(self):
+        return len(self._timestamps) - self._head
+
+    def _amount(self, i):
+        return (self._amount_hi[i] << 64) | self._amount_lo[i]
+
+    def _record(self, i):
+        return self.addresses.addresses[self._address_ids[i]], self._amount(i), self._timestamps[i]
+
+    def __iter__(self):
+        for i in range(self._head, len(self._timestamps)):
+            yield self._record(i)
+
+    def __getitem__(self, index):
+        """Integer index returns (address, amount_wei, timestamp); a slice returns a DepositSlice."""
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("DepositBook slices must be contiguous")
+            return DepositSlice(self, self._head + start, self._head + max(start, stop))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("DepositBook index out of range")
+        return self._record(self._head + index)
+
+    def amount(self, index):
+        return self._amount(self._head + index)
+
+    def set_amount(self, index, amount_wei):
+        """Updates a deposit in place, e.g. the head's residual after a partial match."""
+        i = self._head + index
+        self._amount_lo[i] = amount_wei & _MASK64
+        self._amount_hi[i] = amount_wei >> 64
+        self._generation += 1
+
+    def total(self):
+        return sum(self._amount(i) for i in range(self._head, len(self._timestamps)))
+
+    def consume(self, count):
+        """Drops the first `count` deposits without copying the rest."""
+        if count > len(self):
+            raise ValueError("Cannot consume more deposits than the book holds")
+        self._head += count
+        self._generation += 1
+        if self._head > len(self._timestamps) // 2:
+            self._compact()
+
+    def _compact(self):
+        head = self._head
+        del self._amount_lo[:head]
+        del self._amount_hi[:head]
+        del self._timestamps[:head]
+        del self._address_ids[:head]
+        self._head = 0
+
+    def arrays(self):
+        """Zero-copy memoryviews over the live part of every column; release them before mutating the book."""
+        head = self._head
+        return {
+            "amount_lo": memoryview(self._amount_lo)[head:],
+            "amount_hi": memoryview(self._amount_hi)[head:],
+            "timestamps": memoryview(self._timestamps)[head:],
+            "address_ids": memoryview(self._address_ids)[head:],
+        }
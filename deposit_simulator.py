@@ -0,0 +1,289 @@
+import os
+import json
+import time
+import random
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from eth_account import Account
+from web3 import Web3
+from web3.middleware import geth_poa_middleware
+from backend_init import deploy_contract
+from bulk_funding import WETH_ADDRESS, USDC_ADDRESS, derive_keys, fund_accounts
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="[%(asctime)s] %(levelname)s: %(message)s",
+    datefmt="%H:%M:%S",
+)
+
+# Balances handed to every simulated account before the run.
+FUNDED_ETH = Web3.to_wei(100, "ether")
+FUNDED_WETH = Web3.to_wei(1_000, "ether")
+FUNDED_USDC = 10_000_000 * 10**6
+
+ERC20_ABI = json.loads(
+    """[
+    {"constant": false, "inputs": [{"name": "spender", "type": "address"}, {"name": "value", "type": "uint256"}],
+     "name": "approve", "outputs": [{"name": "", "type": "bool"}], "type": "function"}
+]"""
+)
+
+
+# The two LiquidityMatching entry points the simulator drives.
+DEPOSIT_ABI = json.loads(
+    """[
+    {"inputs": [{"name": "amount", "type": "uint256"}], "name": "depositUSDC", "outputs": [],
+     "stateMutability": "nonpayable", "type": "function"},
+    {"inputs": [{"name": "amount", "type": "uint256"}], "name": "depositWETH", "outputs": [],
+     "stateMutability": "nonpayable", "type": "function"}
+]"""
+)
+
+
+class NonceTracker:
+    """Hands out nonces per account without a get_transaction_count per transaction."""
+
+    def __init__(self, w3):
+        self.w3 = w3
+        self._nonces = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def _lock_for(self, address):
+        with self._guard:
+            if address not in self._locks:
+                self._locks[address] = threading.Lock()
+            return self._locks[address]
+
+    def reserve(self, address, count=1):
+        """Reserves `count` consecutive nonces and returns the first one."""
+        with self._lock_for(address):
+            if address not in self._nonces:
+                self._nonces[address] = self.w3.eth.get_transaction_count(address, "pending")
+            nonce = self._nonces[address]
+            self._nonces[address] += count
+            return nonce
+
+    def resync(self, address, nonce, count=1):
+        """Rewinds after a failed reservation if it is the newest; otherwise returns the missing nonces to fill."""
+        with self._lock_for(address):
+            if address not in self._nonces:
+                return []
+            pending = self.w3.eth.get_transaction_count(address, "pending")
+            if not nonce <= pending < nonce + count:
+                return []
+            if self._nonces[address] == nonce + count:
+                self._nonces[address] = pending
+                return []
+            return list(range(pending, nonce + count))
+
+
+class SimulatedAccount:
+    """An unlocked Hardhat account (no key) or a generated key signed locally."""
+
+    def __init__(self, address, private_key=None):
+        self.address = address
+        self.private_key = private_key
+
+    def send(self, w3, function_call, nonce, gas):
+        tx = {"from": self.address, "nonce": nonce, "gas": gas}
+        if self.private_key is None:
+            return function_call.transact(tx)
+        tx["gasPrice"] = w3.eth.gas_price
+        signed = w3.eth.account.sign_transaction(function_call.build_transaction(tx), self.private_key)
+        return w3.eth.send_raw_transaction(signed.rawTransaction)
+
+    def fill_nonce(self, w3, nonce):
+        """Spends `nonce` on a zero-value transfer to self, so the transactions queued behind it can run."""
+        tx = {"from": self.address, "to": self.address, "value": 0, "nonce": nonce, "gas": 21_000}
+        if self.private_key is None:
+            return w3.eth.send_transaction(tx)
+        tx["gasPrice"] = w3.eth.gas_price
+        tx["chainId"] = w3.eth.chain_id
+        signed = w3.eth.account.sign_transaction(tx, self.private_key)
+        return w3.eth.send_raw_transaction(signed.rawTransaction)
+
+
+def hardhat_accounts(w3):
+    """Every unlocked node account except the owner."""
+    return [SimulatedAccount(address) for address in w3.eth.accounts[1:]]
+
+
+def generated_accounts(count):
+    """Generated keys shared with bulk_funding.py, so pre-funded runs line up."""
+    return [SimulatedAccount(Account.from_key(key).address, key) for key in derive_keys(count)]
+
+
+def arrival_offsets(pattern, count, rate, rng, burst_size=50):
+    """Seconds after start at which each deposit arrives: constant, poisson or burst at `rate` per second."""
+    if pattern == "constant":
+        return [i / rate for i in range(count)]
+    if pattern == "poisson":
+        offsets, t = [], 0.0
+        for _ in range(count):
+            t += rng.expovariate(rate)
+            offsets.append(t)
+        return offsets
+    if pattern == "burst":
+        return [(i // burst_size) * burst_size / rate for i in range(count)]
+    raise ValueError(f"Unknown arrival pattern: {pattern}")
+
+
+def sample_amount(distribution, token_type, rng):
+    """Deposit size in token units; USDC amounts are scaled to a WETH price of ~2500."""
+    mean = 0.5 if token_type == "WETH" else 1250.0
+    if distribution == "fixed":
+        return mean
+    if distribution == "uniform":
+        return rng.uniform(0.1 * mean, 1.9 * mean)
+    if distribution == "lognormal":
+        return mean * rng.lognormvariate(0, 0.75)
+    raise ValueError(f"Unknown amount distribution: {distribution}")
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_simulation(
+    w3,
+    contract,
+    accounts,
+    deposits,
+    rate,
+    pattern="poisson",
+    distribution="lognormal",
+    weth_fraction=0.5,
+    workers=32,
+    seed=0,
+):
+    """Fires `deposits` approve-and-deposit flows round-robin over `accounts`; returns a summary dict."""
+    rng = random.Random(seed)
+    nonces = NonceTracker(w3)
+    tokens = {
+        "WETH": w3.eth.contract(address=WETH_ADDRESS, abi=ERC20_ABI),
+        "USDC": w3.eth.contract(address=USDC_ADDRESS, abi=ERC20_ABI),
+    }
+    plan = []
+    for i, offset in enumerate(arrival_offsets(pattern, deposits, rate, rng)):
+        token_type = "WETH" if rng.random() < weth_fraction else "USDC"
+        plan.append((offset, accounts[i % len(accounts)], token_type, sample_amount(distribution, token_type, rng)))
+
+    latencies = []
+    failures = []
+    results_lock = threading.Lock()
+
+    def deposit_flow(account, token_type, amount):
+        decimals = 18 if token_type == "WETH" else 6
+        amount_wei = int(amount * 10**decimals)
+        deposit_fn = contract.functions.depositWETH if token_type == "WETH" else contract.functions.depositUSDC
+        submitted = time.perf_counter()
+        nonce = None
+        try:
+            nonce = nonces.reserve(account.address, 2)
+            account.send(w3, tokens[token_type].functions.approve(contract.address, amount_wei), nonce, 100_000)
+            tx_hash = account.send(w3, deposit_fn(amount_wei), nonce + 1, 2_000_000)
+            receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=300)
+            if receipt.status != 1:
+                raise Exception(f"deposit reverted in {tx_hash.hex()}")
+        except Exception as e:
+            if nonce is not None:
+                for gap in nonces.resync(account.address, nonce, 2):
+                    try:
+                        account.fill_nonce(w3, gap)
+                    except Exception as fill_error:
+                        print(f"WARNING: Could not fill nonce {gap} of {account.address}: {fill_error}")
+            with results_lock:
+                failures.append(str(e))
+            return
+        with results_lock:
+            latencies.append(time.perf_counter() - submitted)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for offset, account, token_type, amount in plan:
+            delay = start + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(deposit_flow, account, token_type, amount)
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "accounts": len(accounts),
+        "submitted": deposits,
+        "confirmed": len(latencies),
+        "failed": len(failures),
+        "elapsed_s": elapsed,
+        "deposits_per_s": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_s": {
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": latencies[-1] if latencies else None,
+        },
+        "sample_errors": failures[:5],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel multi-account deposit simulator")
+    parser.add_argument("--accounts", default="hardhat", help="'hardhat' or a number of generated keys")
+    parser.add_argument("--deposits", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=50.0, help="mean arrivals per second")
+    parser.add_argument("--pattern", choices=["constant", "poisson", "burst"], default="poisson")
+    parser.add_argument("--distribution", choices=["fixed", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--weth-fraction", type=float, default=0.5)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--contract", help="existing LiquidityMatching address; deploys a fresh one if omitted")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    load_dotenv()
+    w3 = Web3(Web3.HTTPProvider(os.getenv("LOCAL_NODE_URL", "http://127.0.0.1:8545")))
+    w3.middleware_onion.inject(geth_poa_middleware, layer=0)
+    if not w3.is_connected():
+        raise Exception("Not connected to local Hardhat node!")
+    owner = w3.eth.accounts[0]
+
+    if args.contract:
+        contract = w3.eth.contract(address=Web3.to_checksum_address(args.contract), abi=DEPOSIT_ABI)
+    else:
+        contract = deploy_contract(w3, owner)
+    accounts = hardhat_accounts(w3) if args.accounts == "hardhat" else generated_accounts(int(args.accounts))
+    logging.info(f"Funding {len(accounts)} accounts...")
+    fund_accounts(
+        w3,
+        [account.address for account in accounts],
+        eth_wei=FUNDED_ETH,
+        weth_wei=FUNDED_WETH,
+        usdc_wei=FUNDED_USDC,
+    )
+
+    logging.info(
+        f"Simulating {args.deposits} deposits ({args.pattern} arrivals at {args.rate}/s, "
+        f"{args.distribution} amounts) across {len(accounts)} accounts"
+    )
+    summary = run_simulation(
+        w3,
+        contract,
+        accounts,
+        args.deposits,
+        args.rate,
+        pattern=args.pattern,
+        distribution=args.distribution,
+        weth_fraction=args.weth_fraction,
+        workers=args.workers,
+        seed=args.seed,
+    )
+    logging.info(json.dumps(summary, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import time
+import threading
+from contextlib import nullcontext
+
+
+class EpochScheduler:
+    """Closes each deposit epoch with one matching round once its window, imbalance or volume trigger fires."""
+
+    def __init__(
+        self,
+        snapshot,
+        execute,
+        window,
+        max_imbalance=None,
+        min_volume=None,
+        poll_interval=5.0,
+        lock=None,
+        history=50,
+    ):
+        # snapshot() -> {total_weth, total_usdc, matched_weth, matched_usdc, price} in token
+        # units, or None with nothing to match; execute(state) sends the round.
+        self.snapshot = snapshot
+        self.execute = execute
+        self.window = window
+        self.max_imbalance = max_imbalance
+        self.min_volume = min_volume
+        self.poll_interval = poll_interval
+        # Triggers are re-checked under the lock, so schedulers sharing it run each round once.
+        self.lock = lock or nullcontext
+        self.history = history
+        self.epoch = 0
+        self.epoch_opened_at = None
+        self.rounds = []
+        self.last_error = None
+        self._state = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def imbalance(state):
+        """Fraction of the deposited value (in USDC) a round would leave unmatched."""
+        total = state["total_weth"] * state["price"] + state["total_usdc"]
+        if total <= 0:
+            return 1.0
+        matched = state["matched_weth"] * state["price"] + state["matched_usdc"]
+        return max(0.0, 1 - matched / total)
+
+    def trigger(self, state, now):
+        """The reason the open epoch should close now, or None."""
+        if state is None or state["matched_weth"] <= 0 or state["matched_usdc"] <= 0:
+            return None
+        if self.min_volume is not None and state["matched_usdc"] >= self.min_volume:
+            return "volume"
+        if self.max_imbalance is not None and self.imbalance(state) <= self.max_imbalance:
+            return "imbalance"
+        if self.epoch_opened_at is not None and now - self.epoch_opened_at >= self.window:
+            return "window"
+        return None
+
+    def run_once(self):
+        """Evaluates the triggers once and runs the epoch's round if one fires."""
+        now = time.time()
+        state = self._state = self.snapshot()
+        if state is None or state["matched_weth"] <= 0 or state["matched_usdc"] <= 0:
+            # Nothing matchable: the next deposit opens the epoch.
+            self.epoch_opened_at = None
+            return None
+        if self.epoch_opened_at is None:
+            self.epoch_opened_at = now
+        if self.trigger(state, now) is None:
+            return None
+        with self.lock():
+            state = self._state = self.snapshot()
+            reason = self.trigger(state, time.time())
+            if reason is None:
+                return None
+            result = self.execute(state)
+        record = {
+            "epoch": self.epoch,
+            "reason": reason,
+            "opened_at": self.epoch_opened_at,
+            "executed_at": time.time(),
+            "matched_weth": state["matched_weth"],
+            "matched_usdc": state["matched_usdc"],
+            "result": result,
+        }
+        print(f"INFO: Epoch {self.epoch} closed by {reason} trigger: {result}")
+        self.rounds = (self.rounds + [record])[-self.history :]
+        self.epoch += 1
+        self.epoch_opened_at = None
+        self._state = None
+        return record
+
+    # -- background thread ---------------------------------------------
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"WARNING: Epoch scheduler round failed: {e}")
+            timeout = self.poll_interval
+            if self.epoch_opened_at is not None:
+                # Wake exactly when the window closes if that comes first.
+                remaining = self.epoch_opened_at + self.window - time.time()
+                timeout = max(0.0, min(timeout, remaining))
+            self._wake.wait(timeout)
+            self._wake.clear()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="epoch-scheduler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def notify(self):
+        """Re-evaluates the triggers now, e.g. right after a deposit lands."""
+        self._wake.set()
+
+    def status(self):
+        state = self._state
+        opened = self.epoch_opened_at
+        return {
+            "epoch": self.epoch,
+            "open": opened is not None,
+            "opened_at": opened,
+            "closes_by": None if opened is None else opened + self.window,
+            "pending": state,
+            "imbalance": None if state is None else self.imbalance(state),
+            "triggers": {
+                "window": self.window,
+                "max_imbalance": self.max_imbalance,
+                "min_volume": self.min_volume,
+            },
+            "last_error": self.last_error,
+            "rounds": self.rounds,
+        }
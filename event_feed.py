@@ -0,0 +1,152 @@
+import threading
+from eth_utils import event_abi_to_log_topic
+from rpc_batch import batch_results
+
+
+class EventFeed:
+    """Incremental log reader for one contract, dispatching decoded events to subscribers in chain order."""
+
+    def __init__(self, w3, contract, from_block=0, confirmations=0, max_range=2000):
+        self.w3 = w3
+        self.contract = contract
+        self.from_block = from_block
+        self._next_block = from_block
+        # Only blocks `confirmations` deep are read, so no consumer sees a log a shallow reorg drops.
+        self.confirmations = confirmations
+        self.max_range = max_range
+        # One cursor each: a subscriber that raises gets the same blocks again on the
+        # next poll while the others move on, so it should apply a batch atomically.
+        self._subscribers = []
+        self._events_by_topic = {
+            event_abi_to_log_topic(abi): getattr(contract.events, abi["name"])
+            for abi in contract.abi
+            if abi.get("type") == "event"
+        }
+        self._topics_by_name = {
+            abi["name"]: "0x" + event_abi_to_log_topic(abi).hex() for abi in contract.abi if abi.get("type") == "event"
+        }
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def subscribe(self, callback):
+        """Calls `callback(events, head_block)` after every poll, with the events it has not yet applied."""
+        self._subscribers.append({"callback": callback, "next_block": self.from_block})
+
+    @property
+    def next_block(self):
+        """First block the next poll reads: the oldest subscriber cursor."""
+        if not self._subscribers:
+            return self._next_block
+        return min(subscriber["next_block"] for subscriber in self._subscribers)
+
+    def _block_timestamps(self, block_numbers):
+        blocks = batch_results(
+            self.w3, [("eth_getBlockByNumber", [hex(number), False]) for number in block_numbers]
+        )
+        return {number: int(block["timestamp"], 16) for number, block in zip(block_numbers, blocks)}
+
+    def _decode(self, logs):
+        """Feed items for raw logs, in chain order with their block timestamps."""
+        events = []
+        for log in logs:
+            event = self._events_by_topic.get(bytes(log["topics"][0])) if log["topics"] else None
+            if event is not None:
+                events.append(event().process_log(log))
+        events.sort(key=lambda e: (e.blockNumber, e.logIndex))
+        timestamps = self._block_timestamps(sorted({e.blockNumber for e in events})) if events else {}
+        return [{"event": e, "timestamp": timestamps[e.blockNumber]} for e in events]
+
+    def history(self, from_block=0, to_block=None, names=None, after=None):
+        """Lazily iterates past events as feed items, independent of poll(); `after` is a (block, log_index)."""
+        if to_block is None:
+            to_block = self.w3.eth.block_number - self.confirmations
+        topics = None
+        if names is not None:
+            unknown = set(names) - set(self._topics_by_name)
+            if unknown:
+                raise ValueError(f"Unknown events: {', '.join(sorted(unknown))}")
+            topics = [[self._topics_by_name[name] for name in names]]
+        return self._history(from_block, to_block, topics, after)
+
+    def _history(self, from_block, to_block, topics, after):
+        if after is not None:
+            from_block = max(from_block, after[0])
+        for start in range(from_block, to_block + 1, self.max_range):
+            params = {
+                "address": self.contract.address,
+                "fromBlock": start,
+                "toBlock": min(to_block, start + self.max_range - 1),
+            }
+            if topics is not None:
+                params["topics"] = topics
+            for item in self._decode(self.w3.eth.get_logs(params)):
+                event = item["event"]
+                if after is None or (event.blockNumber, event.logIndex) > tuple(after):
+                    yield item
+
+    def poll(self):
+        """Reads all new confirmed events and dispatches them to each subscriber still behind; returns them."""
+        with self._lock:
+            head = self.w3.eth.block_number - self.confirmations
+            next_block = self.next_block
+            if head < next_block:
+                return []
+            logs = []
+            for start in range(next_block, head + 1, self.max_range):
+                logs.extend(
+                    self.w3.eth.get_logs(
+                        {
+                            "address": self.contract.address,
+                            "fromBlock": start,
+                            "toBlock": min(head, start + self.max_range - 1),
+                        }
+                    )
+                )
+            events = self._decode(logs)
+            self._next_block = head + 1
+            for subscriber in self._subscribers:
+                since = subscriber["next_block"]
+                if since > head:
+                    continue
+                try:
+                    subscriber["callback"]([item for item in events if item["event"].blockNumber >= since], head)
+                except Exception as e:
+                    name = getattr(subscriber["callback"], "__qualname__", subscriber["callback"])
+                    print(f"WARNING: Event subscriber {name} failed on blocks {since}-{head}, retrying next poll: {e}")
+                    continue
+                subscriber["next_block"] = head + 1
+            return events
+
+    def _run(self, interval):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"WARNING: Event feed poll failed: {e}")
+            self._stop.wait(interval)
+
+    def start(self, interval=2.0):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, args=(interval,), name="event-feed", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+def event_record(item):
+    """JSON-ready form of a feed item."""
+    event = item["event"]
+    return {
+        "event": event.event,
+        "block": event.blockNumber,
+        "log_index": event.logIndex,
+        "transaction_hash": event.transactionHash,
+        "timestamp": item["timestamp"],
+        "args": event.args,
+    }
@@ -0,0 +1,50 @@
+import os
+from web3 import Web3
+from web3.middleware import geth_poa_middleware
+from web3.providers.base import JSONBaseProvider
+from rpc_failover import FailoverRPC
+from metrics import rpc_metrics_middleware
+
+DEFAULT_RPC_URL = "http://127.0.0.1:8545"
+
+
+class FailoverProvider(JSONBaseProvider):
+    """web3 provider over a FailoverRPC: hedged reads across every endpoint, writes pinned to one."""
+
+    def __init__(self, endpoint_uris, **kwargs):
+        super().__init__()
+        self.rpc = FailoverRPC(endpoint_uris, **kwargs)
+
+    # The pinned endpoint, so raw JSON-RPC batches (rpc_batch) reach the node
+    # that holds our transactions.
+    @property
+    def endpoint_uri(self):
+        return self.rpc.pinned_endpoint().url
+
+    def make_request(self, method, params):
+        return self.rpc.request(method, params)
+
+    def __str__(self):
+        return f"FailoverProvider({', '.join(endpoint.url for endpoint in self.rpc.endpoints)})"
+
+
+def make_provider(urls=None, **kwargs):
+    """HTTPProvider for one URL, FailoverProvider for several; defaults to RPC_URLS, then the local node."""
+    if urls is None:
+        urls = os.getenv("RPC_URLS", DEFAULT_RPC_URL)
+    if isinstance(urls, str):
+        urls = [url.strip() for url in urls.split(",") if url.strip()]
+    if len(urls) == 1:
+        return Web3.HTTPProvider(urls[0])
+    return FailoverProvider(urls, **kwargs)
+
+
+def make_web3(rpc_cache=None):
+    """Web3 over make_provider() with the API's middleware: POA, `rpc_cache` if given, then RPC metrics."""
+    w3 = Web3(make_provider())
+    w3.middleware_onion.inject(geth_poa_middleware, layer=0)
+    if rpc_cache is not None:
+        w3.middleware_onion.inject(rpc_cache.middleware, name="rpc_cache", layer=0)
+    # Innermost, inside the cache: RPC_LATENCY times only the calls that reach a node.
+    w3.middleware_onion.inject(rpc_metrics_middleware, name="metrics", layer=0)
+    return w3
@@ -0,0 +1,76 @@
+import os
+import json
+import math
+
+# Per-call gas estimate cache written by gas_profiler.py.
+GAS_ESTIMATES_FILE = os.getenv("GAS_ESTIMATES_FILE", "gas_estimates.json")
+# Safety margin applied on top of the worst observed gasUsed.
+GAS_HEADROOM = 1.2
+
+_cache = None
+
+
+def fit_gas_scaling(samples):
+    """Least-squares fit of gasUsed = base + per_depositor * depositors over (depositors, gas_used) samples."""
+    n = len(samples)
+    if n == 0:
+        raise ValueError("No gas samples to fit")
+    mean_x = sum(x for x, _ in samples) / n
+    mean_y = sum(y for _, y in samples) / n
+    var_x = sum((x - mean_x) ** 2 for x, _ in samples)
+    if var_x == 0:
+        return mean_y, 0.0
+    cov = sum((x - mean_x) * (y - mean_y) for x, y in samples)
+    per_depositor = cov / var_x
+    return mean_y - per_depositor * mean_x, per_depositor
+
+
+def build_estimates(samples_by_function, headroom=GAS_HEADROOM):
+    """
+    Turns {function: [(depositors, gas_used), ...]} into the cache format.
+    """
+    estimates = {}
+    for name, samples in samples_by_function.items():
+        base, per_depositor = fit_gas_scaling(samples)
+        max_observed = max(gas for _, gas in samples)
+        estimates[name] = {
+            "samples": len(samples),
+            "base": round(base),
+            "per_depositor": round(per_depositor, 2),
+            "max_observed": max_observed,
+            "max_depositors": max(x for x, _ in samples),
+            "recommended": math.ceil(max_observed * headroom),
+        }
+    return {"headroom": headroom, "functions": estimates}
+
+
+def save_estimates(estimates, path=GAS_ESTIMATES_FILE):
+    global _cache
+    with open(path, "w") as f:
+        json.dump(estimates, f, indent=4)
+    _cache = estimates
+
+
+def load_estimates(path=GAS_ESTIMATES_FILE):
+    """Loads the estimate cache once; returns an empty cache if none was profiled."""
+    global _cache
+    if _cache is None:
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                _cache = json.load(f)
+        else:
+            _cache = {"functions": {}}
+    return _cache
+
+
+def gas_limit(function_name, default, depositors=None):
+    """Profiled gas limit for `function_name`: the fitted line at `depositors`, else the worst seen, else `default`."""
+    estimates = load_estimates()
+    entry = estimates["functions"].get(function_name)
+    if entry is None:
+        return default
+    headroom = estimates.get("headroom", GAS_HEADROOM)
+    if depositors is not None and depositors > entry["max_depositors"]:
+        projected = entry["base"] + entry["per_depositor"] * depositors
+        return math.ceil(max(projected, entry["max_observed"]) * headroom)
+    return entry["recommended"]
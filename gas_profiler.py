@@ -0,0 +1,171 @@
+import os
+import json
+import logging
+from collections import Counter, defaultdict
+from dotenv import load_dotenv
+from web3 import Web3
+from web3.middleware import geth_poa_middleware
+from web3.types import RPCEndpoint
+from eth_utils import to_checksum_address, keccak
+from backend_init import deploy_contract
+from bulk_funding import WETH_ADDRESS, USDC_ADDRESS, fund_accounts
+from gas_estimates import build_estimates, save_estimates
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="[%(asctime)s] %(levelname)s: %(message)s",
+    datefmt="%H:%M:%S",
+)
+
+DEPOSITOR_COUNTS = [1, 2, 5, 10, 20]
+WETH_DEPOSIT = Web3.to_wei(0.1, "ether")
+USDC_DEPOSIT = 250 * 10**6
+REPORT_FILE = "gas_report.json"
+
+# Opcodes whose structLog gasCost includes the gas forwarded to the callee.
+FORWARDING_OPCODES = {"CALL", "STATICCALL", "DELEGATECALL", "CALLCODE", "CREATE", "CREATE2"}
+
+ERC20_ABI = json.loads(
+    """[
+    {"constant": false, "inputs": [{"name": "spender", "type": "address"}, {"name": "value", "type": "uint256"}],
+     "name": "approve", "outputs": [{"name": "", "type": "bool"}], "type": "function"}
+]"""
+)
+
+
+def depositor_addresses(w3, count):
+    """Unlocked Hardhat accounts first, then impersonated synthetic addresses for any count."""
+    unlocked = list(w3.eth.accounts[1:])
+    depositors = unlocked[:count]
+    i = 0
+    while len(depositors) < count:
+        address = to_checksum_address(keccak(text=f"gas-profiler-{i}")[-20:])
+        w3.provider.make_request(RPCEndpoint("hardhat_impersonateAccount"), [address])
+        depositors.append(address)
+        i += 1
+    return depositors
+
+
+def trace_breakdown(w3, tx_hash):
+    """debug_traceTransaction summarised by opcode and storage slot; None without the debug namespace."""
+    response = w3.provider.make_request(
+        RPCEndpoint("debug_traceTransaction"),
+        [Web3.to_hex(tx_hash), {"disableMemory": True, "disableStorage": True}],
+    )
+    if "error" in response:
+        return None
+    by_opcode = Counter()
+    opcode_counts = Counter()
+    sstore_by_slot = Counter()
+    sload_count = 0
+    for step in response["result"]["structLogs"]:
+        op = step["op"]
+        opcode_counts[op] += 1
+        if op not in FORWARDING_OPCODES:
+            by_opcode[op] += step["gasCost"]
+        if op == "SSTORE" and step.get("stack"):
+            sstore_by_slot[step["stack"][-1]] += step["gasCost"]
+        elif op == "SLOAD":
+            sload_count += 1
+    return {
+        "top_opcodes": by_opcode.most_common(10),
+        "sstore": {"count": opcode_counts["SSTORE"], "gas": by_opcode["SSTORE"]},
+        "sload": {"count": sload_count, "gas": by_opcode["SLOAD"]},
+        "top_sstore_slots": sstore_by_slot.most_common(5),
+    }
+
+
+def profile_round(w3, owner, depositor_count, trace=True):
+    """Gas samples per entry point for one deposit/match/withdraw round with `depositor_count` depositors."""
+    contract = deploy_contract(w3, owner)
+    depositors = depositor_addresses(w3, depositor_count)
+    weth = w3.eth.contract(address=WETH_ADDRESS, abi=ERC20_ABI)
+    usdc = w3.eth.contract(address=USDC_ADDRESS, abi=ERC20_ABI)
+    calls = defaultdict(list)
+
+    def record(name, tx_hash):
+        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        if receipt.status != 1:
+            raise Exception(f"{name} reverted in {tx_hash.hex()}")
+        sample = {"gas_used": receipt.gasUsed}
+        if trace:
+            sample["trace"] = trace_breakdown(w3, tx_hash)
+        calls[name].append(sample)
+
+    fund_accounts(
+        w3, depositors, eth_wei=Web3.to_wei(10, "ether"), weth_wei=WETH_DEPOSIT, usdc_wei=USDC_DEPOSIT
+    )
+    for depositor in depositors:
+        weth.functions.approve(contract.address, WETH_DEPOSIT).transact({"from": depositor})
+        usdc.functions.approve(contract.address, USDC_DEPOSIT).transact({"from": depositor})
+        record(
+            "depositWETH",
+            contract.functions.depositWETH(WETH_DEPOSIT).transact({"from": depositor, "gas": 2_000_000}),
+        )
+        record(
+            "depositUSDC",
+            contract.functions.depositUSDC(USDC_DEPOSIT).transact({"from": depositor, "gas": 2_000_000}),
+        )
+
+    total_usdc = contract.functions.totalUSDCDeposited().call()
+    total_weth = contract.functions.totalWETHDeposited().call()
+    record(
+        "triggerLiquidityMatching",
+        contract.functions.triggerLiquidityMatching(total_usdc // 2, total_weth // 2).transact(
+            {"from": owner, "gas": 3_000_000}
+        ),
+    )
+    w3.provider.make_request(RPCEndpoint("evm_increaseTime"), [600])
+    w3.provider.make_request(RPCEndpoint("evm_mine"), [])
+    record(
+        "withdrawAndDistribute",
+        contract.functions.withdrawAndDistribute().transact({"from": owner, "gas": 15_000_000}),
+    )
+    return calls
+
+
+def print_scaling_table(rounds):
+    """Logs gasUsed per entry point for every profiled depositor count."""
+    functions = ["depositWETH", "depositUSDC", "triggerLiquidityMatching", "withdrawAndDistribute"]
+    logging.info("depositors | " + " | ".join(f"{name:>24}" for name in functions))
+    for count, calls in rounds:
+        cells = [f"{max(s['gas_used'] for s in calls[name]):>24}" for name in functions]
+        logging.info(f"{count:>10} | " + " | ".join(cells))
+
+
+def main():
+    """Profiles every entry point across DEPOSITOR_COUNTS and writes the report and estimate cache."""
+    load_dotenv()
+    w3 = Web3(Web3.HTTPProvider(os.getenv("LOCAL_NODE_URL", "http://127.0.0.1:8545")))
+    w3.middleware_onion.inject(geth_poa_middleware, layer=0)
+    if not w3.is_connected():
+        raise Exception("Not connected to local Hardhat node!")
+    owner = w3.eth.accounts[0]
+    trace = os.getenv("GAS_PROFILE_TRACE", "1") == "1"
+
+    rounds = []
+    samples = defaultdict(list)
+    for count in DEPOSITOR_COUNTS:
+        logging.info(f"Profiling round with {count} depositor(s) per side...")
+        calls = profile_round(w3, owner, count, trace=trace)
+        rounds.append((count, calls))
+        for name, entries in calls.items():
+            samples[name].extend((count, entry["gas_used"]) for entry in entries)
+
+    print_scaling_table(rounds)
+    with open(REPORT_FILE, "w") as f:
+        json.dump(
+            [{"depositors": count, "calls": calls} for count, calls in rounds], f, indent=4
+        )
+    estimates = build_estimates(samples)
+    save_estimates(estimates)
+    for name, entry in estimates["functions"].items():
+        logging.info(
+            f"{name}: base {entry['base']} + {entry['per_depositor']}/depositor, "
+            f"recommended limit {entry['recommended']}"
+        )
+    logging.info(f"Report written to {REPORT_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+# Prefork deployment of the API: gunicorn -c gunicorn.conf.py backend_api:app
+#
+# Every worker imports backend_api itself (no preload_app), so none of its
+# state is created before the fork: each worker has its own SQLite and HTTP
+# connections, metrics, caches and event indexes. Chain writes are still
+# serialized across workers by the deployment registry's file lock, and
+# /metrics merges every worker's series through METRICS_DIR.
+import os
+import glob
+import tempfile
+
+bind = os.getenv("API_BIND", "127.0.0.1:5000")
+# Exported so backend_api splits its per-process admission limits across the workers.
+workers = int(os.environ.setdefault("API_WORKERS", "2"))
+worker_class = "gthread"
+threads = int(os.getenv("API_THREADS", "8"))
+preload_app = False
+# Exported before the workers import metrics; see metrics.METRICS_DIR.
+metrics_dir = os.environ.setdefault("METRICS_DIR", os.path.join(tempfile.gettempdir(), "cosmos-metrics"))
+
+
+def on_starting(server):
+    # Counters from a previous run's workers would otherwise be added to this one's.
+    os.makedirs(metrics_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(metrics_dir, "*.json")):
+        os.remove(path)
+
+
+def post_worker_init(worker):
+    # Runs in the worker once it has loaded the app: background threads are
+    # started here rather than at import so they belong to this process.
+    import backend_api
+
+    backend_api.start_background_tasks()
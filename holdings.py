@@ -0,0 +1,143 @@
+import bisect
+import threading
+from eth_utils import to_checksum_address
+from analytics import DECIMALS, to_units, token_symbol
+
+
+def _zero():
+    return {"WETH": 0, "USDC": 0}
+
+
+def _new_holder():
+    return {
+        "deposited": _zero(),
+        "matched": _zero(),
+        "residual": _zero(),
+        "positions": {},
+        "lifetime_deposited": _zero(),
+        "lifetime_withdrawn": _zero(),
+        "deposit_count": 0,
+        "last_deposit_at": None,
+    }
+
+
+class HoldingsIndex:
+    """Address-keyed depositor holdings for the current cycle and lifetime, fed by an EventFeed."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.head_block = None
+        self._holders = {}
+        # Every known address in order, kept sorted as holders appear, for paging.
+        self._addresses = []
+        # Addresses with a residual per token: the set a match is spread over.
+        self._open = {"WETH": set(), "USDC": set()}
+        # Length of the contract's wethDepositors/usdcDepositors arrays: a deposit
+        # pushes its sender unless it already deposited this cycle, and a
+        # withdrawal zeroes the balances without shrinking the arrays.
+        self._cycle_depositors = {"WETH": set(), "USDC": set()}
+        self._depositor_slots = _zero()
+
+    def _holder(self, address):
+        holder = self._holders.get(address)
+        if holder is None:
+            holder = self._holders[address] = _new_holder()
+            bisect.insort(self._addresses, address)
+        return holder
+
+    # -- ingestion -------------------------------------------------------
+    def apply(self, events, head_block):
+        """EventFeed subscriber."""
+        with self._lock:
+            for item in events:
+                self._apply_event(item["event"], item["timestamp"])
+            self.head_block = head_block
+
+    def _apply_event(self, event, timestamp):
+        name = event.event
+        args = event.args
+        if name in ("WethDeposited", "UsdcDeposited"):
+            token = "WETH" if name == "WethDeposited" else "USDC"
+            holder = self._holder(args.depositor)
+            for key in ("deposited", "residual", "lifetime_deposited"):
+                holder[key][token] += args.amount
+            holder["deposit_count"] += 1
+            holder["last_deposit_at"] = timestamp
+            self._open[token].add(args.depositor)
+            if args.depositor not in self._cycle_depositors[token]:
+                self._cycle_depositors[token].add(args.depositor)
+                self._depositor_slots[token] += 1
+        elif name == "LiquidityMatched":
+            used = {token_symbol(args.token0): args.amount0, token_symbol(args.token1): args.amount1}
+            for token, amount in used.items():
+                self._attribute(args.tokenId, token, amount)
+        elif name == "WithdrawAndDistribute":
+            for holder in self._holders.values():
+                for token in DECIMALS:
+                    holder["lifetime_withdrawn"][token] += holder["deposited"][token]
+                holder["deposited"] = _zero()
+                holder["matched"] = _zero()
+                holder["residual"] = _zero()
+                for position in holder["positions"].values():
+                    position["closed"] = True
+            self._open = {"WETH": set(), "USDC": set()}
+            self._cycle_depositors = {"WETH": set(), "USDC": set()}
+
+    def _attribute(self, token_id, token, used):
+        # The contract pools deposits and records no per-user matches, so a match is
+        # spread pro rata over the depositors holding a residual, as its totals are.
+        holders = [(address, self._holders[address]) for address in self._open[token]]
+        total = sum(holder["residual"][token] for _, holder in holders)
+        if total <= 0:
+            return
+        for address, holder in holders:
+            share = min(holder["residual"][token], holder["residual"][token] * used // total)
+            holder["residual"][token] -= share
+            holder["matched"][token] += share
+            position = holder["positions"].setdefault(
+                token_id, {"token_id": token_id, "amounts": _zero(), "fraction": {}, "closed": False}
+            )
+            position["amounts"][token] += share
+            position["fraction"][token] = position["amounts"][token] / used if used else 0.0
+            if holder["residual"][token] == 0:
+                self._open[token].discard(address)
+
+    # -- queries ---------------------------------------------------------
+    def lookup(self, address):
+        """Holdings for `address` in token units; zeros for unknown addresses."""
+        address = to_checksum_address(address)
+        with self._lock:
+            holder = self._holders.get(address) or _new_holder()
+            return {
+                "address": address,
+                "head_block": self.head_block,
+                "deposited": to_units(holder["deposited"]),
+                "matched": to_units(holder["matched"]),
+                "residual": to_units(holder["residual"]),
+                "positions": [
+                    {**position, "amounts": to_units(position["amounts"])}
+                    for position in holder["positions"].values()
+                ],
+                "lifetime_deposited": to_units(holder["lifetime_deposited"]),
+                "lifetime_withdrawn": to_units(holder["lifetime_withdrawn"]),
+                "deposit_count": holder["deposit_count"],
+                "last_deposit_at": holder["last_deposit_at"],
+            }
+
+    def holders(self, after=None):
+        """Holdings of every known address in address order, starting behind `after`."""
+        while True:
+            with self._lock:
+                index = 0 if after is None else bisect.bisect_right(self._addresses, after)
+                if index == len(self._addresses):
+                    return
+                after = self._addresses[index]
+            yield self.lookup(after)
+
+    def depositor_slots(self):
+        """Length of the longer depositor array, the loop withdrawAndDistribute runs over."""
+        with self._lock:
+            return max(self._depositor_slots.values())
+
+    def __len__(self):
+        return len(self._holders)
@@ -1,7 +1,12 @@
 import os
+import sys
 import json
 import math
+import time
+import argparse
+import statistics
 import requests
+from contextlib import contextmanager
 from datetime import datetime
 from decimal import Decimal, getcontext
 from web3 import Web3
@@ -9,6 +14,8 @@ from web3.middleware import geth_poa_middleware
 from eth_utils import to_checksum_address
 from solcx import compile_files, install_solc
 from web3.types import RPCEndpoint
+from rpc_profiler import install_profiler
+from withdraw_scheduler import withdrawal_due
 
 getcontext().prec = 100  # Increase precision
 install_solc("0.7.6")
@@ -30,6 +37,11 @@ if not w3.is_connected():
     raise Exception("ERROR: Unable to connect to Hardhat local node.")
 print("INFO: Connected to Hardhat local node.")
 
+# RPC_PROFILE=1 prints a per-method RPC report at exit; RPC_PROFILE_OUTPUT also saves it as JSON.
+rpc_profiler = None
+if os.getenv("RPC_PROFILE"):
+    rpc_profiler = install_profiler(w3, path=os.getenv("RPC_PROFILE_OUTPUT"))
+
 accounts = w3.eth.accounts
 owner = accounts[0]
 user_usdc = accounts[2]
@@ -67,10 +79,10 @@ def calculate_liquidity(weth_amount=None, usdc_amount=None, price_lower=None, pr
 # 3) Contract Operations
 #############################
 
-def compile_and_deploy_mock():
-    print("=== Compiling MockNonfungiblePositionManager.sol ===")
+def compile_contract(path, name):
+    print(f"=== Compiling {path} ===")
     compiled = compile_files(
-        [MOCK_CONTRACT_PATH],
+        [path],
         output_values=["abi", "bin"],
         solc_version="0.7.6",
         import_remappings=[
@@ -80,36 +92,23 @@ def compile_and_deploy_mock():
         ],
         allow_paths=[BASE_PATH, os.path.join(BASE_PATH, "node_modules")]
     )
-    contract_id = f"{MOCK_CONTRACT_PATH}:MockNonfungiblePositionManager"
-    contract_interface = compiled[contract_id]
+    return compiled[f"{path}:{name}"]
+
+def deploy_mock(mock_interface):
     MockPositionManager = w3.eth.contract(
-        abi=contract_interface["abi"],
-        bytecode=contract_interface["bin"]
+        abi=mock_interface["abi"],
+        bytecode=mock_interface["bin"]
     )
     print(">>> Deploying MockNonfungiblePositionManager.sol ...")
     tx_hash = MockPositionManager.constructor().transact({"from": owner, "gas": 3000000})
     receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
     print(f"INFO: Mock deployed at: {receipt.contractAddress}")
-    return receipt.contractAddress
+    return receipt
 
-def compile_and_deploy_liquidity(mock_pm_address):
-    print("=== Compiling LiquidityMatching.sol ===")
-    compiled = compile_files(
-        [CONTRACT_PATH],
-        output_values=["abi", "bin"],
-        solc_version="0.7.6",
-        import_remappings=[
-            "@openzeppelin=node_modules/@openzeppelin",
-            "contracts/=contracts/",
-            "@uniswap=node_modules/@uniswap"
-        ],
-        allow_paths=[BASE_PATH, os.path.join(BASE_PATH, "node_modules")]
-    )
-    contract_id = f"{CONTRACT_PATH}:LiquidityMatching"
-    contract_interface = compiled[contract_id]
+def deploy_liquidity(liquidity_interface, mock_pm_address):
     LiquidityMatching = w3.eth.contract(
-        abi=contract_interface["abi"],
-        bytecode=contract_interface["bin"]
+        abi=liquidity_interface["abi"],
+        bytecode=liquidity_interface["bin"]
     )
     print(">>> Deploying LiquidityMatching contract ...")
     tx_hash = LiquidityMatching.constructor(
@@ -119,29 +118,39 @@ def compile_and_deploy_liquidity(mock_pm_address):
     ).transact({"from": owner, "gas": 3000000})
     receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
     print(f"INFO: LiquidityMatching deployed at: {receipt.contractAddress}")
-    return w3.eth.contract(address=receipt.contractAddress, abi=contract_interface["abi"])
+    return receipt
 
-def deposit_tokens(contract, token_type, user, amount):
-    token_address = WETH_ADDRESS if token_type == "WETH" else USDC_ADDRESS
-    abi = json.loads("""[{
-        "constant": false,
-        "inputs": [{"name": "spender", "type": "address"}, {"name": "value", "type": "uint256"}],
-        "name": "approve",
-        "outputs": [{"name": "", "type": "bool"}],
-        "type": "function"
-    }]""")
-    token = w3.eth.contract(address=token_address, abi=abi)
+APPROVE_ABI = json.loads("""[{
+    "constant": false,
+    "inputs": [{"name": "spender", "type": "address"}, {"name": "value", "type": "uint256"}],
+    "name": "approve",
+    "outputs": [{"name": "", "type": "bool"}],
+    "type": "function"
+}]""")
+
+def to_token_wei(token_type, amount):
     decimals = 18 if token_type == "WETH" else 6
-    amount_wei = int(amount * (10 ** decimals))
-    token.functions.approve(contract.address, amount_wei).transact({"from": user, "gas": 100000})
+    return int(amount * (10 ** decimals))
+
+def approve_tokens(contract, token_type, user, amount):
+    token_address = WETH_ADDRESS if token_type == "WETH" else USDC_ADDRESS
+    token = w3.eth.contract(address=token_address, abi=APPROVE_ABI)
+    tx_hash = token.functions.approve(contract.address, to_token_wei(token_type, amount)).transact({"from": user, "gas": 100000})
+    return w3.eth.wait_for_transaction_receipt(tx_hash)
+
+def send_deposit(contract, token_type, user, amount):
+    amount_wei = to_token_wei(token_type, amount)
     if token_type == "WETH":
-        contract.functions.depositWETH(amount_wei).transact({"from": user, "gas": 2000000})
+        tx_hash = contract.functions.depositWETH(amount_wei).transact({"from": user, "gas": 2000000})
     else:
-        contract.functions.depositUSDC(amount_wei).transact({"from": user, "gas": 2000000})
+        tx_hash = contract.functions.depositUSDC(amount_wei).transact({"from": user, "gas": 2000000})
+    receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
     print(f"INFO: Deposited {amount} {token_type} from {user}")
+    return receipt
 
-def calculate_matched_amounts(contract):
-    base_price = fetch_weth_price()
+def calculate_matched_amounts(contract, base_price=None):
+    if base_price is None:
+        base_price = fetch_weth_price()
     price_lower, price_upper = get_price_range(base_price)
     print("=== Calculating Matched Amounts ===")
     print(f"Market Price: ${base_price:.2f}")
@@ -163,23 +172,17 @@ def calculate_matched_amounts(contract):
     )
     return matched_weth, total_usdc
 
-def execute_liquidity_matching(contract):
-    constMatched = calculate_matched_amounts(contract)
-    matched_weth, matched_usdc = constMatched
+def send_liquidity_matching(contract, base_price=None):
+    matched_weth, matched_usdc = calculate_matched_amounts(contract, base_price)
     print(f"=== Executing Liquidity Matching ===")
     print(f"Matching {matched_weth:.4f} WETH with {matched_usdc:.2f} USDC")
-    print(f"Matched USDC: {matched_usdc}")
-    print(f"Matched WETH: {matched_weth}")
     weth_wei = int(Decimal(str(matched_weth)) * Decimal("1e18"))
     usdc_wei = int(Decimal(str(matched_usdc)) * Decimal("1e6"))
     print("Amounts (in wei):", weth_wei, usdc_wei)
-    tx_hash = contract.functions.triggerLiquidityMatching(
+    return contract.functions.triggerLiquidityMatching(
         usdc_wei,
         weth_wei
     ).transact({"from": owner, "gas": 500000})
-    w3.eth.wait_for_transaction_receipt(tx_hash)
-    fetch_events(contract)
-    print(f"INFO: Liquidity matched in transaction: {tx_hash.hex()}")
 
 def fetch_events(contract):
     latest_block = w3.eth.block_number
@@ -203,12 +206,16 @@ def advance_time(seconds):
 
 def withdraw_and_distribute(contract):
     print("=== Initiating Withdrawal Process ===")
-    print("Advancing time by 10 minutes...")
-    advance_time(600)
+    # Advance exactly to the first timestamp the 10-minute lock allows.
+    lag = withdrawal_due(contract) - w3.eth.get_block("latest").timestamp
+    if lag > 0:
+        print(f"Advancing time by {lag} seconds...")
+        advance_time(lag)
     print("Calling withdrawAndDistribute()...")
     tx_hash = contract.functions.withdrawAndDistribute().transact({"from": owner, "gas": 500000})
     receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
     print(f"INFO: withdrawAndDistribute executed in transaction: {tx_hash.hex()}")
+    return receipt
 
 def get_token_balance(token_address, account):
     token = w3.eth.contract(
@@ -238,41 +245,179 @@ def print_all_balances(contract, pool_address):
     print("Owner:", owner)
     print("========================================\n")
 
-def main():
-    # Deploy contracts
-    mock_pm_address = compile_and_deploy_mock()
-    contract = compile_and_deploy_liquidity(mock_pm_address)
-    print(f"INFO: LiquidityMatching contract deployed at: {contract.address}")
+#############################
+# 4) Lifecycle Benchmark
+#############################
+
+PHASES = ["compile", "deploy", "approve", "deposit", "price_fetch", "match", "confirmation", "withdraw"]
+BASELINE_FILE = "benchmarks/lifecycle_baseline.json"
+# Allowed growth over the baseline before a metric counts as a regression.
+DEFAULT_THRESHOLDS = {"seconds": 0.25, "rpc_calls": 0.0, "gas": 0.02}
+# Timing differences below this many seconds are noise, whatever the ratio.
+TIME_NOISE_FLOOR = 0.005
 
-    # Make deposits
-    deposit_tokens(contract, "WETH", user_weth, 0.2)
-    deposit_tokens(contract, "USDC", user_usdc, 1)
+class PhaseRecorder:
+    """Wall time, JSON-RPC calls and gas per lifecycle phase of one iteration."""
 
-    print("=== Balances BEFORE Liquidity Matching ===")
-    print_all_balances(contract, mock_pm_address)
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self.phases = {name: {"seconds": 0.0, "rpc_calls": 0, "gas": 0} for name in PHASES}
 
-    # Execute liquidity matching
-    execute_liquidity_matching(contract)
+    @contextmanager
+    def phase(self, name):
+        calls = self.profiler.total_calls()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name]["seconds"] += time.perf_counter() - start
+            self.phases[name]["rpc_calls"] += self.profiler.total_calls() - calls
 
-    print("=== Balances AFTER Liquidity Matching ===")
-    print_all_balances(contract, mock_pm_address)
+    def add_gas(self, name, *receipts):
+        self.phases[name]["gas"] += sum(receipt.gasUsed for receipt in receipts)
 
-    initial_weth = contract.functions.totalWETHDeposited().call() / 1e18
-    initial_usdc = contract.functions.totalUSDCDeposited().call() / 1e18
-    print(f"INFO: Initial Holdings before Withdrawal: {initial_weth:.4f} WETH | {initial_usdc:.2f} USDC")
+def run_lifecycle(recorder, weth_amount, usdc_amount, fixed_price=None):
+    """One deploy → approve → deposit → price → match → confirm → withdraw pass."""
+    with recorder.phase("compile"):
+        mock_interface = compile_contract(MOCK_CONTRACT_PATH, "MockNonfungiblePositionManager")
+        liquidity_interface = compile_contract(CONTRACT_PATH, "LiquidityMatching")
+    with recorder.phase("deploy"):
+        mock_receipt = deploy_mock(mock_interface)
+        liquidity_receipt = deploy_liquidity(liquidity_interface, mock_receipt.contractAddress)
+        contract = w3.eth.contract(address=liquidity_receipt.contractAddress, abi=liquidity_interface["abi"])
+    recorder.add_gas("deploy", mock_receipt, liquidity_receipt)
+    deposits = [("WETH", user_weth, weth_amount), ("USDC", user_usdc, usdc_amount)]
+    with recorder.phase("approve"):
+        receipts = [approve_tokens(contract, token_type, user, amount) for token_type, user, amount in deposits]
+    recorder.add_gas("approve", *receipts)
+    with recorder.phase("deposit"):
+        receipts = [send_deposit(contract, token_type, user, amount) for token_type, user, amount in deposits]
+    recorder.add_gas("deposit", *receipts)
+    with recorder.phase("price_fetch"):
+        price = fixed_price if fixed_price is not None else fetch_weth_price()
+    with recorder.phase("match"):
+        tx_hash = send_liquidity_matching(contract, price)
+    with recorder.phase("confirmation"):
+        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+    recorder.add_gas("match", receipt)
+    with recorder.phase("withdraw"):
+        receipt = withdraw_and_distribute(contract)
+    recorder.add_gas("withdraw", receipt)
+    return contract, mock_receipt.contractAddress
 
-    print("=== Balances BEFORE Withdrawal ===")
-    print_all_balances(contract, mock_pm_address)
+def _stats(values):
+    ordered = sorted(values)
+    return {
+        "mean": statistics.fmean(ordered),
+        "p50": statistics.median(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))],
+        "min": ordered[0],
+        "max": ordered[-1],
+    }
+
+def summarize(runs):
+    """Per-phase statistics over all iterations, plus the end-to-end totals."""
+    phases = {}
+    for name in PHASES:
+        phases[name] = {metric: _stats([run[name][metric] for run in runs]) for metric in ("seconds", "rpc_calls", "gas")}
+    totals = {metric: _stats([sum(run[name][metric] for name in PHASES) for run in runs]) for metric in ("seconds", "rpc_calls", "gas")}
+    return {"phases": phases, "total": totals}
+
+def compare(result, baseline, thresholds):
+    """Rows comparing each phase metric's median with the baseline; a row regresses past its threshold."""
+    rows = []
+    for name in PHASES + ["total"]:
+        current = result["total"] if name == "total" else result["phases"][name]
+        previous = baseline["total"] if name == "total" else baseline["phases"].get(name)
+        if previous is None:
+            continue
+        for metric, threshold in thresholds.items():
+            now, before = current[metric]["p50"], previous[metric]["p50"]
+            change = (now - before) / before if before else (0.0 if now == before else float("inf"))
+            regressed = change > threshold and not (metric == "seconds" and now - before < TIME_NOISE_FLOOR)
+            rows.append({"phase": name, "metric": metric, "baseline": before, "current": now, "change": change, "regressed": regressed})
+    return rows
+
+def print_comparison(rows):
+    print(f"{'phase':<14} {'metric':<10} {'baseline':>14} {'current':>14} {'change':>9}")
+    for row in rows:
+        flag = "  REGRESSION" if row["regressed"] else ""
+        print(
+            f"{row['phase']:<14} {row['metric']:<10} {row['baseline']:>14.4f} {row['current']:>14.4f} "
+            f"{row['change'] * 100:>8.1f}%{flag}"
+        )
+
+def print_summary(result):
+    print(f"{'phase':<14} {'p50 s':>9} {'p95 s':>9} {'rpc calls':>10} {'gas':>12}")
+    for name in PHASES + ["total"]:
+        stats = result["total"] if name == "total" else result["phases"][name]
+        print(
+            f"{name:<14} {stats['seconds']['p50']:>9.4f} {stats['seconds']['p95']:>9.4f} "
+            f"{stats['rpc_calls']['p50']:>10.0f} {stats['gas']['p50']:>12.0f}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the deploy → deposit → match → withdraw lifecycle phase by phase."
+    )
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--weth", type=float, default=0.2, help="WETH deposited per iteration")
+    parser.add_argument("--usdc", type=float, default=1.0, help="USDC deposited per iteration")
+    parser.add_argument("--price", type=float, default=None, help="Fixed WETH price instead of CoinGecko")
+    parser.add_argument("--output", default="lifecycle_benchmark.json", help="Where to write this run's results")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="Baseline results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--time-threshold", type=float, default=DEFAULT_THRESHOLDS["seconds"])
+    parser.add_argument("--rpc-threshold", type=float, default=DEFAULT_THRESHOLDS["rpc_calls"])
+    parser.add_argument("--gas-threshold", type=float, default=DEFAULT_THRESHOLDS["gas"])
+    parser.add_argument("--balances", action="store_true", help="Print balances and events after each iteration")
+    args = parser.parse_args()
 
-    # Call withdrawal
-    withdraw_and_distribute(contract)
+    profiler = rpc_profiler or install_profiler(w3, dump_at_exit=False, dump_signal=None)
+    runs = []
+    for iteration in range(args.iterations):
+        print(f"=== Iteration {iteration + 1}/{args.iterations} ===")
+        recorder = PhaseRecorder(profiler)
+        contract, mock_pm_address = run_lifecycle(recorder, args.weth, args.usdc, args.price)
+        runs.append(recorder.phases)
+        if args.balances:
+            fetch_events(contract)
+            print_all_balances(contract, mock_pm_address)
 
-    print("=== Balances AFTER Withdrawal ===")
-    print_all_balances(contract, mock_pm_address)
+    result = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "chain_id": w3.eth.chain_id,
+        "iterations": args.iterations,
+        "deposits": {"WETH": args.weth, "USDC": args.usdc},
+        **summarize(runs),
+        "runs": runs,
+    }
+    print("\n========== LIFECYCLE BENCHMARK ==========")
+    print_summary(result)
+    with open(args.output, "w") as f:
+        json.dump(result, f, indent=4)
+    print(f"INFO: Results written to {args.output}")
 
-    final_weth = contract.functions.totalWETHDeposited().call() / 1e18
-    final_usdc = contract.functions.totalUSDCDeposited().call() / 1e18
-    print(f"INFO: Final Holdings after Withdrawal: {final_weth:.4f} WETH | {final_usdc:.2f} USDC")
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(result, f, indent=4)
+        print(f"INFO: Baseline saved to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"WARNING: No baseline at {args.baseline}; run with --save-baseline to create one.")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    thresholds = {"seconds": args.time_threshold, "rpc_calls": args.rpc_threshold, "gas": args.gas_threshold}
+    rows = compare(result, baseline, thresholds)
+    print("\n========== AGAINST BASELINE ==========")
+    print_comparison(rows)
+    regressions = [row for row in rows if row["regressed"]]
+    if regressions:
+        print(f"WARNING: {len(regressions)} metric(s) regressed beyond their thresholds.")
+        sys.exit(1)
+    print("INFO: No regressions against the baseline.")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,301 @@
+import os
+import json
+import time
+import atexit
+import bisect
+import threading
+from contextlib import contextmanager
+from flask import Response, g, request
+
+# Latency buckets in seconds, from sub-millisecond RPCs to slow chain confirmations.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Set METRICS_DIR when several processes serve the API (gunicorn workers): a
+# scrape reaches one of them, so each writes its series to METRICS_DIR/<pid>.json
+# every METRICS_FLUSH_INTERVAL seconds and /metrics merges every file. Counters
+# and histograms are summed, exited workers included; gauges are summed over
+# live processes, or taken from the newest set() with multiprocess_mode="latest".
+METRICS_DIR = os.getenv("METRICS_DIR")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+
+REGISTRY = []
+
+
+def _format_labels(labelnames, labelvalues, extra=None):
+    pairs = list(zip(labelnames, labelvalues))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(labelvalues), value] for labelvalues, value in self._series.items()]
+
+    def merge(self, snapshots):
+        """Series summed over every process's snapshot; `snapshots` is [(alive, snapshot)]."""
+        merged = {}
+        for _, snapshot in snapshots:
+            for labelvalues, value in snapshot:
+                merged[tuple(labelvalues)] = merged.get(tuple(labelvalues), 0) + value
+        return merged
+
+    def render(self, series=None):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        if series is None:
+            with self._lock:
+                series = dict(self._series)
+        for labelvalues, value in series.items():
+            lines.extend(self._render_series(labelvalues, value))
+        return lines
+
+    def _render_series(self, labelvalues, value):
+        return [f"{self.name}{_format_labels(self.labelnames, labelvalues)} {value}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, *labelvalues):
+        with self._lock:
+            self._series[labelvalues] = self._series.get(labelvalues, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), multiprocess_mode="livesum"):
+        super().__init__(name, documentation, labelnames)
+        self.multiprocess_mode = multiprocess_mode
+        self._updated = {}
+
+    def set(self, value, *labelvalues):
+        with self._lock:
+            self._series[labelvalues] = value
+            self._updated[labelvalues] = time.time()
+
+    def inc(self, amount=1, *labelvalues):
+        with self._lock:
+            self._series[labelvalues] = self._series.get(labelvalues, 0) + amount
+            self._updated[labelvalues] = time.time()
+
+    def dec(self, amount=1, *labelvalues):
+        self.inc(-amount, *labelvalues)
+
+    def snapshot(self):
+        with self._lock:
+            return [
+                [list(labelvalues), [value, self._updated[labelvalues]]] for labelvalues, value in self._series.items()
+            ]
+
+    def merge(self, snapshots):
+        merged = {}
+        newest = {}
+        for alive, snapshot in snapshots:
+            for labelvalues, (value, updated) in snapshot:
+                key = tuple(labelvalues)
+                if self.multiprocess_mode == "latest":
+                    if updated >= newest.get(key, updated):
+                        merged[key], newest[key] = value, updated
+                elif alive:
+                    merged[key] = merged.get(key, 0) + value
+        return merged
+
+
+class Histogram(_Metric):
+    """Histogram keeping per-bucket counts; cumulative buckets are built on render."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labelvalues):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(labelvalues), [list(counts), total]] for labelvalues, (counts, total) in self._series.items()]
+
+    def merge(self, snapshots):
+        merged = {}
+        for _, snapshot in snapshots:
+            for labelvalues, (counts, total) in snapshot:
+                series = merged.setdefault(tuple(labelvalues), [[0] * len(counts), 0.0])
+                series[0] = [a + b for a, b in zip(series[0], counts)]
+                series[1] += total
+        return merged
+
+    @contextmanager
+    def time(self, *labelvalues):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labelvalues)
+
+    def _render_series(self, labelvalues, value):
+        counts, total = value
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labelvalues, ('le', le))} {cumulative}")
+        labels = _format_labels(self.labelnames, labelvalues)
+        lines.append(f"{self.name}_sum{labels} {total}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def write_snapshot():
+    """Writes this process's series to METRICS_DIR/<pid>.json."""
+    path = os.path.join(METRICS_DIR, f"{os.getpid()}.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump({metric.name: metric.snapshot() for metric in REGISTRY}, f)
+    os.replace(path + ".tmp", path)
+
+
+def _read_snapshots():
+    snapshots = []
+    for filename in os.listdir(METRICS_DIR):
+        pid, ext = os.path.splitext(filename)
+        if ext != ".json" or not pid.isdigit():
+            continue
+        try:
+            with open(os.path.join(METRICS_DIR, filename)) as f:
+                snapshots.append((_alive(int(pid)), json.load(f)))
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+
+_flusher = {"pid": None}
+
+
+def start_flusher():
+    """Starts writing this process's snapshot every METRICS_FLUSH_INTERVAL (no-op without METRICS_DIR)."""
+    if not METRICS_DIR or _flusher["pid"] == os.getpid():
+        return
+    _flusher["pid"] = os.getpid()
+    os.makedirs(METRICS_DIR, exist_ok=True)
+
+    def run():
+        while True:
+            time.sleep(METRICS_FLUSH_INTERVAL)
+            try:
+                write_snapshot()
+            except OSError as e:
+                print(f"WARNING: Could not write metrics snapshot: {e}")
+
+    threading.Thread(target=run, name="metrics-flush", daemon=True).start()
+    atexit.register(write_snapshot)
+
+
+def render():
+    """Prometheus text exposition format 0.0.4 for every registered metric, merged over METRICS_DIR if set."""
+    lines = []
+    if METRICS_DIR:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        write_snapshot()
+        snapshots = _read_snapshots()
+        for metric in REGISTRY:
+            merged = metric.merge([(alive, snapshot.get(metric.name, [])) for alive, snapshot in snapshots])
+            lines.extend(metric.render(merged))
+    else:
+        for metric in REGISTRY:
+            lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+#############################
+# Series
+#############################
+REQUEST_LATENCY = Histogram(
+    "cosmos_http_request_duration_seconds", "API request latency by route.", ["route", "method", "status"]
+)
+RPC_LATENCY = Histogram("cosmos_rpc_duration_seconds", "JSON-RPC latency by method.", ["method"])
+PRICE_FETCH_LATENCY = Histogram(
+    "cosmos_price_fetch_duration_seconds", "Price source fetch latency on cache misses.", ["source"]
+)
+PRICE_CACHE = Counter("cosmos_price_cache_total", "Price cache lookups by result.", ["source", "result"])
+TX_CONFIRMATION = Histogram(
+    "cosmos_tx_confirmation_seconds", "Time from transaction submission to receipt.", ["function"]
+)
+MATCH_ROUND_DURATION = Histogram("cosmos_match_round_duration_seconds", "Duration of a full matching round.")
+DEPOSIT_QUEUE_DEPTH = Gauge("cosmos_deposit_queue_depth", "Deposits accepted but not yet confirmed.")
+PAIR_ROUND_DURATION = Histogram(
+    "cosmos_pair_round_duration_seconds", "Duration of one pair's matching round.", ["pair"]
+)
+PAIR_MATCHES = Counter("cosmos_pair_matches_total", "Matches produced per token pair.", ["pair"])
+PAIR_QUEUE_DEPTH = Gauge(
+    "cosmos_pair_queue_depth", "Unmatched deposits per pair and side.", ["pair", "side"], multiprocess_mode="latest"
+)
+ADMISSION_REJECTED = Counter(
+    "cosmos_admission_rejected_total", "Requests rejected by admission control.", ["endpoint", "reason"]
+)
+
+
+def rpc_metrics_middleware(make_request, w3):
+    """web3 middleware recording RPC_LATENCY for every JSON-RPC method."""
+
+    def middleware(method, params):
+        start = time.perf_counter()
+        try:
+            return make_request(method, params)
+        finally:
+            RPC_LATENCY.observe(time.perf_counter() - start, method)
+
+    return middleware
+
+
+def install_flask_metrics(app):
+    """Records REQUEST_LATENCY for every request and serves all series at /metrics."""
+
+    @app.before_request
+    def _metrics_start():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _metrics_record(response):
+        if "metrics_start" in g:
+            route = request.url_rule.rule if request.url_rule else "unmatched"
+            REQUEST_LATENCY.observe(
+                time.perf_counter() - g.metrics_start, route, request.method, str(response.status_code)
+            )
+        return response
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics_endpoint():
+        return Response(render(), mimetype="text/plain; version=0.0.4")
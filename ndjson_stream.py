@@ -0,0 +1,104 @@
+import os
+import sys
+import json
+import time
+
+# Lines written between fsyncs; a crash loses at most this many records.
+DEFAULT_FSYNC_EVERY = 100
+
+
+class NDJSONWriter:
+    """Appends one JSON document per line, fsyncing every `fsync_every` records."""
+
+    def __init__(self, path, fsync_every=DEFAULT_FSYNC_EVERY):
+        self.path = path
+        self.fsync_every = fsync_every
+        self._file = open(path, "a", encoding="utf-8")
+        self._pending = 0
+
+    def write(self, record):
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._pending += 1
+        if self._pending >= self.fsync_every:
+            self.sync()
+
+    def flush(self):
+        """Hands buffered lines to the OS: they survive the process exiting, not the machine crashing."""
+        self._file.flush()
+
+    def sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+
+    def close(self):
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def iter_ndjson(path, start_offset=0, follow=False, poll_interval=0.25):
+    """Yields records from `start_offset` on; with `follow`, waits for new lines like `tail -f`."""
+    with open(path, "r", encoding="utf-8") as f:
+        f.seek(start_offset)
+        buffered = ""
+        while True:
+            line = f.readline()
+            if not line:
+                if not follow:
+                    break
+                time.sleep(poll_interval)
+                continue
+            buffered += line
+            if not buffered.endswith("\n"):
+                if follow:
+                    continue
+                break
+            if buffered.strip():
+                yield json.loads(buffered)
+            buffered = ""
+
+
+def convert_matched_pairs(json_path, ndjson_path):
+    """Converts an old matched_pairs.json (list or dict with unmatched lists) to NDJSON; returns the count."""
+    with open(json_path, "r") as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        data = {"matched_pairs": data}
+    count = 0
+    with NDJSONWriter(ndjson_path) as writer:
+        for pair in data.get("matched_pairs", []):
+            writer.write({"type": "match", **pair})
+            count += 1
+        for record_type in ("unmatched_weth", "unmatched_usdc"):
+            for deposit in data.get(record_type, []):
+                writer.write({"type": record_type, **deposit})
+                count += 1
+    return count
+
+
+USAGE = """\
+python ndjson_stream.py convert matched_pairs.json matched_pairs.ndjson
+python ndjson_stream.py tail matched_pairs.ndjson"""
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "convert":
+        count = convert_matched_pairs(sys.argv[2], sys.argv[3])
+        print(f"Converted {count} records into {sys.argv[3]}")
+    elif len(sys.argv) == 3 and sys.argv[1] == "tail":
+        for record in iter_ndjson(sys.argv[2], follow=True):
+            print(json.dumps(record))
+    else:
+        print(USAGE)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,16 @@
 import os
-import json
 import math
 import requests
-from datetime import datetime
+from decimal import Decimal
 from dotenv import load_dotenv
 from web3 import Web3
 from web3.middleware import geth_poa_middleware
 from eth_utils import to_checksum_address
 from solcx import compile_files
+from ndjson_stream import NDJSONWriter
+from pair_store import PairStore
+from pairs import WETH_USDC
+from signing_pipeline import SigningPipeline, transaction_hashes
 
 # Load environment variables
 load_dotenv()
@@ -72,41 +75,19 @@ print(f"Contract deployed at: {contract_address}")
 contract = w3.eth.contract(address=contract_address, abi=abi)
 account = w3.eth.accounts[0]
 
-# JSON Files for DB
-DATABASE_FILE = "deposits.json"
-MATCHED_OUTPUT_FILE = "matched_pairs.json"
+# Deposits live in the WETH/USDC shard of the pair store, shared with pair_matching
+# (an existing deposits.json is migrated into it on first use)
+pair_store = PairStore()
+MATCHED_OUTPUT_FILE = "matched_pairs.ndjson"
 
-# Initialize database with empty mappings
-def initialize_database():
-    if not os.path.exists(DATABASE_FILE):
-        with open(DATABASE_FILE, "w") as f:
-            json.dump({"weth_deposits": {}, "usdc_deposits": {}}, f, indent=4)
-
-# Store deposits in JSON
+# Store a deposit, amount in token units
 def store_deposit(token_type, address, amount):
-    timestamp = datetime.now().isoformat()
-    with open(DATABASE_FILE, "r") as f:
-        data = json.load(f)
+    side, token = ("base", WETH_USDC.base) if token_type == "WETH" else ("quote", WETH_USDC.quote)
+    pair_store.add_deposit(WETH_USDC, side, address, int(Decimal(str(amount)) * 10**token.decimals))
 
-    deposit = {"amount": float(amount), "timestamp": timestamp}
-    if token_type == "WETH":
-        data["weth_deposits"][address] = deposit
-    else:
-        data["usdc_deposits"][address] = deposit
-
-    with open(DATABASE_FILE, "w") as f:
-        json.dump(data, f, indent=4)
-
-# Retrieve sorted deposits from JSON
-def get_deposits(token_type):
-    with open(DATABASE_FILE, "r") as f:
-        data = json.load(f)
-    deposits = data["weth_deposits"] if token_type == "WETH" else data["usdc_deposits"]
-    # Convert to a list of deposits sorted by timestamp
-    return sorted(
-        [{"address": addr, **deposit} for addr, deposit in deposits.items()],
-        key=lambda x: x["timestamp"]
-    )
+# Retrieve deposits as compact, time-sorted DepositBooks (amounts in wei)
+def get_deposit_books():
+    return pair_store.load_books(WETH_USDC)
 
 # Fetch WETH price from CoinGecko
 def fetch_weth_price():
@@ -147,84 +128,83 @@ def calculate_liquidity(weth_amount=None, usdc_amount=None, price_lower=None, pr
         raise ValueError("Either weth_amount or usdc_amount must be provided")
 
 # Match liquidity deposits
-def match_liquidity():
-    """Matches WETH and USDC deposits for single-sided LP in Uniswap V3."""
+def match_liquidity(writer):
+    """Matches WETH and USDC deposits for single-sided LP in Uniswap V3; returns match and residual counts."""
     base_price = fetch_weth_price()
     price_lower, price_upper = get_price_range(base_price, percentage=0.1)
     print(f"Price range: {price_lower:.2f} - {price_upper:.2f} USDC/WETH")
 
-    weth_deposits = get_deposits("WETH")
-    usdc_deposits = get_deposits("USDC")
-    matched_pairs = []
-    unmatched_weth = []
-    unmatched_usdc = []
-
-    weth_index = 0
-    usdc_index = 0
-
-    while weth_index < len(weth_deposits) and usdc_index < len(usdc_deposits):
-        weth_dep = weth_deposits[weth_index]
-        usdc_dep = usdc_deposits[usdc_index]
-
-        weth_address, weth_amount = weth_dep["address"], float(weth_dep["amount"])
-        usdc_address, usdc_amount = usdc_dep["address"], float(usdc_dep["amount"])
-
-        # Calculate required USDC for the full WETH amount within the range
-        _, required_usdc = calculate_liquidity(weth_amount=weth_amount, price_lower=price_lower, price_upper=price_upper)
-        print(f"WETH {weth_address}: {weth_amount} needs {required_usdc:.2f} USDC, available: {usdc_amount}")
-
-        if usdc_amount >= required_usdc:
-            # Full WETH match: use all WETH and required USDC
-            matched_pairs.append({
-                "weth_address": weth_address,
-                "weth_amount": weth_amount,
-                "usdc_address": usdc_address,
-                "usdc_amount": required_usdc
-            })
-            remaining_usdc = usdc_amount - required_usdc
-            if remaining_usdc > 0:
-                unmatched_usdc.append({"address": usdc_address, "amount": remaining_usdc, "timestamp": usdc_dep["timestamp"]})
-            weth_index += 1
-            usdc_index += 1 if remaining_usdc == 0 else usdc_index
-        else:
-            # Partial match: use all available USDC and corresponding WETH
-            matched_weth, _ = calculate_liquidity(usdc_amount=usdc_amount, price_lower=price_lower, price_upper=price_upper)
-            matched_pairs.append({
+    matched_count = 0
+    round_weth_wei = round_usdc_wei = 0
+
+    # The shard stays locked from load to write-back, so a concurrent round or
+    # deposit never sees the deposits this round consumed.
+    with pair_store.lock(WETH_USDC):
+        weth_book, usdc_book = get_deposit_books()
+
+        # FIFO over both books; a partly used head deposit keeps its residual in place
+        # and is matched against the next deposit on the other side.
+        while len(weth_book) and len(usdc_book):
+            weth_address, weth_wei, _ = weth_book[0]
+            usdc_address, usdc_wei, _ = usdc_book[0]
+            weth_amount, usdc_amount = weth_wei / 10**18, usdc_wei / 10**6
+
+            # Calculate required USDC for the full WETH amount within the range
+            _, required_usdc = calculate_liquidity(weth_amount=weth_amount, price_lower=price_lower, price_upper=price_upper)
+            print(f"WETH {weth_address}: {weth_amount} needs {required_usdc:.2f} USDC, available: {usdc_amount}")
+
+            if usdc_amount >= required_usdc:
+                # Full WETH match: use all WETH and required USDC
+                matched_weth = weth_amount
+                used_weth_wei, used_usdc_wei = weth_wei, min(usdc_wei, int(required_usdc * 10**6))
+                matched_usdc = required_usdc
+            else:
+                # Partial match: use all available USDC and corresponding WETH
+                matched_weth, _ = calculate_liquidity(usdc_amount=usdc_amount, price_lower=price_lower, price_upper=price_upper)
+                used_weth_wei, used_usdc_wei = min(weth_wei, int(matched_weth * 10**18)), usdc_wei
+                matched_usdc = usdc_amount
+            writer.write({
+                "type": "match",
                 "weth_address": weth_address,
                 "weth_amount": matched_weth,
                 "usdc_address": usdc_address,
-                "usdc_amount": usdc_amount
+                "usdc_amount": matched_usdc
             })
-            remaining_weth = weth_amount - matched_weth
-            if remaining_weth > 0:
-                unmatched_weth.append({"address": weth_address, "amount": remaining_weth, "timestamp": weth_dep["timestamp"]})
-            usdc_index += 1
+            matched_count += 1
+            round_weth_wei += used_weth_wei
+            round_usdc_wei += used_usdc_wei
+            for book, amount_wei, used_wei in ((weth_book, weth_wei, used_weth_wei), (usdc_book, usdc_wei, used_usdc_wei)):
+                if used_wei >= amount_wei:
+                    book.consume(1)
+                else:
+                    book.set_amount(0, amount_wei - used_wei)
+
+        # Whatever is left in the books stays unmatched for the next round
+        for deposit in weth_book.iter_json():
+            writer.write({"type": "unmatched_weth", **deposit})
+        for deposit in usdc_book.iter_json():
+            writer.write({"type": "unmatched_usdc", **deposit})
+        writer.sync()
+
+        # Write the residual books back
+        pair_store.save_books(WETH_USDC, weth_book, usdc_book)
+
+    # Execute the round as one batched trigger for the wei this round took from the books
+    if matched_count:
+        trigger_liquidity_matching(round_usdc_wei, round_weth_wei)
+
+    return matched_count, len(weth_book), len(usdc_book)
+
+# Transaction Helpers
+signing_pipeline = SigningPipeline(w3, PRIVATE_KEY)
+
+def send_transactions(function_calls, gas=200000):
+    """Signs the calls across the signing pool and sends them in one batch; returns their hashes in nonce order."""
+    return transaction_hashes(signing_pipeline.submit(function_calls, gas=gas, gas_price=w3.to_wei("10", "gwei")))
 
-    # Add remaining unmatched deposits
-    unmatched_weth.extend(weth_deposits[weth_index:])
-    unmatched_usdc.extend(usdc_deposits[usdc_index:])
-
-    # Update the database with unmatched deposits
-    update_database(unmatched_weth, unmatched_usdc)
-
-    # Trigger contract for each match individually
-    for pair in matched_pairs:
-        trigger_liquidity_matching(pair["usdc_amount"], pair["weth_amount"])
-
-    return matched_pairs, unmatched_weth, unmatched_usdc
-
-# Transaction Helper
 def send_transaction(function_call):
     """Helper function to send transactions."""
-    txn = function_call.build_transaction({
-        "from": account,
-        "nonce": w3.eth.get_transaction_count(account),
-        "gas": 200000,
-        "gasPrice": w3.to_wei("10", "gwei"),
-    })
-    signed_txn = w3.eth.account.sign_transaction(txn, w3.eth.account.from_key(PRIVATE_KEY))
-    tx_hash = w3.eth.send_raw_transaction(signed_txn.rawTransaction)
-    return w3.to_hex(tx_hash)
+    return send_transactions([function_call])[0]
 
 # Deposit to Contract
 def deposit_to_contract(token_type, amount):
@@ -240,30 +220,13 @@ def trigger_liquidity_matching(amountUSDC, amountWETH):
     tx_hash = send_transaction(function_call)
     print(f"Triggered liquidity matching. Tx Hash: {tx_hash}")
 
-# Update Database
-def update_database(unmatched_weth, unmatched_usdc):
-    """Updates the database with unmatched deposits."""
-    with open(DATABASE_FILE, "r") as f:
-        data = json.load(f)
-
-    # Convert lists of unmatched deposits back to mappings
-    data["weth_deposits"] = {dep["address"]: {"amount": dep["amount"], "timestamp": dep["timestamp"]} for dep in unmatched_weth}
-    data["usdc_deposits"] = {dep["address"]: {"amount": dep["amount"], "timestamp": dep["timestamp"]} for dep in unmatched_usdc}
-
-    with open(DATABASE_FILE, "w") as f:
-        json.dump(data, f, indent=4)
-
-# Initialize Database and Run Simulation
-print("\n--- INITIALIZING DATABASE ---")
-initialize_database()
-
+# Run Simulation
 print("\n--- SIMULATING DEPOSITS ---")
 store_deposit("WETH", account, 0.5)
 store_deposit("USDC", account, 500)
 
 print("\n--- MATCHING DEPOSITS ---")
-matched_pairs, unmatched_weth, unmatched_usdc = match_liquidity()
-
-# Export matched pairs
-with open(MATCHED_OUTPUT_FILE, "w") as f:
-    json.dump(matched_pairs, f, indent=4)
\ No newline at end of file
+with NDJSONWriter(MATCHED_OUTPUT_FILE) as writer:
+    matched_count, unmatched_weth, unmatched_usdc = match_liquidity(writer)
+print(f"Streamed {matched_count} matched pairs to {MATCHED_OUTPUT_FILE}")
+print(f"Unmatched: {unmatched_weth} WETH / {unmatched_usdc} USDC deposits")
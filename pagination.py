@@ -0,0 +1,67 @@
+import base64
+import binascii
+import itertools
+import serialization
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+# Bytes gathered before a streamed response yields a chunk.
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def encode_cursor(position):
+    """Opaque URL-safe cursor for a position dict such as {"block": 12, "log": 3}."""
+    return base64.urlsafe_b64encode(serialization.dumps(position)).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor):
+    """Position dict of a cursor made by encode_cursor; None for no cursor."""
+    if not cursor:
+        return None
+    try:
+        position = serialization.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(position, dict):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return position
+
+
+def page_args(args, default_limit=DEFAULT_LIMIT, max_limit=MAX_LIMIT):
+    """(position, limit) from the ?cursor=&limit= query args; ValueError on bad input."""
+    try:
+        limit = int(args.get("limit", default_limit))
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    return decode_cursor(args.get("cursor")), min(limit, max_limit)
+
+
+def take_page(items, limit, position_of):
+    """Up to `limit` items of `items` (already behind the cursor) and the cursor of the next page."""
+    # One extra item is read to tell whether another page follows.
+    page = list(itertools.islice(items, limit + 1))
+    next_cursor = encode_cursor(position_of(page[limit - 1])) if len(page) > limit else None
+    return {"items": page[:limit], "next_cursor": next_cursor}
+
+
+def stream_json_array(items, chunk_size=STREAM_CHUNK_SIZE):
+    """Yields `items` as one JSON array in chunks of about `chunk_size` bytes, in constant memory."""
+    buffer = bytearray(b"[")
+    first = True
+    try:
+        for item in items:
+            if not first:
+                buffer += b","
+            buffer += serialization.dumps(item)
+            first = False
+            if len(buffer) >= chunk_size:
+                yield bytes(buffer)
+                buffer.clear()
+    except Exception as e:
+        # Headers are already sent; the client sees a truncated array.
+        print(f"WARNING: Streamed export aborted: {e}")
+        raise
+    buffer += b"]"
+    yield bytes(buffer)
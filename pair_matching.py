@@ -0,0 +1,173 @@
+import os
+import time
+import argparse
+from fractions import Fraction
+from concurrent.futures import ProcessPoolExecutor
+from ndjson_stream import NDJSONWriter
+from pair_store import PairStore
+from pairs import load_pairs, make_pair_price_source
+from metrics import PAIR_MATCHES, PAIR_QUEUE_DEPTH, PAIR_ROUND_DURATION
+
+MATCHED_DIR = os.getenv("MATCHED_DIR", "matched")
+
+
+def quote_per_base(price_lower, price_upper, base_decimals, quote_decimals):
+    """Quote wei per base wei over the range, as calculate_liquidity: sqrt(Pu) * sqrt(Pl) / (sqrt(Pu) - sqrt(Pl))."""
+    sqrt_lower, sqrt_upper = price_lower**0.5, price_upper**0.5
+    ratio = Fraction(sqrt_upper * sqrt_lower / (sqrt_upper - sqrt_lower))
+    return ratio * Fraction(10) ** (quote_decimals - base_decimals)
+
+
+def match_books(base, quote, ratio, writer=None):
+    """FIFO-matches two DepositBooks at `ratio` quote wei per base wei, leaving residuals in place."""
+    matches = []
+    while len(base) and len(quote):
+        base_address, base_amount, _ = base[0]
+        quote_address, quote_amount, _ = quote[0]
+        required_quote = base_amount * ratio.numerator // ratio.denominator
+        if quote_amount >= required_quote:
+            used_base, used_quote = base_amount, required_quote
+        else:
+            used_base, used_quote = quote_amount * ratio.denominator // ratio.numerator, quote_amount
+        match = {
+            "type": "match",
+            "base_address": base_address,
+            "base_amount_wei": used_base,
+            "quote_address": quote_address,
+            "quote_amount_wei": used_quote,
+        }
+        matches.append(match)
+        if writer is not None:
+            writer.write(match)
+        for book, amount, used in ((base, base_amount, used_base), (quote, quote_amount, used_quote)):
+            if used >= amount:
+                book.consume(1)
+            else:
+                book.set_amount(0, amount - used)
+    return matches
+
+
+#############################
+# Per-pair rounds (run in worker processes)
+#############################
+# Price sources live as long as their worker process so their caches survive between rounds.
+_price_sources = {}
+_w3 = None
+
+
+def _worker_w3():
+    global _w3
+    if _w3 is None:
+        # Same RPC_URLS, failover, cache and middleware as the API's w3.
+        from failover_provider import make_web3
+        from rpc_cache import make_rpc_cache
+
+        _w3 = make_web3(make_rpc_cache())
+    return _w3
+
+
+def _price_source(pair):
+    source = _price_sources.get(pair.name)
+    if source is None:
+        w3 = _worker_w3() if pair.price.get("source") == "pool" else None
+        source = _price_sources[pair.name] = make_pair_price_source(pair, w3)
+    return source
+
+
+def run_pair_round(pair_name, matched_dir=MATCHED_DIR):
+    """One matching round for `pair_name` under its shard lock; returns a summary for the parent's metrics."""
+    started = time.perf_counter()
+    pair = load_pairs()[pair_name]
+    store = PairStore()
+    price = _price_source(pair).get_price()
+    price_lower, price_upper = price * (1 - pair.range_pct), price * (1 + pair.range_pct)
+    ratio = quote_per_base(price_lower, price_upper, pair.base.decimals, pair.quote.decimals)
+    os.makedirs(matched_dir, exist_ok=True)
+    with store.lock(pair):
+        base, quote = store.load_books(pair)
+        with NDJSONWriter(os.path.join(matched_dir, f"{pair.slug}.ndjson")) as writer:
+            matches = match_books(base, quote, ratio, writer)
+        if matches:
+            store.save_books(pair, base, quote)
+    return {
+        "pair": pair.name,
+        "price": price,
+        "price_range": [price_lower, price_upper],
+        "matches": len(matches),
+        "matched_wei": {
+            "base": sum(m["base_amount_wei"] for m in matches),
+            "quote": sum(m["quote_amount_wei"] for m in matches),
+        },
+        "unmatched": {"base": len(base), "quote": len(quote)},
+        "duration": time.perf_counter() - started,
+    }
+
+
+# Shared by every run_rounds() call that brings no pool of its own, so worker
+# processes (and their price caches) outlive a single pass.
+_pool = None
+_pool_pid = None
+
+
+def round_pool(workers=None):
+    """The process pool rounds run on; created on first use, once per process."""
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        _pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+        _pool_pid = os.getpid()
+    return _pool
+
+
+def shutdown_round_pool():
+    global _pool
+    if _pool is not None and _pool_pid == os.getpid():
+        _pool.shutdown()
+    _pool = None
+
+
+def run_rounds(pair_names, pool=None, workers=None):
+    """Runs one round per pair, in parallel across `pool` (default: round_pool(workers))."""
+    if pool is None:
+        pool = round_pool(workers)
+    futures = {name: pool.submit(run_pair_round, name) for name in pair_names}
+    results = {}
+    for name, future in futures.items():
+        try:
+            results[name] = summary = future.result()
+        except Exception as e:
+            results[name] = {"pair": name, "error": str(e)}
+            print(f"WARNING: Matching round for {name} failed: {e}")
+            continue
+        PAIR_ROUND_DURATION.observe(summary["duration"], name)
+        PAIR_MATCHES.inc(summary["matches"], name)
+        for side, depth in summary["unmatched"].items():
+            PAIR_QUEUE_DEPTH.set(depth, name, side)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run one matching round for every listed token pair.")
+    parser.add_argument("pairs", nargs="*", help="Pair names such as WETH/USDC (default: all in PAIRS_FILE)")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    pair_names = args.pairs or list(load_pairs())
+    started = time.perf_counter()
+    try:
+        results = run_rounds(pair_names, workers=args.workers or min(len(pair_names), os.cpu_count() or 1))
+    finally:
+        shutdown_round_pool()
+    for name, summary in results.items():
+        if "error" in summary:
+            print(f"{name}: FAILED ({summary['error']})")
+        else:
+            print(
+                f"{name}: {summary['matches']} matches at {summary['price']:.4f}, "
+                f"unmatched {summary['unmatched']['base']} base / {summary['unmatched']['quote']} quote "
+                f"({summary['duration']:.2f}s)"
+            )
+    print(f"{len(pair_names)} pairs in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import os
+import time
+import fcntl
+from contextlib import contextmanager
+from deposit_book import AddressTable, DepositBook
+from serialization import read_json, write_json
+from pairs import WETH_USDC
+
+DEPOSITS_DIR = os.getenv("DEPOSITS_DIR", "deposits")
+# Migrated into the WETH/USDC shard when that is first opened, then left untouched.
+LEGACY_DATABASE_FILE = "deposits.json"
+
+
+class PairStore:
+    """Deposit store with one JSON shard and file lock per pair (e.g. deposits/WETH-USDC.json)."""
+
+    def __init__(self, directory=DEPOSITS_DIR, legacy_file=LEGACY_DATABASE_FILE):
+        self.directory = directory
+        self.legacy_file = legacy_file
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, pair):
+        return os.path.join(self.directory, f"{pair.slug}.json")
+
+    @contextmanager
+    def lock(self, pair):
+        """Exclusive lock on one pair's shard across processes."""
+        with open(self.path(pair) + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # -- shard I/O -------------------------------------------------------
+    def load_books(self, pair):
+        """(base_book, quote_book) for `pair`, sharing one address table, time-sorted."""
+        addresses = AddressTable()
+        base = DepositBook(pair.base.decimals, addresses)
+        quote = DepositBook(pair.quote.decimals, addresses)
+        path = self.path(pair)
+        if not os.path.exists(path):
+            if pair.name == WETH_USDC.name and os.path.exists(self.legacy_file):
+                return self._migrate_legacy(pair, addresses)
+            return base, quote
+        data = read_json(path, long_ints=True)
+        for book, key in ((base, "base_deposits"), (quote, "quote_deposits")):
+            for address, amount_wei, timestamp in data[key]:
+                book.append(address, amount_wei, timestamp)
+            book.sort()
+        return base, quote
+
+    def save_books(self, pair, base, quote):
+        """Writes the shard atomically: readers see the old or the new books, never a mix."""
+        data = {
+            "pair": pair.to_json(),
+            "base_deposits": [list(deposit) for deposit in base],
+            "quote_deposits": [list(deposit) for deposit in quote],
+        }
+        path = self.path(pair)
+        write_json(path + ".tmp", data, long_ints=True)
+        os.replace(path + ".tmp", path)
+
+    def _migrate_legacy(self, pair, addresses):
+        legacy = read_json(self.legacy_file)
+        base = DepositBook.from_json(legacy.get("weth_deposits", {}), pair.base.decimals, addresses)
+        quote = DepositBook.from_json(legacy.get("usdc_deposits", {}), pair.quote.decimals, addresses)
+        self.save_books(pair, base, quote)
+        print(f"INFO: Migrated {len(base) + len(quote)} deposits from {self.legacy_file} to {self.path(pair)}")
+        return base, quote
+
+    # -- writes ----------------------------------------------------------
+    def add_deposit(self, pair, side, address, amount_wei, timestamp=None):
+        """Appends a deposit to the "base" or "quote" book of `pair`."""
+        if side not in ("base", "quote"):
+            raise ValueError(f"side must be 'base' or 'quote', not {side!r}")
+        with self.lock(pair):
+            base, quote = self.load_books(pair)
+            book = base if side == "base" else quote
+            book.append(address, amount_wei, time.time() if timestamp is None else timestamp)
+            self.save_books(pair, base, quote)
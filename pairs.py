@@ -0,0 +1,90 @@
+import os
+from eth_utils import to_checksum_address
+from serialization import read_json
+from price_sources import CoinGeckoPriceSource, PoolPriceSource
+
+# JSON list of pair definitions; see TokenPair.from_json for the shape.
+PAIRS_FILE = os.getenv("PAIRS_FILE", "pairs.json")
+
+
+class Token:
+    def __init__(self, symbol, address, decimals):
+        self.symbol = symbol
+        self.address = to_checksum_address(address)
+        self.decimals = decimals
+
+    def to_json(self):
+        return {"symbol": self.symbol, "address": self.address, "decimals": self.decimals}
+
+
+class TokenPair:
+    """A matchable pair: `base` deposits are paired with `quote` deposits at the base price in quote units."""
+
+    def __init__(self, base, quote, fee=500, range_pct=0.1, price=None):
+        self.base = base
+        self.quote = quote
+        self.fee = fee
+        self.range_pct = range_pct
+        # The price source: {"source": "coingecko", "id", "vs"} or {"source": "pool", "pool": address}.
+        self.price = price or {"source": "coingecko", "id": base.symbol.lower(), "vs": "usd"}
+
+    @property
+    def name(self):
+        return f"{self.base.symbol}/{self.quote.symbol}"
+
+    @property
+    def slug(self):
+        """File-system safe name, e.g. WETH-USDC."""
+        return f"{self.base.symbol}-{self.quote.symbol}"
+
+    @classmethod
+    def from_json(cls, data):
+        """Builds a pair from {"base": {...}, "quote": {...}, "fee", "range_pct", "price": {...}}."""
+        return cls(
+            Token(**data["base"]),
+            Token(**data["quote"]),
+            fee=data.get("fee", 500),
+            range_pct=data.get("range_pct", 0.1),
+            price=data.get("price"),
+        )
+
+    def to_json(self):
+        return {
+            "base": self.base.to_json(),
+            "quote": self.quote.to_json(),
+            "fee": self.fee,
+            "range_pct": self.range_pct,
+            "price": self.price,
+        }
+
+
+# The pair LiquidityMatching is deployed for; always listed.
+WETH_USDC = TokenPair(
+    Token("WETH", "0x4200000000000000000000000000000000000006", 18),
+    Token("USDC", "0x078D782b760474a361dDA0AF3839290b0EF57AD6", 6),
+    price={"source": "coingecko", "id": "weth", "vs": "usd"},
+)
+
+
+def load_pairs(path=PAIRS_FILE):
+    """WETH/USDC plus every pair listed in `path` (when it exists), keyed by name."""
+    pairs = {WETH_USDC.name: WETH_USDC}
+    if os.path.exists(path):
+        for data in read_json(path):
+            pair = TokenPair.from_json(data)
+            pairs[pair.name] = pair
+    return pairs
+
+
+def make_pair_price_source(pair, w3=None):
+    """Price source for `pair`, returning the base price in quote units."""
+    kind = pair.price.get("source", "coingecko")
+    if kind == "coingecko":
+        return CoinGeckoPriceSource(
+            ttl=float(os.getenv("PRICE_CACHE_TTL", "10")),
+            coin_id=pair.price["id"],
+            vs_currency=pair.price.get("vs", "usd"),
+        )
+    if kind == "pool":
+        return PoolPriceSource(w3, pair.price["pool"], base_token=pair.base.address)
+    raise ValueError(f"Unknown price source for {pair.name}: {kind}")
@@ -0,0 +1,142 @@
+import os
+import time
+import threading
+from fractions import Fraction
+import requests
+from eth_utils import to_checksum_address
+from metrics import PRICE_CACHE, PRICE_FETCH_LATENCY
+
+WETH_ADDRESS = to_checksum_address("0x4200000000000000000000000000000000000006")
+USDC_ADDRESS = to_checksum_address("0x078D782b760474a361dDA0AF3839290b0EF57AD6")
+# Same factory and fee tier LiquidityMatching mints into.
+UNISWAP_V3_FACTORY = to_checksum_address("0x1F98400000000000000000000000000000000003")
+POOL_FEE = 500
+
+POOL_ABI = [
+    {
+        "inputs": [],
+        "name": "slot0",
+        "outputs": [
+            {"name": "sqrtPriceX96", "type": "uint160"},
+            {"name": "tick", "type": "int24"},
+            {"name": "observationIndex", "type": "uint16"},
+            {"name": "observationCardinality", "type": "uint16"},
+            {"name": "observationCardinalityNext", "type": "uint16"},
+            {"name": "feeProtocol", "type": "uint8"},
+            {"name": "unlocked", "type": "bool"},
+        ],
+        "stateMutability": "view",
+        "type": "function",
+    },
+    {"inputs": [], "name": "token0", "outputs": [{"name": "", "type": "address"}], "stateMutability": "view", "type": "function"},
+    {"inputs": [], "name": "token1", "outputs": [{"name": "", "type": "address"}], "stateMutability": "view", "type": "function"},
+]
+FACTORY_ABI = [
+    {
+        "inputs": [
+            {"name": "tokenA", "type": "address"},
+            {"name": "tokenB", "type": "address"},
+            {"name": "fee", "type": "uint24"},
+        ],
+        "name": "getPool",
+        "outputs": [{"name": "pool", "type": "address"}],
+        "stateMutability": "view",
+        "type": "function",
+    }
+]
+DECIMALS_ABI = [
+    {"inputs": [], "name": "decimals", "outputs": [{"name": "", "type": "uint8"}], "stateMutability": "view", "type": "function"}
+]
+
+
+def sqrt_price_x96_to_price(sqrt_price_x96, decimals0, decimals1):
+    """Exact token1-per-token0 price: (sqrtPriceX96 / 2**96)**2 * 10**(decimals0 - decimals1)."""
+    return Fraction(sqrt_price_x96 * sqrt_price_x96, 1 << 192) * Fraction(10) ** (decimals0 - decimals1)
+
+
+class CoinGeckoPriceSource:
+    """`coin_id` priced in `vs_currency` over HTTP (WETH/USD by default), reused for `ttl` seconds between fetches."""
+
+    name = "coingecko"
+    URL = "https://api.coingecko.com/api/v3/simple/price"
+
+    def __init__(self, ttl=10.0, coin_id="weth", vs_currency="usd"):
+        self.ttl = ttl
+        self.coin_id = coin_id
+        self.vs_currency = vs_currency
+        self._price = None
+        self._fetched_at = 0.0
+
+    def get_price(self):
+        now = time.monotonic()
+        if self._price is not None and now - self._fetched_at < self.ttl:
+            PRICE_CACHE.inc(1, self.name, "hit")
+            return self._price
+        PRICE_CACHE.inc(1, self.name, "miss")
+        with PRICE_FETCH_LATENCY.time(self.name):
+            response = requests.get(self.URL, params={"ids": self.coin_id, "vs_currencies": self.vs_currency})
+        if response.status_code != 200:
+            raise Exception(f"ERROR: Price fetch failed with status {response.status_code}")
+        self._price = response.json()[self.coin_id][self.vs_currency]
+        self._fetched_at = now
+        return self._price
+
+
+class PoolPriceSource:
+    """WETH price in USDC from the pool's slot0().sqrtPriceX96, cached per block."""
+
+    name = "pool"
+
+    def __init__(self, w3, pool_address, base_token=WETH_ADDRESS):
+        self.w3 = w3
+        self.pool = w3.eth.contract(address=to_checksum_address(pool_address), abi=POOL_ABI)
+        token0 = self.pool.functions.token0().call()
+        token1 = self.pool.functions.token1().call()
+        self.decimals0 = w3.eth.contract(address=token0, abi=DECIMALS_ABI).functions.decimals().call()
+        self.decimals1 = w3.eth.contract(address=token1, abi=DECIMALS_ABI).functions.decimals().call()
+        if to_checksum_address(base_token) not in (token0, token1):
+            raise ValueError(f"Pool {pool_address} does not contain {base_token}")
+        self.base_is_token0 = to_checksum_address(base_token) == token0
+        self._lock = threading.Lock()
+        self._block = None
+        self._price = None
+
+    def get_price_exact(self, block_number=None):
+        """Exact price as a Fraction at `block_number` (default: latest block)."""
+        if block_number is None:
+            block_number = self.w3.eth.block_number
+        with self._lock:
+            if block_number == self._block:
+                PRICE_CACHE.inc(1, self.name, "hit")
+                return self._price
+        PRICE_CACHE.inc(1, self.name, "miss")
+        with PRICE_FETCH_LATENCY.time(self.name):
+            sqrt_price_x96 = self.pool.functions.slot0().call(block_identifier=block_number)[0]
+        price = sqrt_price_x96_to_price(sqrt_price_x96, self.decimals0, self.decimals1)
+        if not self.base_is_token0:
+            price = 1 / price
+        with self._lock:
+            if self._block is None or block_number >= self._block:
+                self._block, self._price = block_number, price
+        return price
+
+    def get_price(self, block_number=None):
+        return float(self.get_price_exact(block_number))
+
+
+def resolve_pool_address(w3, token_a=WETH_ADDRESS, token_b=USDC_ADDRESS, fee=POOL_FEE):
+    factory = w3.eth.contract(address=UNISWAP_V3_FACTORY, abi=FACTORY_ABI)
+    pool = factory.functions.getPool(token_a, token_b, fee).call()
+    if int(pool, 16) == 0:
+        raise ValueError(f"No {fee} fee-tier pool for {token_a}/{token_b}")
+    return pool
+
+
+def make_price_source(w3):
+    """Price source chosen by PRICE_SOURCE: "coingecko" (default) or "pool" (POOL_ADDRESS or the factory's pool)."""
+    kind = os.getenv("PRICE_SOURCE", "coingecko")
+    if kind == "coingecko":
+        return CoinGeckoPriceSource(ttl=float(os.getenv("PRICE_CACHE_TTL", "10")))
+    if kind == "pool":
+        return PoolPriceSource(w3, os.getenv("POOL_ADDRESS") or resolve_pool_address(w3))
+    raise ValueError(f"Unknown PRICE_SOURCE: {kind}")
@@ -0,0 +1,129 @@
+import time
+import json
+import argparse
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from flask import g, request
+from ndjson_stream import NDJSONWriter, iter_ndjson
+
+
+def install_journal(app, path, fsync_every=50):
+    """Records every request handled by `app` as one JSONL line: start time, method, path, body, status, duration."""
+    writer = NDJSONWriter(path, fsync_every=fsync_every)
+    lock = threading.Lock()
+
+    @app.before_request
+    def _journal_start():
+        g.journal_started = time.time()
+        g.journal_perf = time.perf_counter()
+
+    @app.after_request
+    def _journal_record(response):
+        if "journal_perf" not in g:
+            return response
+        body = request.get_json(silent=True)
+        if body is None and request.content_length:
+            body = request.get_data(as_text=True)
+        entry = {
+            "ts": g.journal_started,
+            "method": request.method,
+            "path": request.full_path.rstrip("?"),
+            "body": body,
+            "status": response.status_code,
+            "duration_ms": (time.perf_counter() - g.journal_perf) * 1000,
+        }
+        with lock:
+            writer.write(entry)
+            # Flushed per request, so workers that exit via os._exit lose nothing.
+            writer.flush()
+        return response
+
+    return writer
+
+
+def load_journal(path):
+    """Journal entries sorted by start time; lines from other JSONL formats are skipped."""
+    entries = [e for e in iter_ndjson(path) if "method" in e and "path" in e]
+    entries.sort(key=lambda e: e["ts"])
+    return entries
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def replay(path, base_url, speed=1.0, workers=32):
+    """Replays a journal against `base_url` on its recorded schedule, gaps scaled by `speed` (None: no waiting)."""
+    entries = load_journal(path)
+    if not entries:
+        return {}
+    results = [None] * len(entries)
+    session = requests.Session()
+
+    def send(index, entry):
+        started = time.perf_counter()
+        status = error = None
+        try:
+            kwargs = {"json": entry["body"]} if isinstance(entry["body"], (dict, list)) else {"data": entry["body"]}
+            status = session.request(entry["method"], base_url + entry["path"], timeout=300, **kwargs).status_code
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        results[index] = (status, (time.perf_counter() - started) * 1000, error)
+
+    first_ts = entries[0]["ts"]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for index, entry in enumerate(entries):
+            if speed:
+                delay = start + (entry["ts"] - first_ts) / speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            pool.submit(send, index, entry)
+    elapsed = time.perf_counter() - start
+
+    routes = defaultdict(
+        lambda: {"recorded_ms": [], "replayed_ms": [], "requests": 0, "status_mismatches": 0, "errors": []}
+    )
+    for entry, (status, latency_ms, error) in zip(entries, results):
+        route = routes[f"{entry['method']} {entry['path'].split('?')[0]}"]
+        route["requests"] += 1
+        if error is not None:
+            route["errors"].append(error)
+        route["recorded_ms"].append(entry["duration_ms"])
+        route["replayed_ms"].append(latency_ms)
+        if status != entry["status"]:
+            route["status_mismatches"] += 1
+
+    summary = {"requests": len(entries), "elapsed_s": elapsed, "speed": speed or "max", "routes": {}}
+    for name, route in routes.items():
+        summary["routes"][name] = {
+            "requests": route["requests"],
+            "status_mismatches": route["status_mismatches"],
+            "errors": len(route["errors"]),
+            "first_error": route["errors"][0] if route["errors"] else None,
+            "recorded_p50_ms": _percentile(route["recorded_ms"], 50),
+            "replayed_p50_ms": _percentile(route["replayed_ms"], 50),
+            "recorded_p95_ms": _percentile(route["recorded_ms"], 95),
+            "replayed_p95_ms": _percentile(route["replayed_ms"], 95),
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded API request journal")
+    parser.add_argument("journal")
+    parser.add_argument("--base-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--speed", default="1", help="time scale such as 1 or 10, or 'max'")
+    parser.add_argument("--workers", type=int, default=32)
+    args = parser.parse_args()
+    speed = None if args.speed == "max" else float(args.speed)
+    print(json.dumps(replay(args.journal, args.base_url, speed, args.workers), indent=4))
+
+
+if __name__ == "__main__":
+    main()
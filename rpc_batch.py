@@ -0,0 +1,42 @@
+import itertools
+import requests
+
+# Hardhat and most providers accept a few thousand calls per batch; stay well below.
+DEFAULT_CHUNK_SIZE = 500
+
+_ids = itertools.count(1)
+
+
+class RPCBatchError(Exception):
+    """Raised when one or more calls in a JSON-RPC batch return an error."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(f"{len(errors)} batched RPC call(s) failed, first: {errors[0]}")
+
+
+def batch_request(w3, calls, chunk_size=DEFAULT_CHUNK_SIZE, timeout=60):
+    """Raw JSON-RPC responses for `calls` ([(method, params)]) sent as batches, in call order."""
+    # web3.py 6 has no batch API, so the batch is posted to the endpoint directly.
+    endpoint = w3.provider.endpoint_uri
+    responses = []
+    for start in range(0, len(calls), chunk_size):
+        chunk = calls[start : start + chunk_size]
+        payload = [
+            {"jsonrpc": "2.0", "id": next(_ids), "method": method, "params": params}
+            for method, params in chunk
+        ]
+        response = requests.post(endpoint, json=payload, timeout=timeout)
+        response.raise_for_status()
+        by_id = {item["id"]: item for item in response.json()}
+        responses.extend(by_id[request["id"]] for request in payload)
+    return responses
+
+
+def batch_results(w3, calls, chunk_size=DEFAULT_CHUNK_SIZE, timeout=60):
+    """Like batch_request but returns only results, raising RPCBatchError on any error."""
+    responses = batch_request(w3, calls, chunk_size, timeout)
+    errors = [r["error"] for r in responses if "error" in r]
+    if errors:
+        raise RPCBatchError(errors)
+    return [r["result"] for r in responses]
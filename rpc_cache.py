@@ -0,0 +1,237 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+import serialization
+
+# Local dev nodes reuse these chain IDs with a different history on every
+# restart (and rewrite it on evm_revert), so their entries stay in memory.
+DEV_CHAIN_IDS = frozenset({31337, 1337})
+# Dev nodes can rewrite the head block's state in place (hardhat_setStorageAt,
+# also through raw batches this middleware never sees), so only blocks below
+# it are treated as settled there.
+DEV_CONFIRMATIONS = 1
+# Depth below the head at which a block is treated as final on real networks.
+DEFAULT_CONFIRMATIONS = 64
+# Calls whose answer is fixed once their block parameter is.
+BLOCK_PINNED_METHODS = {
+    "eth_call": 1,
+    "eth_getCode": 1,
+    "eth_getBalance": 1,
+    "eth_getTransactionCount": 1,
+    "eth_getStorageAt": 2,
+}
+# Calls that rewrite chain history or state: everything cached may be stale after them.
+FLUSH_METHODS = frozenset({"evm_revert", "hardhat_reset", "anvil_reset", "anvil_revert"})
+# hardhat_setStorageAt, hardhat_setCode, evm_setNextBlockTimestamp, anvil_setBalance, ...
+FLUSH_PREFIXES = ("hardhat_set", "evm_set", "anvil_set")
+
+
+def _block_number(block):
+    """Block number of a hex quantity or an EIP-1898 {"blockNumber": ...}; None for tags and hashes."""
+    if isinstance(block, dict):
+        block = block.get("blockNumber")
+    if isinstance(block, str) and block.startswith("0x"):
+        return int(block, 16)
+    if isinstance(block, int) and not isinstance(block, bool):
+        return block
+    return None
+
+
+def _is_block_hash(block):
+    return isinstance(block, dict) and "blockHash" in block
+
+
+class ImmutableRPCCache:
+    """web3 middleware serving JSON-RPC calls whose result can never change from an LRU and optional SQLite file."""
+
+    def __init__(self, max_entries=10_000, path=None, confirmations=None, head_ttl=1.0):
+        self.max_entries = max_entries
+        self.path = path
+        self.confirmations = confirmations
+        self.head_ttl = head_ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._chain_id = None
+        self._head = None
+        self._head_checked_at = 0.0
+        self._genesis = None
+        self._history_checked_at = 0.0
+        if path is not None:
+            conn = self._connection()
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS rpc_cache (key TEXT PRIMARY KEY, response TEXT NOT NULL)")
+            conn.commit()
+
+    def _connection(self):
+        # sqlite3 connections must not be shared across threads.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=30)
+        return conn
+
+    @property
+    def persistent(self):
+        return self.path is not None and self._chain_id not in DEV_CHAIN_IDS
+
+    # -- chain state ----------------------------------------------------
+    def _resolve_chain_id(self, make_request):
+        if self._chain_id is None:
+            self._chain_id = int(make_request("eth_chainId", [])["result"], 16)
+            if self.confirmations is None:
+                self.confirmations = DEV_CONFIRMATIONS if self._chain_id in DEV_CHAIN_IDS else DEFAULT_CONFIRMATIONS
+        return self._chain_id
+
+    def _check_history(self, make_request):
+        """On dev chains, flushes when the head went backwards or the genesis hash changed; returns whether it did."""
+        now = time.monotonic()
+        if now - self._history_checked_at < self.head_ttl:
+            return False
+        self._history_checked_at = now
+        head = int(make_request("eth_blockNumber", [])["result"], 16)
+        genesis = make_request("eth_getBlockByNumber", ["0x0", False])["result"]["hash"]
+        rewritten = (self._head is not None and head < self._head) or (
+            self._genesis is not None and genesis != self._genesis
+        )
+        if rewritten:
+            self.flush()
+            print("INFO: RPC cache flushed: dev chain history was rewritten or the node restarted.")
+        self._genesis = genesis
+        self._head = head
+        self._head_checked_at = now
+        return rewritten
+
+    def _is_final(self, make_request, number):
+        """Whether block `number` is `confirmations` deep; reads the head at most every head_ttl seconds."""
+        if number is None:
+            return False
+        if self._head is None or (
+            number > self._head - self.confirmations and time.monotonic() - self._head_checked_at >= self.head_ttl
+        ):
+            self._head = int(make_request("eth_blockNumber", [])["result"], 16)
+            self._head_checked_at = time.monotonic()
+        return number <= self._head - self.confirmations
+
+    # -- classification -------------------------------------------------
+    def _cacheable_request(self, make_request, method, params):
+        """Whether the request may be served from the cache; receipts are decided again from the response."""
+        if method == "eth_getBlockByHash":
+            return True
+        if method == "eth_getBlockByNumber":
+            return self._is_final(make_request, _block_number(params[0]) if params else None)
+        if method in BLOCK_PINNED_METHODS:
+            index = BLOCK_PINNED_METHODS[method]
+            if len(params) <= index:
+                return False
+            block = params[index]
+            return _is_block_hash(block) or self._is_final(make_request, _block_number(block))
+        if method == "eth_getLogs":
+            query = params[0] if params else {}
+            if "blockHash" in query:
+                return True
+            from_block, to_block = _block_number(query.get("fromBlock")), _block_number(query.get("toBlock"))
+            return from_block is not None and self._is_final(make_request, to_block)
+        return method in ("eth_getTransactionReceipt", "eth_getTransactionByHash")
+
+    def _cacheable_response(self, make_request, method, response):
+        result = response.get("result")
+        if "error" in response or result is None:
+            return False
+        if method in ("eth_getTransactionReceipt", "eth_getTransactionByHash"):
+            # Pending transactions have no block yet.
+            return self._is_final(make_request, _block_number(result.get("blockNumber")))
+        return True
+
+    # -- storage --------------------------------------------------------
+    def _key(self, method, params):
+        canonical = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+        return f"{self._chain_id}:{method}:{canonical}"
+
+    def _get(self, key):
+        with self._lock:
+            response = self._entries.get(key)
+            if response is not None:
+                self._entries.move_to_end(key)
+                return response
+        if not self.persistent:
+            return None
+        row = self._connection().execute("SELECT response FROM rpc_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        response = serialization.loads(row[0], long_ints=False)
+        self._remember(key, response)
+        return response
+
+    def _remember(self, key, response):
+        with self._lock:
+            self._entries[key] = response
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _put(self, key, response):
+        self._remember(key, response)
+        if self.persistent:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO rpc_cache (key, response) VALUES (?, ?)",
+                (key, serialization.dumps(response).decode()),
+            )
+            conn.commit()
+
+    def flush(self):
+        """Drops the in-memory entries and forgets the chain ID and head."""
+        with self._lock:
+            self._entries.clear()
+        self._chain_id = None
+        self._head = None
+        self._genesis = None
+
+    # -- middleware -----------------------------------------------------
+    # Injected near the provider (see make_web3) so it sees raw responses.
+    def middleware(self, make_request, w3):
+        def cached(method, params):
+            if method in FLUSH_METHODS or method.startswith(FLUSH_PREFIXES):
+                response = make_request(method, params)
+                self.flush()
+                print(f"INFO: RPC cache flushed after {method}.")
+                return response
+            self._resolve_chain_id(make_request)
+            if self._chain_id in DEV_CHAIN_IDS and self._check_history(make_request):
+                self._resolve_chain_id(make_request)
+            if not self._cacheable_request(make_request, method, params):
+                return make_request(method, params)
+            key = self._key(method, params)
+            response = self._get(key)
+            if response is not None:
+                self.hits += 1
+                return dict(response)
+            self.misses += 1
+            response = make_request(method, params)
+            if self._cacheable_response(make_request, method, response):
+                self._put(key, {k: v for k, v in response.items() if k != "id"})
+            return response
+
+        return cached
+
+    def status(self):
+        return {
+            "chain_id": self._chain_id,
+            "entries": len(self._entries),
+            "persistent": self.persistent,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def make_rpc_cache():
+    """Cache configured from RPC_CACHE_SIZE and RPC_CACHE_DB (no on-disk store when unset)."""
+    return ImmutableRPCCache(
+        max_entries=int(os.getenv("RPC_CACHE_SIZE", "10000")),
+        path=os.getenv("RPC_CACHE_DB") or None,
+    )
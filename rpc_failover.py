@@ -0,0 +1,288 @@
+import os
+import time
+import itertools
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import requests
+import serialization
+
+# Sent to a single pinned endpoint and never duplicated: a hedged or retried
+# send could broadcast twice, and nonce and receipt reads must see the node
+# that accepted the transaction.
+PINNED_METHODS = frozenset(
+    {
+        "eth_sendRawTransaction",
+        "eth_sendTransaction",
+        "eth_sign",
+        "eth_signTransaction",
+        "eth_signTypedData_v4",
+        "eth_getTransactionCount",
+        "eth_getTransactionReceipt",
+    }
+)
+# Dev-node state changes (evm_mine, hardhat_impersonateAccount, ...) are pinned too.
+PINNED_PREFIXES = ("evm_", "hardhat_", "anvil_", "personal_")
+# Calls that change chain state. Every read is pinned for a while after one,
+# so it sees the write even if the other endpoints lag behind.
+WRITE_METHODS = frozenset({"eth_sendRawTransaction", "eth_sendTransaction"})
+
+_ids = itertools.count(1)
+
+
+class RPCTransportError(Exception):
+    """An endpoint did not answer: connection error, timeout, HTTP 429/5xx or an unreadable body."""
+
+
+class RPCUnavailable(Exception):
+    """Every endpoint failed or has its circuit open."""
+
+
+class Endpoint:
+    """One RPC URL with its recent latencies and a circuit breaker that lets one probe through after `cooldown`."""
+
+    def __init__(self, url, window=200, failure_threshold=3, cooldown=30.0):
+        self.url = url
+        self._session = None
+        self._session_pid = None
+        self.latencies = deque(maxlen=window)
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        # A forked child must not reuse the parent's pooled sockets.
+        with self._lock:
+            if self._session is None or self._session_pid != os.getpid():
+                self._session = requests.Session()
+                self._session_pid = os.getpid()
+            return self._session
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if self.probing or time.monotonic() - self.opened_at >= self.cooldown else "open"
+
+    def acquire(self):
+        """Whether a request may go out now; claims the probe slot of an open circuit."""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self.probing or time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            self.probing = True
+            return True
+
+    def record_success(self, latency):
+        with self._lock:
+            self.requests += 1
+            self.latencies.append(latency)
+            self.failures = 0
+            if self.opened_at is not None:
+                print(f"INFO: RPC endpoint {self.url} recovered; circuit closed.")
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.requests += 1
+            self.errors += 1
+            self.failures += 1
+            if self.probing or (self.opened_at is None and self.failures >= self.failure_threshold):
+                if self.opened_at is None:
+                    print(f"WARNING: RPC endpoint {self.url} failed {self.failures} times; circuit open.")
+                self.opened_at = time.monotonic()
+            self.probing = False
+
+    def quantile(self, q):
+        with self._lock:
+            latencies = sorted(self.latencies)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+    def status(self):
+        return {
+            "url": self.url,
+            "state": self.state,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "requests": self.requests,
+            "errors": self.errors,
+        }
+
+
+class FailoverRPC:
+    """JSON-RPC client over several endpoints of one chain: hedged reads, pinned writes."""
+
+    def __init__(
+        self,
+        urls,
+        timeout=10.0,
+        hedge_quantile=0.95,
+        min_hedge_delay=0.05,
+        max_hedge_delay=2.0,
+        min_samples=20,
+        failure_threshold=3,
+        cooldown=30.0,
+        max_workers=16,
+        read_your_writes=2.0,
+    ):
+        if not urls:
+            raise ValueError("FailoverRPC needs at least one endpoint URL")
+        self.endpoints = [Endpoint(url, failure_threshold=failure_threshold, cooldown=cooldown) for url in urls]
+        self.timeout = timeout
+        self.hedge_quantile = hedge_quantile
+        self.min_hedge_delay = min_hedge_delay
+        self.max_hedge_delay = max_hedge_delay
+        self.min_samples = min_samples
+        self.max_workers = max_workers
+        self.read_your_writes = read_your_writes
+        self.hedges = 0
+        self.failovers = 0
+        self._pinned = self.endpoints[0]
+        self._pinned_reads_until = 0.0
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pool_pid = None
+
+    def _executor(self):
+        # Created on first use and again in a forked child: the parent's
+        # worker threads do not exist there, so its pool would never run anything.
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="rpc-failover")
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    # -- endpoint selection ---------------------------------------------
+    def _ranked(self):
+        """Endpoints not known to be down, fastest first; ones without samples yet rank first so they get measured."""
+        usable = [endpoint for endpoint in self.endpoints if endpoint.state != "open"]
+        return sorted(usable, key=lambda endpoint: endpoint.quantile(0.5) or 0.0)
+
+    def _hedge_delay(self, endpoint):
+        if len(endpoint.latencies) < self.min_samples:
+            return self.max_hedge_delay
+        return min(self.max_hedge_delay, max(self.min_hedge_delay, endpoint.quantile(self.hedge_quantile)))
+
+    def pinned_endpoint(self):
+        """The endpoint writes go to; moves to the fastest healthy one once its circuit opens."""
+        with self._lock:
+            if self._pinned.state != "closed":
+                candidates = [endpoint for endpoint in self.endpoints if endpoint.state == "closed"]
+                if candidates:
+                    previous = self._pinned
+                    self._pinned = min(candidates, key=lambda endpoint: endpoint.quantile(0.5) or 0.0)
+                    print(f"WARNING: Write endpoint moved from {previous.url} to {self._pinned.url}.")
+            return self._pinned
+
+    @staticmethod
+    def is_pinned(method):
+        return method in PINNED_METHODS or method.startswith(PINNED_PREFIXES)
+
+    @staticmethod
+    def is_write(method):
+        return method in WRITE_METHODS or method.startswith(PINNED_PREFIXES)
+
+    # -- transport ------------------------------------------------------
+    def _post(self, endpoint, body):
+        started = time.perf_counter()
+        try:
+            response = endpoint.session.post(
+                endpoint.url, data=body, headers={"Content-Type": "application/json"}, timeout=self.timeout
+            )
+            if response.status_code == 429 or response.status_code >= 500:
+                raise RPCTransportError(f"{endpoint.url} answered HTTP {response.status_code}")
+            response.raise_for_status()
+            # JSON-RPC errors (reverts, bad params) are answers; only transport failures count.
+            result = serialization.loads(response.content, long_ints=False)
+        except Exception as e:
+            endpoint.record_failure()
+            if isinstance(e, RPCTransportError):
+                raise
+            raise RPCTransportError(f"{endpoint.url}: {e}") from e
+        endpoint.record_success(time.perf_counter() - started)
+        return result
+
+    def request(self, method, params):
+        """Sends one JSON-RPC call and returns the response dict ({"result": ...} or {"error": ...})."""
+        body = serialization.dumps({"jsonrpc": "2.0", "id": next(_ids), "method": method, "params": params})
+        # Writes go to the pinned endpoint without hedging or retries elsewhere, and for
+        # `read_your_writes` seconds after a send reads follow, so they see the transaction.
+        if self.is_pinned(method) or time.monotonic() < self._pinned_reads_until:
+            endpoint = self.pinned_endpoint()
+            if not endpoint.acquire():
+                raise RPCUnavailable(f"Write endpoint {endpoint.url} is unavailable (circuit open)")
+            try:
+                return self._post(endpoint, body)
+            finally:
+                if self.is_write(method):
+                    self._pinned_reads_until = time.monotonic() + self.read_your_writes
+        return self._hedged(body)
+
+    def _hedged(self, body):
+        candidates = self._ranked()
+        pool = self._executor()
+        pending = {}
+        errors = []
+        hedged = False
+
+        def launch():
+            while candidates:
+                endpoint = candidates.pop(0)
+                if endpoint.acquire():
+                    pending[pool.submit(self._post, endpoint, body)] = endpoint
+                    return endpoint
+            return None
+
+        primary = launch()
+        if primary is None:
+            raise RPCUnavailable("No RPC endpoint available; every circuit is open")
+        delay = self._hedge_delay(primary)
+        while pending:
+            done, _ = wait(pending, timeout=delay if not hedged and candidates else None, return_when=FIRST_COMPLETED)
+            if not done:
+                # The primary is slower than its p95: race a duplicate on the next endpoint.
+                hedged = True
+                self.hedges += 1
+                launch()
+                continue
+            for future in done:
+                endpoint = pending.pop(future)
+                try:
+                    return future.result()
+                except RPCTransportError as e:
+                    errors.append(str(e))
+            # A failed endpoint is replaced by the next one straight away.
+            if launch() is not None:
+                self.failovers += 1
+        raise RPCUnavailable(f"All RPC endpoints failed: {'; '.join(errors)}")
+
+    def status(self):
+        return {
+            "pinned": self._pinned.url,
+            "hedges": self.hedges,
+            "failovers": self.failovers,
+            "endpoints": [endpoint.status() for endpoint in self.endpoints],
+        }
+
+    def close(self):
+        if self._pool is not None and self._pool_pid == os.getpid():
+            self._pool.shutdown(wait=False)
+        self._pool = None
+        for endpoint in self.endpoints:
+            endpoint.close()
@@ -0,0 +1,121 @@
+import os
+import sys
+import json
+import time
+import atexit
+import signal
+import threading
+from collections import Counter, defaultdict
+
+# Frames from these paths are library internals; the reported site is the
+# first frame outside them.
+_LIBRARY_MARKERS = ("site-packages", "dist-packages", os.sep + "lib" + os.sep + "python", __file__)
+
+
+def _calling_site():
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if not any(marker in filename for marker in _LIBRARY_MARKERS):
+            return f"{os.path.basename(filename)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "<unknown>"
+
+
+def _percentile(sorted_values, pct):
+    return sorted_values[min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))]
+
+
+class RPCProfiler:
+    """Per-method call counts, latencies, payload sizes and call sites of JSON-RPC traffic."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.request_bytes = Counter()
+        self.response_bytes = Counter()
+        self.sites = defaultdict(Counter)
+
+    def middleware(self, make_request, w3):
+        def profiled(method, params):
+            site = _calling_site()
+            start = time.perf_counter()
+            response = make_request(method, params)
+            elapsed = time.perf_counter() - start
+            request_size = len(json.dumps(params, default=str))
+            response_size = len(json.dumps(response, default=str))
+            with self._lock:
+                self.latencies[method].append(elapsed)
+                self.request_bytes[method] += request_size
+                self.response_bytes[method] += response_size
+                self.sites[method][site] += 1
+            return response
+
+        return profiled
+
+    def reset(self):
+        with self._lock:
+            self.latencies.clear()
+            self.request_bytes.clear()
+            self.response_bytes.clear()
+            self.sites.clear()
+
+    def total_calls(self):
+        with self._lock:
+            return sum(len(values) for values in self.latencies.values())
+
+    def summary(self):
+        """Per-method statistics sorted by total time spent, heaviest first."""
+        with self._lock:
+            rows = []
+            for method, values in self.latencies.items():
+                ordered = sorted(values)
+                rows.append(
+                    {
+                        "method": method,
+                        "calls": len(ordered),
+                        "total_ms": sum(ordered) * 1000,
+                        "p50_ms": _percentile(ordered, 50) * 1000,
+                        "p95_ms": _percentile(ordered, 95) * 1000,
+                        "max_ms": ordered[-1] * 1000,
+                        "request_bytes": self.request_bytes[method],
+                        "response_bytes": self.response_bytes[method],
+                        "top_sites": self.sites[method].most_common(5),
+                    }
+                )
+        rows.sort(key=lambda row: row["total_ms"], reverse=True)
+        return rows
+
+    def report(self):
+        """Human-readable table of summary()."""
+        lines = [
+            f"{'method':<32} {'calls':>7} {'total ms':>10} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'req B':>9} {'resp B':>10}"
+        ]
+        for row in self.summary():
+            lines.append(
+                f"{row['method']:<32} {row['calls']:>7} {row['total_ms']:>10.1f} {row['p50_ms']:>8.2f} "
+                f"{row['p95_ms']:>8.2f} {row['max_ms']:>8.2f} {row['request_bytes']:>9} {row['response_bytes']:>10}"
+            )
+            for site, count in row["top_sites"]:
+                lines.append(f"    {count:>7}x {site}")
+        return "\n".join(lines)
+
+    def dump(self, path=None):
+        """Prints the report, and writes summary() as JSON when `path` is given."""
+        print("\n========== RPC PROFILE ==========")
+        print(self.report())
+        print("=================================\n")
+        if path:
+            with open(path, "w") as f:
+                json.dump(self.summary(), f, indent=4)
+
+
+def install_profiler(w3, dump_at_exit=True, path=None, dump_signal=getattr(signal, "SIGUSR1", None)):
+    """Installs a profiler innermost on `w3`; the report is dumped at exit and on SIGUSR1."""
+    profiler = RPCProfiler()
+    w3.middleware_onion.inject(profiler.middleware, name="rpc_profiler", layer=0)
+    if dump_at_exit:
+        atexit.register(profiler.dump, path)
+    if dump_signal is not None and threading.current_thread() is threading.main_thread():
+        signal.signal(dump_signal, lambda signum, frame: profiler.dump(path))
+    return profiler
@@ -0,0 +1,80 @@
+import json
+from decimal import Decimal
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+# orjson is used for compact output when installed. It writes equivalent JSON
+# but not the stdlib's bytes (raw UTF-8 instead of \u escapes, 1e16 instead of
+# 1e+16), and it only indents by 2, so pretty output always comes from the
+# stdlib. orjson rejects integers beyond 64 bits when encoding and parses them
+# as floats, and WETH amounts in wei routinely are that large: payloads that
+# may hold one go through the stdlib. Callers that know their payload pass
+# long_ints=True (deposit books) or False (JSON-RPC, where quantities are hex
+# strings); otherwise it is scanned for a number token of 19+ digits, by
+# mapping digits to "0" and value delimiters to "d" and searching once for
+# "d" + 19 zeros. Digit runs inside strings such as hex addresses follow a
+# letter or quote and do not match.
+_SCAN_TABLE = bytes(
+    ord("0") if 48 <= c <= 57 else ord("d") if c in b":[, \t\r\n-" else ord("x")
+    for c in range(256)
+)
+_LONG_INTEGER = b"d" + b"0" * 19
+
+
+def _has_long_integer(raw):
+    return _LONG_INTEGER in b"d" + raw.translate(_SCAN_TABLE)
+
+
+def _default(obj):
+    if isinstance(obj, Decimal):
+        # Strings keep every digit of a Decimal wei or price value.
+        return str(obj)
+    if isinstance(obj, (bytes, bytearray)):
+        # HexBytes tx hashes, topics and return data.
+        return "0x" + bytes(obj).hex()
+    if type(obj).__name__ in ("AttributeDict", "ReadableAttributeDict"):
+        # web3 keeps the fields in __dict__, so event args encode without a dict() copy.
+        return vars(obj)
+    if isinstance(obj, (set, tuple)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _stdlib_dumps(obj, pretty):
+    if pretty:
+        return json.dumps(obj, default=_default, indent=4).encode()
+    return json.dumps(obj, default=_default, separators=(",", ":")).encode()
+
+
+def dumps(obj, pretty=False, long_ints=None):
+    """Encodes `obj` to UTF-8 JSON bytes; integers of any size stay exact."""
+    if orjson is not None and not pretty and not long_ints:
+        try:
+            return orjson.dumps(obj, default=_default)
+        except orjson.JSONEncodeError:
+            pass
+    return _stdlib_dumps(obj, pretty)
+
+
+def loads(data, long_ints=None):
+    """Decodes JSON from bytes or str; integers of any size come back exact."""
+    if orjson is not None and not long_ints:
+        raw = data.encode() if isinstance(data, str) else data
+        if long_ints is False or not _has_long_integer(raw):
+            return orjson.loads(raw)
+    return json.loads(data)
+
+
+def write_json(path, obj, pretty=False, long_ints=None):
+    with open(path, "wb") as f:
+        f.write(dumps(obj, pretty, long_ints))
+
+
+def read_json(path, long_ints=None):
+    with open(path, "rb") as f:
+        return loads(f.read(), long_ints)
@@ -0,0 +1,218 @@
+import os
+import time
+import argparse
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from eth_account import Account
+from rpc_batch import RPCBatchError, batch_request
+
+# Below this many transactions the pool's pickling overhead outweighs the parallel signing.
+MIN_PARALLEL = 64
+DEFAULT_CHUNK_SIZE = 250
+
+
+#############################
+# Signing (runs in worker processes)
+#############################
+# Each worker parses the key once, in the pool initializer; tasks carry only transactions.
+_worker_account = None
+
+
+def _init_worker(private_key):
+    global _worker_account
+    _worker_account = Account.from_key(private_key)
+
+
+def _sign_all(account, transactions):
+    signed = []
+    for tx in transactions:
+        result = account.sign_transaction(tx)
+        signed.append((tx["nonce"], "0x" + bytes(result.rawTransaction).hex(), "0x" + bytes(result.hash).hex()))
+    return signed
+
+
+def sign_chunk(transactions):
+    """[(nonce, raw_tx_hex, tx_hash_hex)] for fully populated unsigned transactions, signed with the worker's key."""
+    return _sign_all(_worker_account, transactions)
+
+
+def make_signing_pool(private_key, workers=None):
+    """Process pool for sign_chunk whose workers load `private_key` once, at start-up."""
+    return ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count() or 1, initializer=_init_worker, initargs=(private_key,)
+    )
+
+
+class SendResult(namedtuple("SendResult", ["nonce", "transaction_hash", "error"])):
+    """Outcome of one eth_sendRawTransaction in a batch; `error` is the JSON-RPC error or None."""
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def transaction_hashes(results):
+    """Hashes of `results` in nonce order; raises RPCBatchError listing the failed sends if any failed."""
+    errors = [{"nonce": result.nonce, **result.error} for result in results if not result.ok]
+    if errors:
+        raise RPCBatchError(errors)
+    return [result.transaction_hash for result in results]
+
+
+class SigningPipeline:
+    """Bulk sender for one private key: prepare() builds, sign() signs across a process pool, send() batches."""
+
+    def __init__(self, w3, private_key, pool=None, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, nonces=None):
+        self.w3 = w3
+        self.private_key = private_key
+        self._account = Account.from_key(private_key)
+        self.address = self._account.address
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        # A NonceTracker-like reserve(address, count) when other senders share the account.
+        self.nonces = nonces
+        # Must come from make_signing_pool() with the same key.
+        self._pool = pool
+        self._own_pool = pool is None
+        self._chain_id = None
+
+    @property
+    def chain_id(self):
+        if self._chain_id is None:
+            self._chain_id = self.w3.eth.chain_id
+        return self._chain_id
+
+    def _reserve(self, count):
+        if self.nonces is not None:
+            return self.nonces.reserve(self.address, count)
+        return self.w3.eth.get_transaction_count(self.address, "pending")
+
+    def prepare(self, calls, gas, gas_price=None):
+        """Unsigned transactions for `calls` (contract calls or dicts) with consecutive nonces; `gas` is one limit or a list."""
+        gas_limits = gas if isinstance(gas, (list, tuple)) else [gas] * len(calls)
+        if gas_price is None:
+            gas_price = self.w3.eth.gas_price
+        first_nonce = self._reserve(len(calls))
+        transactions = []
+        for offset, (call, gas_limit) in enumerate(zip(calls, gas_limits)):
+            fields = {
+                "from": self.address,
+                "nonce": first_nonce + offset,
+                "gas": gas_limit,
+                "gasPrice": gas_price,
+                "chainId": self.chain_id,
+            }
+            if isinstance(call, dict):
+                transactions.append({**call, **fields})
+            else:
+                transactions.append(call.build_transaction(fields))
+        return transactions
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = make_signing_pool(self.private_key, self.workers)
+        return self._pool
+
+    def sign(self, transactions):
+        """[(nonce, raw_tx_hex, tx_hash_hex)] in nonce order, signed across the pool for large batches."""
+        if len(transactions) < MIN_PARALLEL or self.workers == 1:
+            signed = _sign_all(self._account, transactions)
+        else:
+            # secp256k1 signing and RLP encoding are CPU-bound, so one process signs on one core.
+            # Enough chunks to keep every worker busy, none larger than chunk_size.
+            size = max(1, min(self.chunk_size, -(-len(transactions) // self.workers)))
+            chunks = [transactions[i : i + size] for i in range(0, len(transactions), size)]
+            signed = []
+            for part in self._get_pool().map(sign_chunk, chunks):
+                signed.extend(part)
+        signed.sort(key=lambda item: item[0])
+        return signed
+
+    def send(self, signed):
+        """Submits signed transactions in nonce order in one JSON-RPC batch; returns a SendResult per transaction."""
+        # A rejected send does not hide the accepted ones; those behind it wait in the node's queue.
+        responses = batch_request(self.w3, [("eth_sendRawTransaction", [raw_tx]) for _, raw_tx, _ in signed])
+        return [
+            SendResult(nonce, None if "error" in response else response.get("result", tx_hash), response.get("error"))
+            for (nonce, _, tx_hash), response in zip(signed, responses)
+        ]
+
+    def submit(self, calls, gas, gas_price=None):
+        """prepare(), sign() and send() in one go; returns a SendResult per call, in nonce order."""
+        transactions = self.prepare(calls, gas, gas_price)
+        try:
+            results = self.send(self.sign(transactions))
+        except Exception:
+            # The batch never got an answer: any of its nonces may be missing.
+            self._resync(transactions[0]["nonce"] if transactions else None, len(transactions), transactions)
+            raise
+        failed = [result.nonce for result in results if not result.ok]
+        if failed:
+            # Only the nonces from the first rejected one on can be gaps.
+            self._resync(failed[0], results[-1].nonce + 1 - failed[0], transactions)
+        return results
+
+    def _resync(self, nonce, count, transactions):
+        if nonce is None or self.nonces is None or not hasattr(self.nonces, "resync"):
+            return
+        gaps = self.nonces.resync(self.address, nonce, count)
+        if gaps:
+            # Newer reservations own the nonces above: spend the missing ones on
+            # zero-value transfers to self so those are not stuck behind them.
+            fillers = [
+                {
+                    "from": self.address,
+                    "to": self.address,
+                    "value": 0,
+                    "nonce": gap,
+                    "gas": 21_000,
+                    "gasPrice": transactions[0]["gasPrice"],
+                    "chainId": self.chain_id,
+                }
+                for gap in gaps
+            ]
+            try:
+                results = self.send(self.sign(fillers))
+            except Exception as e:
+                print(f"WARNING: Could not fill nonces {gaps} of {self.address}: {e}")
+                return
+            for result in results:
+                if not result.ok:
+                    print(f"WARNING: Could not fill nonce {result.nonce} of {self.address}: {result.error}")
+
+    def close(self):
+        if self._own_pool and self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def main():
+    """Signing throughput by worker count, on synthetic transfers; needs no node."""
+    parser = argparse.ArgumentParser(description="Measure SigningPipeline signing throughput per worker count.")
+    parser.add_argument("--count", type=int, default=5_000)
+    parser.add_argument("--workers", default="1,2,4,8", help="Comma-separated worker counts")
+    args = parser.parse_args()
+
+    private_key = "0x" + os.urandom(32).hex()
+    to = Account.create().address
+    transactions = [
+        {"to": to, "value": i, "nonce": i, "gas": 21_000, "gasPrice": 10**10, "chainId": 31337}
+        for i in range(args.count)
+    ]
+    for workers in (int(w) for w in args.workers.split(",")):
+        with SigningPipeline(None, private_key, workers=workers) as pipeline:
+            pipeline.sign(transactions[: MIN_PARALLEL * workers])  # start the workers
+            started = time.perf_counter()
+            signed = pipeline.sign(transactions)
+            elapsed = time.perf_counter() - started
+        print(f"{workers:>3} worker(s): {len(signed) / elapsed:>10.0f} tx/s ({elapsed:.2f}s for {len(signed)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import pytest
+
+from deposit_book import AddressTable, DepositBook
+
+
+def make_book(count, decimals=18):
+    book = DepositBook(decimals)
+    for i in range(count):
+        book.append(f"0x{i:040x}", (i + 1) * 10**decimals, 1_700_000_000 + i)
+    return book
+
+
+def test_amounts_above_64_bits_stay_exact():
+    book = DepositBook(18)
+    book.append("0xa", 2**64 + 12345, 1.0)
+    book.append("0xb", 3 * 2**70, 2.0)
+    assert [amount for _, amount, _ in book] == [2**64 + 12345, 3 * 2**70]
+    assert book.total() == 2**64 + 12345 + 3 * 2**70
+
+
+def test_consume_and_compact_keep_fifo_order():
+    book = make_book(10)
+    book.consume(3)
+    assert book[0][1] == 4 * 10**18
+    book.consume(3)  # past half: compacts
+    assert book._head == 0
+    assert [amount // 10**18 for _, amount, _ in book] == [7, 8, 9, 10]
+    with pytest.raises(ValueError):
+        book.consume(5)
+
+
+def test_slice_reads_without_copying():
+    book = make_book(10)
+    window = book[6:9]
+    assert len(window) == 3
+    assert [amount // 10**18 for _, amount, _ in window] == [7, 8, 9]
+    assert window.total() == 24 * 10**18
+
+
+@pytest.mark.parametrize("mutate", [lambda b: b.consume(6), lambda b: b.consume(1)])
+def test_slice_is_invalidated_by_consume(mutate):
+    book = make_book(10)
+    window = book[6:9]
+    mutate(book)
+    with pytest.raises(RuntimeError):
+        list(window)
+    with pytest.raises(RuntimeError):
+        window.total()
+
+
+def test_slice_is_invalidated_by_sort():
+    book = make_book(5)
+    book.append("0xlate", 1, 1_600_000_000)
+    window = book[0:2]
+    book.sort()
+    assert book[0][0] == "0xlate"
+    with pytest.raises(RuntimeError):
+        len(window)
+
+
+def test_slice_is_invalidated_by_set_amount():
+    book = make_book(3)
+    window = book[0:2]
+    book.set_amount(0, 5)
+    with pytest.raises(RuntimeError):
+        window.total()
+    assert [amount for _, amount, _ in book[0:2]] == [5, 2 * 10**18]
+
+
+def test_json_round_trip_shares_addresses():
+    addresses = AddressTable()
+    weth = DepositBook.from_json(
+        {
+            "0xb": {"amount": 0.25, "timestamp": "2024-01-01T00:00:02"},
+            "0xa": {"amount": 1.5, "timestamp": "2024-01-01T00:00:01"},
+        },
+        18,
+        addresses,
+    )
+    usdc = DepositBook.from_json([{"address": "0xa", "amount": 500, "timestamp": "2024-01-01T00:00:03"}], 6, addresses)
+    assert [address for address, _, _ in weth] == ["0xa", "0xb"]
+    assert weth[0][1] == 15 * 10**17
+    assert len(addresses) == 2
+    assert usdc.to_json() == [{"address": "0xa", "amount": 500.0, "timestamp": "2024-01-01T00:00:03"}]
@@ -0,0 +1,71 @@
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("eth_utils")
+pytest.importorskip("requests")
+
+from event_feed import EventFeed
+
+
+class FakeEth:
+    """Node with one log per block, for a contract without event ABIs."""
+
+    def __init__(self, head):
+        self.block_number = head
+        self.ranges = []
+
+    def get_logs(self, params):
+        self.ranges.append((params["fromBlock"], params["toBlock"]))
+        return [{"blockNumber": n} for n in range(params["fromBlock"], params["toBlock"] + 1)]
+
+
+def make_feed(eth, from_block=1):
+    feed = EventFeed(SimpleNamespace(eth=eth), SimpleNamespace(abi=[], address="0xfeed"), from_block=from_block)
+    feed._decode = lambda logs: [
+        {"event": SimpleNamespace(blockNumber=log["blockNumber"], logIndex=0), "timestamp": 0} for log in logs
+    ]
+    return feed
+
+
+class Recorder:
+    def __init__(self, fail_times=0):
+        self.blocks = []
+        self.fail_times = fail_times
+
+    def __call__(self, events, head):
+        if self.fail_times:
+            self.fail_times -= 1
+            raise RuntimeError("subscriber down")
+        self.blocks.extend(item["event"].blockNumber for item in events)
+
+
+def test_failing_subscriber_does_not_starve_the_others():
+    eth = FakeEth(head=3)
+    feed = make_feed(eth)
+    healthy, flaky = Recorder(), Recorder(fail_times=1)
+    feed.subscribe(healthy)
+    feed.subscribe(flaky)
+
+    feed.poll()
+    assert healthy.blocks == [1, 2, 3]
+    assert flaky.blocks == []
+    assert feed.next_block == 1
+
+    eth.block_number = 5
+    feed.poll()
+    assert healthy.blocks == [1, 2, 3, 4, 5]
+    assert flaky.blocks == [1, 2, 3, 4, 5]
+    assert feed.next_block == 6
+
+
+def test_poll_reads_only_new_blocks_once_everyone_caught_up():
+    eth = FakeEth(head=2)
+    feed = make_feed(eth)
+    recorder = Recorder()
+    feed.subscribe(recorder)
+    feed.poll()
+    assert feed.poll() == []
+    eth.block_number = 4
+    feed.poll()
+    assert eth.ranges == [(1, 2), (3, 4)]
+    assert recorder.blocks == [1, 2, 3, 4]
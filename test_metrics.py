@@ -0,0 +1,55 @@
+import json
+import pytest
+
+pytest.importorskip("flask")
+
+import metrics
+from metrics import Counter, Gauge, Histogram
+
+# No process has this pid (above the Linux pid_max limit).
+DEAD_PID = 2**23
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_DIR", str(tmp_path))
+    monkeypatch.setattr(metrics, "REGISTRY", [])
+    return tmp_path
+
+
+def exited_worker(directory, series):
+    (directory / f"{DEAD_PID}.json").write_text(json.dumps(series))
+
+
+def test_series_are_merged_across_processes(registry):
+    matches = Counter("matches_total", "Matches.", ["pair"])
+    queued = Gauge("queued", "In flight.")
+    depth = Gauge("depth", "Queue depth.", multiprocess_mode="latest")
+    latency = Histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    matches.inc(2, "A")
+    queued.inc(1)
+    depth.set(4)
+    latency.observe(0.05)
+    exited_worker(
+        registry,
+        {
+            "matches_total": [[["A"], 3]],
+            "queued": [[[], [5, 0.0]]],
+            "depth": [[[], [9, 0.0]]],
+            "latency_seconds": [[[], [[0, 1, 0], 0.5]]],
+        },
+    )
+    lines = metrics.render().splitlines()
+    assert 'matches_total{pair="A"} 5' in lines
+    assert "queued 1" in lines  # the exited worker's in-flight count is dropped
+    assert "depth 4" in lines  # the newer set() wins
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1.0"} 2' in lines
+    assert "latency_seconds_count 2" in lines
+
+
+def test_unset_dir_renders_this_process_only(registry, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_DIR", None)
+    Counter("matches_total", "Matches.").inc(2)
+    exited_worker(registry, {"matches_total": [[[], 3]]})
+    assert "matches_total 2" in metrics.render().splitlines()
@@ -0,0 +1,103 @@
+import math
+from fractions import Fraction
+import pytest
+
+pytest.importorskip("eth_utils")
+pytest.importorskip("flask")
+pytest.importorskip("requests")
+
+from deposit_book import AddressTable, DepositBook
+from pair_matching import match_books, quote_per_base, round_pool
+from pair_store import PairStore
+from pairs import WETH_USDC
+
+
+def books(base_amounts, quote_amounts):
+    addresses = AddressTable()
+    base, quote = DepositBook(18, addresses), DepositBook(6, addresses)
+    for i, amount in enumerate(base_amounts):
+        base.append(f"base{i}", amount, 1000 + i)
+    for i, amount in enumerate(quote_amounts):
+        quote.append(f"quote{i}", amount, 1000 + i)
+    return base, quote
+
+
+class ListWriter:
+    def __init__(self):
+        self.records = []
+
+    def write(self, record):
+        self.records.append(record)
+
+
+def test_quote_per_base_matches_calculate_liquidity():
+    price = 2000.0
+    lower, upper = price * 0.9, price * 1.1
+    ratio = quote_per_base(lower, upper, 18, 6)
+    # calculate_liquidity(weth_amount=1): 1 / (sqrt(Pu) - sqrt(Pl)) * sqrt(Pu) * sqrt(Pl) USDC.
+    required_usdc = math.sqrt(upper) * math.sqrt(lower) / (math.sqrt(upper) - math.sqrt(lower))
+    assert isinstance(ratio, Fraction)
+    assert float(ratio * 10**18) == pytest.approx(required_usdc * 10**6, rel=1e-12)
+
+
+def test_quote_per_base_scales_with_decimals():
+    same = quote_per_base(0.9, 1.1, 6, 6)
+    assert quote_per_base(0.9, 1.1, 18, 6) == same / 10**12
+    assert quote_per_base(0.9, 1.1, 6, 18) == same * 10**12
+
+
+def test_full_base_match_leaves_quote_residual_in_place():
+    base, quote = books([10], [25, 7])
+    matches = match_books(base, quote, Fraction(2))
+    assert [(m["base_amount_wei"], m["quote_amount_wei"]) for m in matches] == [(10, 20)]
+    assert len(base) == 0
+    assert list(quote) == [("quote0", 5, 1000), ("quote1", 7, 1001)]
+
+
+def test_partial_match_leaves_base_residual_for_the_next_quote():
+    base, quote = books([10], [6, 8])
+    writer = ListWriter()
+    matches = match_books(base, quote, Fraction(2), writer)
+    assert [(m["base_address"], m["base_amount_wei"], m["quote_address"], m["quote_amount_wei"]) for m in matches] == [
+        ("base0", 3, "quote0", 6),
+        ("base0", 4, "quote1", 8),
+    ]
+    assert writer.records == matches
+    assert list(base) == [("base0", 3, 1000)]
+    assert len(quote) == 0
+
+
+def test_amounts_stay_exact_above_64_bits():
+    base, quote = books([3 * 10**24], [10**30])
+    ratio = quote_per_base(1800.0, 2200.0, 18, 6)
+    matches = match_books(base, quote, ratio)
+    assert matches[0]["quote_amount_wei"] == 3 * 10**24 * ratio.numerator // ratio.denominator
+    assert quote[0][1] == 10**30 - matches[0]["quote_amount_wei"]
+
+
+def test_empty_side_matches_nothing():
+    base, quote = books([10, 20], [])
+    assert match_books(base, quote, Fraction(1)) == []
+    assert len(base) == 2
+
+
+def test_pair_store_round_trip_and_single_legacy_migration(tmp_path):
+    legacy = tmp_path / "deposits.json"
+    legacy.write_text(
+        '{"weth_deposits": {"0xa": {"amount": 0.5, "timestamp": "2024-01-01T00:00:00"}},'
+        ' "usdc_deposits": {"0xb": {"amount": 500, "timestamp": "2024-01-01T00:00:01"}}}'
+    )
+    store = PairStore(str(tmp_path / "deposits"), str(legacy))
+    store.add_deposit(WETH_USDC, "quote", "0xc", 7 * 10**6, timestamp=1e10)
+    base, quote = store.load_books(WETH_USDC)
+    assert [(address, amount) for address, amount, _ in base] == [("0xa", 5 * 10**17)]
+    assert [(address, amount) for address, amount, _ in quote] == [("0xb", 500 * 10**6), ("0xc", 7 * 10**6)]
+
+    base.consume(1)
+    store.save_books(WETH_USDC, base, quote)
+    base, quote = PairStore(str(tmp_path / "deposits"), str(legacy)).load_books(WETH_USDC)
+    assert len(base) == 0 and len(quote) == 2
+
+
+def test_round_pool_is_reused():
+    assert round_pool(1) is round_pool(1)
@@ -0,0 +1,74 @@
+from rpc_cache import ImmutableRPCCache
+
+
+class FakeNode:
+    """Dev node answering eth_call with a per-block storage value; counts calls that reach it."""
+
+    def __init__(self, head=10, genesis="0xaaa"):
+        self.head = head
+        self.genesis = genesis
+        self.value = 1
+        self.calls = []
+
+    def __call__(self, method, params):
+        self.calls.append(method)
+        if method == "eth_chainId":
+            return {"jsonrpc": "2.0", "id": 1, "result": hex(31337)}
+        if method == "eth_blockNumber":
+            return {"jsonrpc": "2.0", "id": 1, "result": hex(self.head)}
+        if method == "eth_getBlockByNumber" and params[0] == "0x0":
+            return {"jsonrpc": "2.0", "id": 1, "result": {"hash": self.genesis}}
+        if method == "eth_call":
+            return {"jsonrpc": "2.0", "id": 1, "result": hex(self.value)}
+        return {"jsonrpc": "2.0", "id": 1, "result": True}
+
+
+def make_cache(node):
+    cache = ImmutableRPCCache(head_ttl=0)
+    return cache, cache.middleware(node, None)
+
+
+def call_at(request, block):
+    return request("eth_call", [{"to": "0x1", "data": "0x"}, hex(block)])["result"]
+
+
+def test_dev_chain_caches_below_the_head_only():
+    node = FakeNode(head=10)
+    cache, request = make_cache(node)
+    call_at(request, 9)
+    call_at(request, 9)
+    call_at(request, 10)
+    call_at(request, 10)
+    assert node.calls.count("eth_call") == 3
+    assert cache.hits == 1
+
+
+def test_head_moving_backwards_flushes():
+    node = FakeNode(head=10)
+    cache, request = make_cache(node)
+    assert call_at(request, 5) == "0x1"
+    node.head = 12
+    node.value = 2
+    assert call_at(request, 5) == "0x1"
+    node.head = 7  # evm_revert sent by another client
+    assert call_at(request, 5) == "0x2"
+
+
+def test_restart_with_new_genesis_flushes():
+    node = FakeNode(head=10)
+    cache, request = make_cache(node)
+    assert call_at(request, 5) == "0x1"
+    node.genesis, node.value, node.head = "0xbbb", 2, 20
+    assert call_at(request, 5) == "0x2"
+
+
+def test_state_overrides_flush():
+    node = FakeNode(head=10)
+    cache, request = make_cache(node)
+    assert call_at(request, 5) == "0x1"
+    node.value = 2
+    request("hardhat_setStorageAt", ["0x1", "0x0", "0x2"])
+    assert call_at(request, 5) == "0x2"
+    node.value = 3
+    request("evm_setNextBlockTimestamp", [123])
+    assert call_at(request, 5) == "0x3"
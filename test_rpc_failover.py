@@ -0,0 +1,181 @@
+import os
+import json
+import signal
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+pytest.importorskip("requests")
+
+from rpc_failover import FailoverRPC, RPCTransportError, RPCUnavailable
+
+
+class StandInNode(ThreadingHTTPServer):
+    """Local JSON-RPC node answering with its name after `delay`, HTTP `status`, or a revert for eth_call."""
+
+    daemon_threads = True
+
+    def __init__(self, name, delay=0.0, status=None):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.name = name
+        self.delay = delay
+        self.status = status
+        self.calls = []
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        node = self.server
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        node.calls.append(payload["method"])
+        time.sleep(node.delay)
+        if node.status is not None:
+            self.send_response(node.status)
+            self.end_headers()
+            return
+        if payload["method"] == "eth_call":
+            reply = {"jsonrpc": "2.0", "id": payload["id"], "error": {"code": 3, "message": "execution reverted"}}
+        else:
+            reply = {"jsonrpc": "2.0", "id": payload["id"], "result": node.name}
+        body = json.dumps(reply).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def nodes():
+    started = []
+
+    def start(name, **kwargs):
+        node = StandInNode(name, **kwargs)
+        started.append(node)
+        return node
+
+    yield start
+    for node in started:
+        node.close()
+
+
+def test_reads_prefer_the_fastest_endpoint(nodes):
+    slow, fast = nodes("slow", delay=0.05), nodes("fast")
+    rpc = FailoverRPC([slow.url, fast.url], max_hedge_delay=1.0)
+    for _ in range(5):
+        rpc.request("eth_blockNumber", [])
+    answers = [rpc.request("eth_blockNumber", [])["result"] for _ in range(10)]
+    assert answers == ["fast"] * 10
+
+
+def test_slow_primary_is_hedged(nodes):
+    primary, backup = nodes("primary"), nodes("backup")
+    rpc = FailoverRPC([primary.url, backup.url], min_hedge_delay=0.02, min_samples=5)
+    for _ in range(10):
+        rpc.request("eth_blockNumber", [])
+    # Whichever endpoint now ranks first turns slow; the hedge answers long before it does.
+    ranked_first = primary if rpc._ranked()[0].url == primary.url else backup
+    ranked_first.delay = 1.0
+    started = time.perf_counter()
+    response = rpc.request("eth_blockNumber", [])
+    assert time.perf_counter() - started < 0.5
+    assert response["result"] != ranked_first.name
+    assert rpc.hedges == 1
+
+
+def test_failing_endpoint_opens_its_circuit(nodes):
+    broken, healthy = nodes("broken", status=503), nodes("healthy")
+    rpc = FailoverRPC([broken.url, healthy.url], failure_threshold=2, cooldown=0.3)
+    for _ in range(6):
+        assert rpc.request("eth_blockNumber", [])["result"] == "healthy"
+    assert len(broken.calls) == 2
+    assert rpc.endpoints[0].state == "open"
+
+    broken.status = None
+    time.sleep(0.35)
+    for _ in range(3):
+        rpc.request("eth_blockNumber", [])
+    assert rpc.endpoints[0].state == "closed"
+    assert len(broken.calls) >= 3
+
+
+def test_writes_are_pinned_and_never_duplicated(nodes):
+    first, second = nodes("first", delay=0.2), nodes("second")
+    rpc = FailoverRPC([first.url, second.url], min_hedge_delay=0.01, max_hedge_delay=0.01)
+    for _ in range(3):
+        assert rpc.request("eth_sendRawTransaction", ["0x00"])["result"] == "first"
+    rpc.request("evm_mine", [])
+    assert first.calls.count("eth_sendRawTransaction") == 3
+    assert "eth_sendRawTransaction" not in second.calls
+    assert "evm_mine" not in second.calls
+    assert rpc.hedges == 0
+
+
+def test_write_pin_moves_once_its_circuit_opens(nodes):
+    first, second = nodes("first", status=500), nodes("second")
+    rpc = FailoverRPC([first.url, second.url], failure_threshold=1, cooldown=60)
+    with pytest.raises(RPCTransportError):
+        rpc.request("eth_sendRawTransaction", ["0x00"])
+    assert rpc.request("eth_sendRawTransaction", ["0x00"])["result"] == "second"
+    assert first.calls.count("eth_sendRawTransaction") == 1
+
+
+def test_rpc_errors_are_answers_not_failures(nodes):
+    node = nodes("node")
+    rpc = FailoverRPC([node.url], failure_threshold=1)
+    for _ in range(3):
+        assert rpc.request("eth_call", [{}, "latest"])["error"]["message"] == "execution reverted"
+    assert rpc.endpoints[0].state == "closed"
+
+
+def test_all_endpoints_down(nodes):
+    a, b = nodes("a", status=502), nodes("b", status=502)
+    rpc = FailoverRPC([a.url, b.url], failure_threshold=1, cooldown=60)
+    with pytest.raises(RPCUnavailable):
+        rpc.request("eth_blockNumber", [])
+    with pytest.raises(RPCUnavailable):
+        rpc.request("eth_blockNumber", [])
+    assert len(a.calls) == len(b.calls) == 1
+
+
+def test_reads_follow_a_send_to_the_pinned_endpoint(nodes):
+    pinned, other = nodes("pinned", delay=0.05), nodes("other")
+    rpc = FailoverRPC([pinned.url, other.url], read_your_writes=0.3, max_hedge_delay=1.0)
+    for _ in range(5):
+        rpc.request("eth_blockNumber", [])
+    assert rpc.request("eth_blockNumber", [])["result"] == "other"
+    rpc.request("eth_sendRawTransaction", ["0x00"])
+    assert [rpc.request("eth_getBalance", ["0x0", "latest"])["result"] for _ in range(3)] == ["pinned"] * 3
+    time.sleep(0.35)
+    assert rpc.request("eth_getBalance", ["0x0", "latest"])["result"] == "other"
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_requests_work_in_a_forked_child(nodes):
+    a, b = nodes("a"), nodes("b")
+    rpc = FailoverRPC([a.url, b.url])
+    rpc.request("eth_blockNumber", [])
+    pid = os.fork()
+    if pid == 0:
+        signal.alarm(5)
+        ok = False
+        try:
+            ok = rpc.request("eth_blockNumber", [])["result"] in ("a", "b")
+        finally:
+            os._exit(0 if ok else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
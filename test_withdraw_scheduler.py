@@ -0,0 +1,115 @@
+import time
+from types import SimpleNamespace
+import pytest
+
+from withdraw_scheduler import LOCK_PERIOD, WithdrawScheduler
+
+
+class FakeCall:
+    def __init__(self, fn):
+        self.fn = fn
+
+    def call(self, *args, **kwargs):
+        return self.fn()
+
+
+class FakeChain:
+    """Idle automine chain, clock ahead by `time_offset`; withdrawAndDistribute reverts until due."""
+
+    def __init__(self, idle=3600.0, time_offset=0.0):
+        self.latest = SimpleNamespace(number=10, timestamp=int(time.time() + time_offset - idle))
+        self.time_offset = time_offset
+        self.matching_timestamp = 0
+        self.withdrawals = []
+        self.eth = SimpleNamespace(get_block=lambda identifier: self.latest)
+        self.address = "0x000000000000000000000000000000000000c1a9"
+        self.functions = SimpleNamespace(
+            matchingTimestamp=lambda: FakeCall(lambda: self.matching_timestamp),
+            withdrawAndDistribute=lambda: FakeCall(self._simulate),
+        )
+        self.events = SimpleNamespace(
+            WithdrawAndDistribute=lambda: SimpleNamespace(get_logs=lambda fromBlock: list(self.withdrawals))
+        )
+
+    def now(self):
+        return time.time() + self.time_offset
+
+    def match_in(self, seconds):
+        """Records a matching round whose lock ends `seconds` from now on the chain's clock."""
+        self.matching_timestamp = self.now() + seconds - LOCK_PERIOD
+
+    def _simulate(self):
+        if self.now() < self.matching_timestamp + LOCK_PERIOD:
+            raise RuntimeError("execution reverted: Too early")
+
+    def send(self, contract):
+        self._simulate()
+        self.withdrawals.append(SimpleNamespace(args=SimpleNamespace(timestamp=int(self.now()))))
+        return SimpleNamespace(transactionHash=b"\x01" * 32, status=1)
+
+
+@pytest.fixture
+def scheduler():
+    started = []
+
+    def start(chain):
+        s = WithdrawScheduler(chain, lambda: chain, chain.send, sender="0xowner", retry_delays=(0.05,))
+        s.block_time = 0.05
+        started.append(s)
+        return s.start()
+
+    yield start
+    for s in started:
+        s.stop(timeout=1)
+
+
+def wait_for(predicate, timeout=3.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_fires_on_an_idle_chain(scheduler):
+    chain = FakeChain(idle=3600)
+    chain.match_in(0.3)
+    s = scheduler(chain)
+    entry = s.refresh()
+    assert entry["status"] == "scheduled"
+    assert s.status()["pending"]["seconds_until_due"] <= 0.3
+    assert wait_for(lambda: s.completed)
+    assert s.completed[0]["status"] == "withdrawn"
+    assert len(chain.withdrawals) == 1
+
+
+def test_follows_a_chain_clock_ahead_of_the_wall_clock(scheduler):
+    chain = FakeChain(idle=0, time_offset=3600)
+    chain.match_in(0.3)
+    s = scheduler(chain)
+    s.refresh()
+    assert wait_for(lambda: s.completed)
+    assert s.completed[0]["status"] == "withdrawn"
+
+
+def test_early_attempt_is_retried_without_sending(scheduler):
+    chain = FakeChain(idle=0)
+    chain.match_in(0.3)
+    s = scheduler(chain)
+    s.block_time = 0.2  # submits 0.2s early, while the pending block is still too early
+    s.refresh()
+    assert wait_for(lambda: s.completed)
+    assert s.completed[0]["status"] == "withdrawn"
+    assert s.completed[0]["attempts"] == 1
+    assert len(chain.withdrawals) == 1
+
+
+def test_withdrawn_round_is_not_rearmed(scheduler):
+    chain = FakeChain(idle=0)
+    chain.match_in(0.1)
+    s = scheduler(chain)
+    s.refresh()
+    assert wait_for(lambda: s.completed)
+    assert s.refresh() is None
+    assert len(chain.withdrawals) == 1
@@ -0,0 +1,209 @@
+import time
+import threading
+from contextlib import nullcontext
+
+# LiquidityMatching.withdrawAndDistribute requires block.timestamp >= matchingTimestamp + 10 minutes.
+LOCK_PERIOD = 600
+
+
+def withdrawal_due(contract, block_identifier="latest"):
+    """Earliest block timestamp withdrawAndDistribute accepts, or None before any matching."""
+    matching_timestamp = contract.functions.matchingTimestamp().call(block_identifier=block_identifier)
+    if matching_timestamp == 0:
+        return None
+    return matching_timestamp + LOCK_PERIOD
+
+
+def estimate_block_time(w3, sample=20):
+    """Mean seconds per block over the last `sample` blocks (1.0 when there is no history)."""
+    latest = w3.eth.get_block("latest")
+    if latest.number == 0:
+        return 1.0
+    start = w3.eth.get_block(max(0, latest.number - sample))
+    blocks = latest.number - start.number
+    return max(1.0, (latest.timestamp - start.timestamp) / blocks)
+
+
+class WithdrawScheduler:
+    """Sends withdrawAndDistribute once per matching round, at the first block the 10-minute lock allows."""
+
+    def __init__(
+        self,
+        w3,
+        get_contract,
+        send,
+        sender,
+        lock=None,
+        from_block=0,
+        retry_delays=(2, 5, 15, 30, 60),
+        history=50,
+    ):
+        self.w3 = w3
+        self.get_contract = get_contract
+        self.send = send
+        self.sender = sender
+        self.lock = lock or nullcontext
+        # An int or a callable returning one (e.g. the deploy block), bounding event lookups.
+        self.from_block = from_block
+        self.retry_delays = tuple(retry_delays)
+        self.history = history
+        self.block_time = None
+        self.pending = None
+        self.completed = []
+        self._cond = threading.Condition()
+        self._stop = False
+        self._thread = None
+
+    # -- chain reads -----------------------------------------------------
+    def _chain_clock_offset(self):
+        """Seconds the chain's clock runs ahead of the wall clock."""
+        # Never behind it: an idle automine chain's latest block can be arbitrarily old.
+        return max(0.0, self.w3.eth.get_block("latest").timestamp - time.time())
+
+    def already_withdrawn(self, contract, due):
+        """True when a WithdrawAndDistribute at or after `due` is on chain."""
+        from_block = self.from_block() if callable(self.from_block) else self.from_block
+        events = contract.events.WithdrawAndDistribute().get_logs(fromBlock=from_block)
+        return any(event.args.timestamp >= due for event in events)
+
+    def refresh(self):
+        """Re-reads matchingTimestamp and (re)arms the schedule; call after each round and once at start-up."""
+        contract = self.get_contract()
+        if contract is None:
+            return None
+        due = withdrawal_due(contract)
+        with self._cond:
+            if due is None or (self.pending is not None and self.pending["due"] == due):
+                return self.pending
+            if any(entry["due"] == due for entry in self.completed):
+                return None
+        if self.already_withdrawn(contract, due):
+            return None
+        if self.block_time is None:
+            self.block_time = estimate_block_time(self.w3)
+        clock_offset = self._chain_clock_offset()
+        with self._cond:
+            self.pending = {
+                "contract": contract.address,
+                "matching_timestamp": due - LOCK_PERIOD,
+                "due": due,
+                "status": "scheduled",
+                "attempts": 0,
+                "next_attempt_at": due,
+                "clock_offset": clock_offset,
+                "transaction_hash": None,
+                "last_error": None,
+            }
+            self._cond.notify()
+            return self.pending
+
+    # -- execution -------------------------------------------------------
+    def _sleep_until(self, chain_time, clock_offset):
+        """Waits until the chain clock reaches `chain_time`; False if woken early."""
+        wait = chain_time - (time.time() + clock_offset)
+        if wait <= 0:
+            return True
+        with self._cond:
+            self._cond.wait(wait)
+        return False
+
+    def _attempt(self, entry):
+        contract = self.get_contract()
+        with self.lock():
+            if self.already_withdrawn(contract, entry["due"]):
+                return "already withdrawn"
+            # Simulate against the pending block first so a block that is
+            # still too early costs no gas and no attempt.
+            try:
+                contract.functions.withdrawAndDistribute().call({"from": self.sender}, "pending")
+            except Exception as e:
+                if "Too early" in str(e):
+                    return None
+                raise
+            receipt = self.send(contract)
+        entry["transaction_hash"] = receipt.transactionHash.hex()
+        if receipt.status != 1:
+            raise RuntimeError(f"withdrawAndDistribute reverted in {entry['transaction_hash']}")
+        return "withdrawn"
+
+    def _finish(self, entry, status):
+        entry["status"] = status
+        entry["finished_at"] = time.time()
+        with self._cond:
+            if self.pending is entry:
+                self.pending = None
+            self.completed = (self.completed + [entry])[-self.history :]
+        print(f"INFO: Withdrawal for matching at {entry['matching_timestamp']} {status}")
+
+    def run_once(self):
+        """Waits for the pending withdrawal to come due and makes one attempt at it."""
+        with self._cond:
+            entry = self.pending
+        if entry is None:
+            return
+        # Submit when the next block will be the first one at or past the target.
+        if not self._sleep_until(entry["next_attempt_at"] - self.block_time, entry["clock_offset"]):
+            return
+        entry["status"] = "submitting"
+        try:
+            outcome = self._attempt(entry)
+        except Exception as e:
+            entry["attempts"] += 1
+            entry["last_error"] = str(e)
+            if entry["attempts"] > len(self.retry_delays):
+                self._finish(entry, "failed")
+                print(f"WARNING: Giving up on withdrawal after {entry['attempts']} attempts: {e}")
+                return
+            delay = self.retry_delays[entry["attempts"] - 1]
+            entry["status"] = "retrying"
+            self._reschedule(entry, delay)
+            print(f"WARNING: Withdrawal attempt {entry['attempts']} failed, retrying in {delay}s: {e}")
+            return
+        if outcome is None:
+            # Our clock ran ahead of the chain's: try again one block later.
+            entry["status"] = "scheduled"
+            self._reschedule(entry, self.block_time)
+            return
+        entry["attempts"] += 1
+        self._finish(entry, outcome)
+
+    def _reschedule(self, entry, delay):
+        # run_once submits one block ahead of next_attempt_at, so add it back.
+        entry["next_attempt_at"] = time.time() + entry["clock_offset"] + delay + self.block_time
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self.pending is None and not self._stop:
+                    self._cond.wait()
+                if self._stop:
+                    return
+            try:
+                self.run_once()
+            except Exception as e:
+                # Chain reads failing (e.g. node down); back off before re-checking.
+                print(f"WARNING: Withdrawal scheduler error: {e}")
+                with self._cond:
+                    self._cond.wait(self.retry_delays[0] if self.retry_delays else 1)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="withdraw-scheduler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def status(self):
+        with self._cond:
+            pending = dict(self.pending) if self.pending else None
+            completed = list(self.completed)
+        if pending is not None:
+            pending["seconds_until_due"] = max(0.0, pending["due"] - (time.time() + pending["clock_offset"]))
+        return {"pending": pending, "completed": completed, "block_time": self.block_time}